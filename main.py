@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import asyncio
+import logging
 import sys
 from os import environ
 from argparse import ArgumentParser
@@ -12,6 +13,7 @@ from dbus_fast.constants import PropertyAccess
 from dbus_fast import DBusError, BusType, Variant
 
 from ofono2mm import MMModemInterface, Ofono, DBus
+from ofono2mm.mm_modem import release_modemmanager_name
 from ofono2mm.utils import async_locked, read_setting
 from ofono2mm.logging import ofono2mm_print
 from typing import Dict
@@ -22,13 +24,16 @@ def get_version():
 class MMInterface(ServiceInterface):
     def __init__(self, loop, bus, verbose=False):
         super().__init__('org.freedesktop.ModemManager1')
-        ofono2mm_print("Initializing Manager interface", verbose)
+        ofono2mm_print("Initializing Manager interface", verbose, obj=self)
         self.loop = loop
         self.bus = bus
         self.verbose = verbose
         self.ofono_client: Ofono = Ofono(bus)
         self.dbus_client: DBus = DBus(bus)
         self.modems: Dict[str, MMModemInterface] = {}
+        self.ofono_manager_interface = None
+        # One Event per simple_set_apn task waiting to retry, set when Network Manager appears
+        self.network_manager_waiters = set()
         self.loop.create_task(self.check_ofono_presence())
 
     @dbus_property(access=PropertyAccess.READ)
@@ -37,16 +42,16 @@ class MMInterface(ServiceInterface):
 
     @method()
     async def ScanDevices(self):
-        ofono2mm_print("Scanning devices", self.verbose)
+        ofono2mm_print("Scanning devices", self.verbose, obj=self)
 
         try:
             await self.find_ofono_modems()
         except Exception as e:
-            ofono2mm_print(f"Failed to scan for devices: {e}", self.verbose)
+            ofono2mm_print("Failed to scan for devices: %s", self.verbose, e, obj=self)
             raise DBusError("org.freedesktop.ModemManager1.Error.Core.Failed", "Failed to scan for devices")
 
     async def check_ofono_presence(self):
-        ofono2mm_print("Checking ofono presence", self.verbose)
+        ofono2mm_print("Checking ofono presence", self.verbose, obj=self)
 
         dbus_iface = self.dbus_client["dbus"]["/org/freedesktop/DBus"]["org.freedesktop.DBus"]
         dbus_iface.on_name_owner_changed(self.dbus_name_owner_changed)
@@ -57,7 +62,7 @@ class MMInterface(ServiceInterface):
             self.ofono_removed()
 
     def ofono_added(self):
-        ofono2mm_print("oFono added", self.verbose)
+        ofono2mm_print("oFono added", self.verbose, obj=self)
 
         self.ofono_manager_interface = self.ofono_client["ofono"]["/"]["org.ofono.Manager"]
         self.ofono_manager_interface.on_modem_added(self.ofono_modem_added)
@@ -65,118 +70,128 @@ class MMInterface(ServiceInterface):
         self.loop.create_task(self.find_ofono_modems())
 
     def ofono_removed(self):
-        ofono2mm_print("oFono removed", self.verbose)
+        ofono2mm_print("oFono removed", self.verbose, obj=self)
         self.ofono_manager_interface = None
 
-        for path, modem in self.modems.items():
+        for modem in self.modems.values():
             modem.unexport_mm_interface_objects()
         self.modems.clear()
 
-        self.loop.create_task(self.bus.release_name('org.freedesktop.ModemManager1'))
+        self.loop.create_task(release_modemmanager_name(self.bus))
 
     async def find_ofono_modems(self, retry_counter=5):
-        ofono2mm_print("Finding oFono modems", self.verbose)
-
-        self.mm_modem_objects = []
-        self.mm_modem_interfaces = []
+        ofono2mm_print("Finding oFono modems", self.verbose, obj=self)
 
-        if not self.ofono_manager_interface:
-            ofono2mm_print("oFono manager interface is empty, skipping", self.verbose)
-            return
+        for attempt in range(retry_counter + 1):
+            if not self.ofono_manager_interface:
+                ofono2mm_print("oFono manager interface is empty, skipping", self.verbose, obj=self)
+                return
 
-        try:
-            modems = await self.ofono_manager_interface.call_get_modems()
-        except DBusError as e:
-            ofono2mm_print(f"Failed to get modems from oFono: {e}", self.verbose)
-            return
+            try:
+                modems = await self.ofono_manager_interface.call_get_modems()
+            except DBusError as e:
+                ofono2mm_print("Failed to get modems from oFono: %s", self.verbose, e, obj=self)
+                return
 
-        ril_modems = [modem for modem in modems if modem[0].startswith("/ril_")]
+            ril_modems = [modem for modem in modems if modem[0].startswith("/ril_")]
+            if ril_modems:
+                break
 
-        if not ril_modems:
-            ofono2mm_print("No ril modems found", self.verbose)
             # This can happen if we try to connect too early. Give it a couple seconds and give it some more shots
             # Seriously though, that's fucking stupid.
-            if retry_counter <= 0:
-                ofono2mm_print("No ril modems found after retries, giving up", self.verbose)
+            if attempt == retry_counter:
+                ofono2mm_print("No ril modems found after retries, giving up", self.verbose, obj=self)
                 return
 
-            ofono2mm_print("No ril modems found, retrying", self.verbose)
-            await asyncio.sleep(2)
-            await self.find_ofono_modems(retry_counter - 1)
+            ofono2mm_print("No ril modems found, retrying", self.verbose, obj=self)
+            await asyncio.sleep(2 ** attempt)
 
-        modems_to_export = []
+        results = await asyncio.gather(*(self.prepare_modem(path, props) for path, props in ril_modems))
 
-        for path, props in ril_modems:
-            ofono2mm_print(f"Found modem: {path}, {props}", self.verbose)
+        # If the SIM card is present, put the modem at the front of the list so it gets exported first
+        modems_to_export = [(path, props) for sim_present, path, props in results if sim_present]
+        modems_to_export += [(path, props) for sim_present, path, props in results if not sim_present]
 
-            if not props['Powered'].value:
-                try:
-                    await self.ofono_client["ofono_modem"][path]['org.ofono.Modem'].call_set_property('Powered', Variant('b', True))
-                except DBusError as e:
-                    ofono2mm_print(f"Failed to power up modem {path}: {e}", self.verbose)
-                    pass
+        for path, props in modems_to_export:
+            await self.export_new_modem(path, props)
 
-            if not props['Online'].value:
-                try:
-                    await self.ofono_client["ofono_modem"][path]['org.ofono.Modem'].call_set_property('Online', Variant('b', True))
-                except DBusError as e:
-                    # Can happen if airplane mode is on. Don't worry about it.
-                    ofono2mm_print(f"Failed to set modem {path} to online: {e}", self.verbose)
-                    pass
+    async def prepare_modem(self, path, props):
+        ofono2mm_print("Found modem: %s, %s", self.verbose, path, props, obj=self)
 
-                props.update(await self.ofono_client["ofono_modem"][path]['org.ofono.Modem'].call_get_properties())
+        # Every lookup through the client builds a new proxy object, so only do it once per interface
+        modem_iface = self.ofono_client["ofono_modem"][path]['org.ofono.Modem']
+        state_changed = False
 
+        if not props['Powered'].value:
             try:
-                sim_manager = self.ofono_client["ofono_modem"][path]['org.ofono.SimManager']
-                sim_props = await sim_manager.call_get_properties()
-                sim_present = sim_props['Present'].value
+                await modem_iface.call_set_property('Powered', Variant('b', True))
+                state_changed = True
             except DBusError as e:
-                # Can also happen if airplane mode is on.
-                ofono2mm_print(f"Failed to get SIM properties for modem {path}: {e}", self.verbose)
-                sim_present = False
+                ofono2mm_print("Failed to power up modem %s: %s", self.verbose, path, e, obj=self)
+                pass
 
-            # If the SIM card is present, prepend it to the list of modems to export so it gets exported first
-            if sim_present:
-                modems_to_export.insert(0, (path, props))
-            else:
-                modems_to_export.append((path, props))
+        if not props['Online'].value:
+            try:
+                await modem_iface.call_set_property('Online', Variant('b', True))
+                state_changed = True
+            except DBusError as e:
+                # Can happen if airplane mode is on. Don't worry about it.
+                ofono2mm_print("Failed to set modem %s to online: %s", self.verbose, path, e, obj=self)
+                pass
 
-        for path, props in modems_to_export:
-            await self.export_new_modem(path, props)
+        try:
+            sim_manager = self.ofono_client["ofono_modem"][path]['org.ofono.SimManager']
+            sim_props = await sim_manager.call_get_properties()
+            sim_present = sim_props['Present'].value
+        except DBusError as e:
+            # Can also happen if airplane mode is on.
+            ofono2mm_print("Failed to get SIM properties for modem %s: %s", self.verbose, path, e, obj=self)
+            sim_present = False
+
+        # oFono fills in more modem properties once it is powered and online. Rather than fetching them
+        # all again here, don't hand over stale ones and let the modem interface fetch them when it starts.
+        if state_changed:
+            props = None
+
+        return sim_present, path, props
 
     def dbus_name_owner_changed(self, name, old_owner, new_owner):
         if name == "org.ofono":
-            ofono2mm_print(f"oFono name owner changed, name: {name}, old owner: {old_owner}, new owner: {new_owner}", self.verbose)
+            ofono2mm_print("oFono name owner changed, name: %s, old owner: %s, new owner: %s", self.verbose, name, old_owner, new_owner, obj=self)
             if new_owner == "":
                 self.ofono_removed()
             else:
                 self.ofono_added()
+        elif name == "org.freedesktop.NetworkManager" and new_owner != "":
+            ofono2mm_print("Network Manager appeared with owner %s", self.verbose, new_owner, obj=self)
+            for appeared in self.network_manager_waiters:
+                appeared.set()
 
     def ofono_modem_added(self, path, mprops):
-        ofono2mm_print(f"oFono modem added at path {path} and properties {mprops}", self.verbose)
+        ofono2mm_print("oFono modem added at path %s and properties %s", self.verbose, path, mprops, obj=self)
 
         try:
             self.loop.create_task(self.export_new_modem(path, mprops))
         except Exception as e:
-            ofono2mm_print(f"Failed to create task for modem {path}: {e}", self.verbose)
+            ofono2mm_print("Failed to create task for modem %s: %s", self.verbose, path, e, obj=self)
 
     async def export_new_modem(self, path, mprops):
-        if not '/ril_' in path:
+        if not path.startswith('/ril_'):
             # This can happen when, for example, a phone is paired over Bluetooth -- even if the phone isn't connected!
             # TODO: there is no substantial reason to not support non-RIL modems, but we are just focusing on whatever
             # provides the best user experience for now. This could be revisited in the future.
-            ofono2mm_print(f"Modem {path} is not a RIL modem, skipping", self.verbose)
+            ofono2mm_print("Modem %s is not a RIL modem, skipping", self.verbose, path, obj=self)
             return
 
-        ofono2mm_print(f"Processing modem {path} with properties {mprops}", self.verbose)
+        ofono2mm_print("Processing modem %s with properties %s", self.verbose, path, mprops, obj=self)
 
         if path in self.modems:
-            ofono2mm_print(f"Modem {path} already exists. Not sure why we're here.", self.verbose)
+            ofono2mm_print("Modem %s already exists. Not sure why we're here.", self.verbose, path, obj=self)
             return
 
-        index = int(path.split('_')[-1])
+        index = int(path.rpartition('_')[2])
 
-        mm_modem_interface = MMModemInterface(self.loop, index, self.bus, self.ofono_client, path, self.verbose)
+        mm_modem_interface = MMModemInterface(self.loop, index, self.bus, self.ofono_client, path, self.verbose, mprops)
         promises = [mm_modem_interface.init_mm_sim_interface(),
                     mm_modem_interface.init_mm_3gpp_interface(),
                     mm_modem_interface.init_mm_3gpp_ussd_interface(),
@@ -201,17 +216,31 @@ class MMInterface(ServiceInterface):
         self.loop.create_task(self.simple_set_apn(mm_modem_simple))
 
     async def simple_set_apn(self, mm_modem_simple):
-        ofono2mm_print("Setting APN in Network Manager", self.verbose)
-
-        while True:
-            ret = await mm_modem_simple.network_manager_set_apn()
-            if ret:
-                return
+        ofono2mm_print("Setting APN in Network Manager", self.verbose, obj=self)
 
-            await asyncio.sleep(2)
+        appeared = asyncio.Event()
+        self.network_manager_waiters.add(appeared)
+        try:
+            attempt = 0
+            while True:
+                # Clear before trying, Network Manager showing up during the attempt should still cut the back off short
+                appeared.clear()
+                ret = await mm_modem_simple.network_manager_set_apn()
+                if ret:
+                    return
+
+                # Back off while nothing changes, but retry right away once Network Manager shows up
+                delay = min(30, 2 * 1.5 ** attempt)
+                attempt += 1
+                try:
+                    await asyncio.wait_for(appeared.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.network_manager_waiters.discard(appeared)
 
     def ofono_modem_removed(self, path):
-        ofono2mm_print(f"oFono modem removed at path {path}", self.verbose)
+        ofono2mm_print("oFono modem removed at path %s", self.verbose, path, obj=self)
 
         if path in self.modems:
             self.modems[path].unexport_mm_interface_objects()
@@ -219,15 +248,15 @@ class MMInterface(ServiceInterface):
 
     @method()
     def SetLogging(self, level: 's'):
-        ofono2mm_print(f"Set logging with level {level}", self.verbose)
+        ofono2mm_print("Set logging with level %s", self.verbose, level, obj=self)
 
     @method()
     def ReportKernelEvent(self, properties: 'a{sv}'):
-        ofono2mm_print(f"Report kernel events with properties {properties}", self.verbose)
+        ofono2mm_print("Report kernel events with properties %s", self.verbose, properties, obj=self)
 
     @method()
     def InhibitDevice(self, uid: 's', inhibit: 'b'):
-        ofono2mm_print(f"Inhibit device with uid {uid} set to {inhibit}", self.verbose)
+        ofono2mm_print("Inhibit device with uid %s set to %s", self.verbose, uid, inhibit, obj=self)
 
 def print_version():
     version = get_version()
@@ -262,11 +291,27 @@ async def main():
     else:
         verbose = args.verbose
 
+    # obj is the Class(object path). prefix ofono2mm_print hands over, other loggers don't set it
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(created)f %(obj)s%(funcName)s: %(message)s', defaults={'obj': ''}))
+    logging.basicConfig(handlers=[handler])
+    logging.getLogger('ofono2mm').setLevel(logging.DEBUG if verbose else logging.WARNING)
+
     bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
     loop = asyncio.get_running_loop()
+    if hasattr(asyncio, 'eager_task_factory'):
+        # Python 3.12+: tasks that never suspend (most init_mm_* helpers) finish without a trip through the loop
+        loop.set_task_factory(asyncio.eager_task_factory)
     mm_manager_interface = MMInterface(loop, bus, verbose=verbose)
     bus.export('/org/freedesktop/ModemManager1', mm_manager_interface)
     await bus.wait_for_disconnect()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        # uvloop.install() goes through the deprecated event loop policies, hand the loop factory to a Runner instead
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            runner.run(main())
@@ -1,4 +1,4 @@
-from typing import Dict, List, Callable
+from typing import Dict, List, Tuple, Callable
 from ofono2mm.logging import ofono2mm_print
 import asyncio
 
@@ -14,14 +14,19 @@ class DBusInterfaceProperties:
         """What you get when you access a property of a DBusInterfaceProperties object.
         It's a dict that can be accessed and modified like a normal dict, but also has the on() thing.
         """
+        __slots__ = ('ofono_proxy', 'interface', 'verbose', 'props', 'watchers', '_has_watchers', '_subscribed', '_dispatch')
+
         def __init__(self, ofono_proxy, interface, verbose):
             self.ofono_proxy = ofono_proxy
             self.interface = interface
             self.verbose = verbose
             self.props: Dict[str, Variant] = {}
-            self.watchers: Dict[str, List[Callable]] = {}
+            self.watchers: Dict[str, List[Tuple[Callable, bool]]] = {}
+            self._has_watchers = False
+            self._subscribed = False
+            self._dispatch: Dict[str, List[Tuple[Callable, bool]]] = {}
 
-        async def init(self, skip_props=False):
+        async def init(self, skip_props=False, props=None):
             if skip_props:
                 return
             retries_left = 3
@@ -29,16 +34,23 @@ class DBusInterfaceProperties:
             # So we'll cut it some slack
             while retries_left > 0:
                 try:
-                    # Watch for property changes to update the internal dict
-                    self.ofono_proxy[self.interface].on_property_changed(self._on_property_changed)
-                    self.props = await self.ofono_proxy[self.interface].call_get_properties()
+                    # Watch for property changes to update the internal dict.
+                    # init() runs again when interfaces get re-added, don't get every signal twice then.
+                    if not self._subscribed:
+                        self.ofono_proxy[self.interface].on_property_changed(self._on_property_changed)
+                        self._subscribed = True
+                    # Properties we already got in bulk (e.g. from GetModems) save us a round-trip
+                    if props is not None:
+                        self.props = props
+                    else:
+                        self.props = await self.ofono_proxy[self.interface].call_get_properties()
                     return
                 except Exception as e:
                     retries_left -= 1
                     if retries_left > 0:
                         await asyncio.sleep(0.5)
                     else:
-                        ofono2mm_print(f"Interface {self.interface} doesn't have properties? {str(e).strip()}", self.verbose)
+                        ofono2mm_print("Interface %s doesn't have properties? %s", self.verbose, self.interface, str(e).strip(), obj=self)
 
         def __getitem__(self, prop):
             if prop in self.props:
@@ -56,44 +68,64 @@ class DBusInterfaceProperties:
         def __contains__(self, prop):
             return prop in self.props
 
+        def get(self, prop, default=None):
+            return self.props.get(prop, default)
+
         async def _on_property_changed(self, prop, value):
-            if prop in self.props and self.props[prop].value == value.value:
+            old_value = self.props.get(prop)
+            if old_value is not None and old_value.value == value.value:
                 # Well that ain't much of a change innit
                 return
             self.props[prop] = value
 
-            # Watchers can be asynchronous, so we have to explicitly check for that and await them.
-            # Otherwise, Python gets upset.
-            if prop in self.watchers:
-                for watcher in self.watchers[prop]:
-                    if asyncio.iscoroutinefunction(watcher):
-                        await watcher(prop, value)
-                    else:
-                        watcher(prop, value)
+            if not self._has_watchers:
+                return
 
-            if '*' in self.watchers:
-                for watcher in self.watchers['*']:
-                    if asyncio.iscoroutinefunction(watcher):
-                        await watcher(prop, value)
-                    else:
-                        watcher(prop, value)
+            # Watchers can be asynchronous, so we have to await them. Otherwise, Python gets upset.
+            # Whether they are was already figured out when they got registered in on().
+            dispatch = self._dispatch.get(prop)
+            if dispatch is None:
+                dispatch = self.watchers.get('*', ())
+
+            for watcher, is_coroutine in dispatch:
+                if is_coroutine:
+                    await watcher(prop, value)
+                else:
+                    watcher(prop, value)
 
         def on(self, prop, callback):
             if prop not in self.watchers:
                 self.watchers[prop] = []
-            self.watchers[prop].append(callback)
+            self.watchers[prop].append((callback, asyncio.iscoroutinefunction(callback)))
+            self._has_watchers = True
+
+            # Property changes happen way more often than watchers get added, so precompute
+            # the list of watchers for each property, '*' watchers included, here.
+            star_watchers = self.watchers.get('*', [])
+            if prop == '*':
+                for watched_prop in self._dispatch:
+                    self._dispatch[watched_prop] = self.watchers[watched_prop] + star_watchers
+            else:
+                self._dispatch[prop] = self.watchers[prop] + star_watchers
+
+    __slots__ = ('ofono_proxy', 'verbose', 'interfaces')
 
     def __init__(self, ofono_proxy, verbose):
         self.ofono_proxy = ofono_proxy
         self.verbose = verbose
         self.interfaces: Dict[str, DBusInterface] = {}
 
-    def __getitem__(self, interface: str) -> Dict[str, any]:
-        if interface in self.interfaces:
-            return self.interfaces[interface]
-
-        self.interfaces[interface] = self.DBusInterface(self.ofono_proxy, interface, self.verbose)
+    def get_or_create(self, interface: str) -> DBusInterface:
+        if interface not in self.interfaces:
+            self.interfaces[interface] = self.DBusInterface(self.ofono_proxy, interface, self.verbose)
         return self.interfaces[interface]
 
+    def __getitem__(self, interface: str) -> DBusInterface:
+        try:
+            return self.interfaces[interface]
+        except KeyError:
+            # Readers may look at an interface oFono didn't export yet and just see no properties
+            return self.get_or_create(interface)
+
     def __contains__(self, interface: str) -> bool:
         return interface in self.interfaces
@@ -1,26 +1,22 @@
-from inspect import currentframe
-from time import time
+import logging
 
-def ofono2mm_print(message, verbose):
-    if not verbose:
-        return
+logger = logging.getLogger('ofono2mm')
 
-    frame = currentframe()
-    caller_frame = frame.f_back
-    if 'self' in caller_frame.f_locals:
-        cls = caller_frame.f_locals['self']
-        cls_name = cls.__class__.__name__
+def log_prefix(obj):
+    # Class(object path). like the old prefix, so lines from /ril_0 and /ril_1 can be told apart
+    if hasattr(obj, 'modem_name'):
+        obj_path = obj.modem_name
+    elif hasattr(obj, 'voicecall'):
+        obj_path = obj.voicecall
+    else:
+        obj_path = 'Unknown'
 
-        if hasattr(cls, 'modem_name'):
-            obj_path = getattr(cls, 'modem_name', 'Unknown')
-        elif hasattr(cls, 'voicecall'):
-            obj_path = getattr(cls, 'voicecall', 'Unknown')
-        else:
-            obj_path = 'Unknown'
+    return f"{obj.__class__.__name__}({obj_path})."
 
-        func_name = caller_frame.f_code.co_name
-        full_message = f"{cls_name}({obj_path}).{func_name}: {message}"
-    else:
-        func_name = caller_frame.f_code.co_name
-        full_message = f"{func_name}: {message}"
-    print(f"{time()} {full_message}")
+def ofono2mm_print(message, verbose, *args, obj=None):
+    if not verbose:
+        return
+
+    # stacklevel makes the record point at whoever called us instead of this helper,
+    # callers hand over self for the prefix so nothing has to be dug out of their frame
+    logger.debug(message, *args, stacklevel=2, extra={'obj': log_prefix(obj) if obj is not None else ''})
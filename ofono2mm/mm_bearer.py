@@ -2,16 +2,43 @@ import asyncio
 
 from dbus_fast.service import ServiceInterface, method, dbus_property
 from dbus_fast.constants import PropertyAccess
-from dbus_fast import Variant
+from dbus_fast import Variant, DBusError
 
-from ofono2mm.utils import async_retryable, save_setting, read_setting
+from ofono2mm.utils import async_retryable, call_with_backoff, save_setting, read_setting
 from ofono2mm.logging import ofono2mm_print
 
+# Variants are never modified in place, so the common ones can be shared between bearers
+EMPTY_STRING = Variant('s', '')
+FALSE = Variant('b', False)
+TRUE = Variant('b', True)
+UINT_ZERO = Variant('u', 0)
+
+AUTH_METHODS = {
+    'none': 1, # none MM_BEARER_ALLOWED_AUTH_NONE
+    'pap': 2, # pap MM_BEARER_ALLOWED_AUTH_PAP
+    'chap': 3, # chap MM_BEARER_ALLOWED_AUTH_CHAP
+}
+
+IP_METHODS = {
+    'static': 2, # static MM_BEARER_IP_METHOD_STATIC
+    'dhcp': 3, # dhcp MM_BEARER_IP_METHOD_DHCP
+}
+
+# Ip4Config only has room for three name servers
+DNS_KEYS = ('dns1', 'dns2', 'dns3')
+
+# oFono properties set_props actually looks at
+CONNECTION_MANAGER_PROPS = {'RoamingAllowed'}
+CONTEXT_PROPS = {'AccessPointName', 'AuthenticationMethod', 'Username', 'Password'}
+
+def context_value(ctx_props, key):
+    return ctx_props.get(key, EMPTY_STRING).value
+
 class MMBearerInterface(ServiceInterface):
     def __init__(self, ofono_client, modem_name, ofono_interfaces, ofono_interface_props, mm_modem, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Bearer')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing Bearer interface", verbose)
+        ofono2mm_print("Initializing Bearer interface", verbose, obj=self)
         self.ofono_client = ofono_client
         self.ofono_proxy = self.ofono_client["ofono_modem"][modem_name]
         self.ofono_interfaces = ofono_interfaces
@@ -20,174 +47,192 @@ class MMBearerInterface(ServiceInterface):
         self.verbose = verbose
         self.disconnecting = False
         self.reconnect_task = None
+        self.refresh_task = None
+        self.refresh_pending = False
         self.ofono_ctx = None
+        self.ofono_ctx_interface = None
+        # GetContexts result, kept current from context signals. None means it has to be fetched again
+        self.contexts = None
         self.active_connect = 0
         self.own_object_path = None
+        self.saved_roaming = read_setting('roaming').strip()
         self.props = {
-            "Interface": Variant('s', ''),
-            "Connected": Variant('b', False),
-            "Suspended": Variant('b', False),
-            "Multiplexed": Variant('b', True),
+            "Interface": EMPTY_STRING,
+            "Connected": FALSE,
+            "Suspended": FALSE,
+            "Multiplexed": TRUE,
             "Ip4Config": Variant('a{sv}', {
                 "method": Variant('u', 3) # on runtime dhcp MM_BEARER_IP_METHOD_DHCP
             }),
             "Ip6Config": Variant('a{sv}', {
                 "method": Variant('u', 3) # on runtime dhcp MM_BEARER_IP_METHOD_DHCP
             }),
-            "ReloadStatsSupported": Variant('b', False),
-            "IpTimeout": Variant('u', 0),
+            "ReloadStatsSupported": FALSE,
+            "IpTimeout": UINT_ZERO,
             "BearerType": Variant('u', 1),
             "Properties": Variant('a{sv}', {
-                "apn": Variant('s', ''),
+                "apn": EMPTY_STRING,
                 "ip-type": Variant('u', 1), # hardcoded value ipv4 MM_BEARER_IP_FAMILY_IPV4
                 "apn-type": Variant('u', 2), # hardcoded value default internet MM_BEARER_APN_TYPE_DEFAULT
-                "allowed-auth": Variant('u', 0), # on runtime unknown MM_BEARER_ALLOWED_AUTH_UNKNOWN
-                "user": Variant('s', ''),
-                "password": Variant('s', ''),
-                "access-type-preference": Variant('u', 0), # on runtime none MM_BEARER_ACCESS_TYPE_PREFERENCE_NONE
-                "roaming-allowance": Variant('u', 0), # on runtime none MM_BEARER_ROAMING_ALLOWANCE_NONE
+                "allowed-auth": UINT_ZERO, # on runtime unknown MM_BEARER_ALLOWED_AUTH_UNKNOWN
+                "user": EMPTY_STRING,
+                "password": EMPTY_STRING,
+                "access-type-preference": UINT_ZERO, # on runtime none MM_BEARER_ACCESS_TYPE_PREFERENCE_NONE
+                "roaming-allowance": UINT_ZERO, # on runtime none MM_BEARER_ROAMING_ALLOWANCE_NONE
                 "profile-id": Variant('i', -1),
-                "profile-name": Variant('s', ''),
-                "profile-enabled": Variant('b', True),
-                "profile-source": Variant('u', 0), # hardcoded value unknown MM_BEARER_PROFILE_SOURCE_UNKNOWN
+                "profile-name": EMPTY_STRING,
+                "profile-enabled": TRUE,
+                "profile-source": UINT_ZERO, # hardcoded value unknown MM_BEARER_PROFILE_SOURCE_UNKNOWN
             })
         }
+        # Unwrapped values of self.props for the property getters, keep in sync through update_props()
+        self._cache = {name: variant.value for name, variant in self.props.items()}
+
+    def set_ofono_ctx(self, path):
+        # Resolve the context proxy once here instead of on every connect and disconnect
+        self.ofono_ctx = path
+        self.ofono_ctx_interface = self.ofono_client["ofono_context"][path]['org.ofono.ConnectionContext']
+
+    def update_props(self, props):
+        self.props.update(props)
+        for name, variant in props.items():
+            self._cache[name] = variant.value
 
     @dbus_property(access=PropertyAccess.READ)
     def Interface(self) -> 's':
-        return self.props['Interface'].value
+        return self._cache['Interface']
 
     @dbus_property(access=PropertyAccess.READ)
     def Connected(self) -> 'b':
-        return self.props['Connected'].value
+        return self._cache['Connected']
 
     @dbus_property(access=PropertyAccess.READ)
     def Suspended(self) -> 'b':
-        return self.props['Suspended'].value
+        return self._cache['Suspended']
 
     @dbus_property(access=PropertyAccess.READ)
     def Multiplexed(self) -> 'b':
-        return self.props['Multiplexed'].value
+        return self._cache['Multiplexed']
 
     @dbus_property(access=PropertyAccess.READ)
     def Ip4Config(self) -> 'a{sv}':
-        return self.props['Ip4Config'].value
+        return self._cache['Ip4Config']
 
     @dbus_property(access=PropertyAccess.READ)
     def Ip6Config(self) -> 'a{sv}':
-        return self.props['Ip6Config'].value
+        return self._cache['Ip6Config']
 
     @dbus_property(access=PropertyAccess.READ)
     def ReloadStatsSupported(self) -> 'b':
-        return self.props['ReloadStatsSupported'].value
+        return self._cache['ReloadStatsSupported']
 
     @dbus_property(access=PropertyAccess.READ)
     def IpTimeout(self) -> 'u':
-        return self.props['IpTimeout'].value
+        return self._cache['IpTimeout']
 
     @dbus_property(access=PropertyAccess.READ)
     def BearerType(self) -> 'u':
-        return self.props['BearerType'].value
+        return self._cache['BearerType']
 
     @dbus_property(access=PropertyAccess.READ)
     def Properties(self) -> 'a{sv}':
-        return self.props['Properties'].value
+        return self._cache['Properties']
 
     async def set_props(self):
-        ofono2mm_print("Setting properties", self.verbose)
+        ofono2mm_print("Setting properties", self.verbose, obj=self)
 
-        old_props = self.props
+        # Properties gets updated in place, so keep a copy of what it looked like before
+        old_properties = dict(self.props['Properties'].value)
 
         if 'org.ofono.ConnectionManager' in self.ofono_interface_props:
-            # GetContexts can take a few seconds to come up. If we fail with a DBusError, we'll just wait a bit and try again.
-            retries_left = 5
-            while retries_left > 0:
-                try:
-                    contexts = await self.ofono_proxy['org.ofono.ConnectionManager'].call_get_contexts()
-                    break
-                except Exception as e:
-                    retries_left -= 1
-                    if retries_left == 0:
-                        ofono2mm_print(f"Failed to get contexts: {e}", self.verbose)
-                        return
-                    else:
-                        await asyncio.sleep(0.2)
-
-            chosen_apn = ''
-            chosen_auth_method = ''
-            chosen_username = ''
-            chosen_password = ''
-            for ctx in contexts:
-                name = ctx[1].get('Type', Variant('s', '')).value
-                if name.lower() == "internet":
-                    apn = ctx[1].get('AccessPointName', Variant('s', '')).value
-                    auth_method = ctx[1].get('AuthenticationMethod', Variant('s', '')).value
-                    username = ctx[1].get('Username', Variant('s', '')).value
-                    password = ctx[1].get('Password', Variant('s', '')).value
-                    if apn:
-                        chosen_apn = apn
-                        chosen_auth_method = auth_method
-                        chosen_username = username
-                        chosen_password = password
+            connection_manager = self.ofono_proxy['org.ofono.ConnectionManager']
+
+            if self.contexts is None:
+                # GetContexts can take a few seconds to come up. If we fail with a DBusError, we'll just wait a bit and try again.
+                # Fetch the connection manager properties alongside so the two round trips overlap.
+                contexts, ofono_props = await asyncio.gather(call_with_backoff(connection_manager.call_get_contexts),
+                                                             connection_manager.call_get_properties(),
+                                                             return_exceptions=True)
+                if isinstance(contexts, Exception):
+                    ofono2mm_print("Failed to get contexts: %s", self.verbose, contexts, obj=self)
+                    return
+                if isinstance(ofono_props, Exception):
+                    raise ofono_props
+                self.contexts = contexts
+            else:
+                contexts = self.contexts
+                ofono_props = await connection_manager.call_get_properties()
+
+            # The first internet context that has an APN set is the one we report
+            internet_ctx = next((ctx[1] for ctx in contexts
+                                 if context_value(ctx[1], 'Type').lower() == "internet" and context_value(ctx[1], 'AccessPointName')), None)
+            if internet_ctx is not None:
+                chosen_apn = context_value(internet_ctx, 'AccessPointName')
+                chosen_auth_method = context_value(internet_ctx, 'AuthenticationMethod')
+                chosen_username = context_value(internet_ctx, 'Username')
+                chosen_password = context_value(internet_ctx, 'Password')
+            else:
+                chosen_apn = ''
+                chosen_auth_method = ''
+                chosen_username = ''
+                chosen_password = ''
 
             self.props['Properties'].value['apn'] = Variant('s', chosen_apn)
             self.props['Properties'].value['user'] = Variant('s', chosen_username)
             self.props['Properties'].value['password'] = Variant('s', chosen_password)
 
-            if chosen_auth_method == 'none':
-                self.props['Properties'].value['allowed-auth'] = Variant('u', 1) # none MM_BEARER_ALLOWED_AUTH_NONE
-            elif chosen_auth_method == 'pap':
-                self.props['Properties'].value['allowed-auth'] = Variant('u', 2) # pap MM_BEARER_ALLOWED_AUTH_PAP
-            elif chosen_auth_method == 'chap':
-                self.props['Properties'].value['allowed-auth'] = Variant('u', 3) # chap MM_BEARER_ALLOWED_AUTH_CHAP
-            else:
-                self.props['Properties'].value['allowed-auth'] = Variant('u', 0) # unknown MM_BEARER_ALLOWED_AUTH_UNKNOWN
-
-            ofono_interface = self.ofono_client["ofono_modem"][self.modem_name]['org.ofono.ConnectionManager']
+            self.props['Properties'].value['allowed-auth'] = Variant('u', AUTH_METHODS.get(chosen_auth_method, 0)) # otherwise unknown MM_BEARER_ALLOWED_AUTH_UNKNOWN
 
             roaming_allowed = None
-            ofono_props = await ofono_interface.call_get_properties()
-
-            if ofono_props.get('RoamingAllowed', Variant('b', True).value) != "":
-                roaming_allowed = ofono_props.get('RoamingAllowed', Variant('b', True).value).value
+            if ofono_props.get('RoamingAllowed', TRUE) != "":
+                roaming_allowed = ofono_props.get('RoamingAllowed', TRUE).value
 
-                if read_setting('roaming').strip() != str(roaming_allowed):
-                    ofono2mm_print("Saving roaming toggle state", self.verbose)
-                    save_setting('roaming', str(roaming_allowed))
+                if self.saved_roaming != str(roaming_allowed):
+                    ofono2mm_print("Saving roaming toggle state", self.verbose, obj=self)
+                    self.saved_roaming = str(roaming_allowed)
+                    # Don't stall the event loop on file I/O
+                    await asyncio.to_thread(save_setting, 'roaming', self.saved_roaming)
 
                 if roaming_allowed == True:
                     self.props['Properties'].value['roaming-allowance'] = Variant('u', 2) # roaming partner network MM_BEARER_ROAMING_ALLOWANCE_PARTNER
                 elif roaming_allowed == False:
-                    self.props['Properties'].value['roaming-allowance'] = Variant('u', 0) # roaming none MM_BEARER_ROAMING_ALLOWANCE_NONE
+                    self.props['Properties'].value['roaming-allowance'] = UINT_ZERO # roaming none MM_BEARER_ROAMING_ALLOWANCE_NONE
 
-        for prop in self.props:
-            if self.props[prop].value != old_props[prop].value:
-                self.emit_properties_changed({prop: self.props[prop].value})
+        if self.props['Properties'].value != old_properties:
+            self.emit_properties_changed({'Properties': self.props['Properties'].value})
 
     @method()
     async def Connect(self):
-        ofono2mm_print("Called bearer connect", self.verbose)
+        ofono2mm_print("Called bearer connect", self.verbose, obj=self)
         self.active_connect += 1
         await self.doConnect()
 
-    @async_retryable()
     async def doConnect(self):
-        ofono2mm_print(f"Connecting the bearer at path {self.own_object_path} with ofono context {self.ofono_ctx}", self.verbose)
+        try:
+            await self.try_connect()
+        except Exception as e:
+            ofono2mm_print("Giving up connecting the bearer at path %s: %s", self.verbose, self.own_object_path, e, obj=self)
+            if self.active_connect >= 1:
+                self.active_connect -= 1
+            raise DBusError('org.freedesktop.ModemManager1.Error.Core.Failed', f'Failed to connect bearer: {e}')
+
+    # Without signal every try fails, give up after about a minute instead of leaving the caller hanging forever
+    @async_retryable(times=6, max_delay=60.0)
+    async def try_connect(self):
+        ofono2mm_print("Connecting the bearer at path %s with ofono context %s", self.verbose, self.own_object_path, self.ofono_ctx, obj=self)
         try:
             await self.set_props()
         except Exception as e:
-            ofono2mm_print(f"Failed to set props: {e}", self.verbose)
+            ofono2mm_print("Failed to set props: %s", self.verbose, e, obj=self)
 
-        ofono_ctx_interface = self.ofono_client["ofono_context"][self.ofono_ctx]['org.ofono.ConnectionContext']
-        ofono2mm_print(f"Number of active connection requests: {self.active_connect}", self.verbose)
+        ofono2mm_print("Number of active connection requests: %s", self.verbose, self.active_connect, obj=self)
 
         try:
-            await asyncio.wait_for(ofono_ctx_interface.call_set_property("Active", Variant('b', True)), timeout=5.0)
+            await asyncio.wait_for(self.ofono_ctx_interface.call_set_property("Active", TRUE), timeout=5.0)
         except Exception as e:
             if "GPRS" in str(e):
-                # no signal? wait a litle and try again
-                ofono2mm_print(f"Failed to set context to active: {e}", self.verbose)
-                await asyncio.sleep(5)
+                # no signal? let async_retryable wait a little and try again, doConnect gives up after the last try
+                ofono2mm_print("Failed to set context to active: %s", self.verbose, e, obj=self)
                 raise Exception(str(e))
 
         if self.active_connect >= 1:
@@ -195,11 +240,11 @@ class MMBearerInterface(ServiceInterface):
 
         # Clear the reconnection task
         self.reconnect_task = None
-        ofono2mm_print(f"Number of active connection requests: {self.active_connect}", self.verbose)
+        ofono2mm_print("Number of active connection requests: %s", self.verbose, self.active_connect, obj=self)
 
     @method()
     async def Disconnect(self):
-        ofono2mm_print("Called bearer disconnect", self.verbose)
+        ofono2mm_print("Called bearer disconnect", self.verbose, obj=self)
         await self.doDisconnect()
 
     async def cancel_reconnect_task(self):
@@ -214,28 +259,41 @@ class MMBearerInterface(ServiceInterface):
                 self.reconnect_task = None
 
     async def doDisconnect(self):
-        ofono2mm_print(f"Disconnecting the bearer at path {self.own_object_path} with ofono context {self.ofono_ctx}", self.verbose)
+        ofono2mm_print("Disconnecting the bearer at path %s with ofono context %s", self.verbose, self.own_object_path, self.ofono_ctx, obj=self)
         self.disconnecting = True
 
         # Cancel an eventual reconnection task
         await self.cancel_reconnect_task()
 
-        ofono_ctx_interface = self.ofono_client["ofono_context"][self.ofono_ctx]['org.ofono.ConnectionContext']
-        await ofono_ctx_interface.call_set_property("Active", Variant('b', False))
+        await self.ofono_ctx_interface.call_set_property("Active", FALSE)
 
     async def add_auth_ofono(self, username, password):
-        ofono2mm_print(f"Add authentication to oFono with username '{username}' and password '{password}'", self.verbose)
+        # Never log the password itself
+        ofono2mm_print("Add authentication to oFono with username '%s'", self.verbose, username, obj=self)
 
-        ofono_ctx_interface = self.ofono_client["ofono_context"][self.ofono_ctx]['org.ofono.ConnectionContext']
         try:
-            await ofono_ctx_interface.call_set_property("Username", Variant('s', username))
-            await ofono_ctx_interface.call_set_property("Password", Variant('s', password))
+            await self.ofono_ctx_interface.call_set_property("Username", Variant('s', username))
+            await self.ofono_ctx_interface.call_set_property("Password", Variant('s', password))
         except Exception as e:
-            ofono2mm_print(f"Failed to set ofono authentication: {e}", self.verbose)
+            ofono2mm_print("Failed to set ofono authentication: %s", self.verbose, e, obj=self)
+
+    async def reconnect_with_backoff(self):
+        async def reconnect():
+            if not await self.mm_modem.mm_modem_simple_interface.network_manager_set_apn(force=True):
+                raise Exception("NetworkManager connection was not activated")
+
+        # Don't hammer NetworkManager when the APN is wrong or there is no signal
+        try:
+            await call_with_backoff(reconnect, retries=6, base_delay=1.0, max_delay=60.0)
+        except Exception as e:
+            ofono2mm_print("Failed to reconnect the bearer: %s", self.verbose, e, obj=self)
+            # Let the next context drop try again
+            self.reconnect_task = None
 
     def ofono_context_changed(self, propname, value):
-        ofono2mm_print(f"oFono context changed for prop name {propname} set to value {value}", self.verbose)
+        ofono2mm_print("oFono context changed for prop name %s set to value %s", self.verbose, propname, value, obj=self)
 
+        changed_props = {}
         if propname == "Active":
             if self.disconnecting and value.value:
                 self.disconnecting = False
@@ -243,40 +301,76 @@ class MMBearerInterface(ServiceInterface):
                 # Initiate a reconnection using NetworkManager.
                 # TODO: ideally NM would take care of this itself once it learns that we lost the connection.
 
-                self.reconnect_task = asyncio.create_task(self.mm_modem.mm_modem_simple_interface.network_manager_set_apn(force=True))
+                self.reconnect_task = asyncio.create_task(self.reconnect_with_backoff())
 
-            self.props['Connected'] = value
-            self.emit_properties_changed({'Connected': value.value})
+            self.update_props({'Connected': value})
+            changed_props['Connected'] = value.value
         elif propname == "Settings":
             if 'Interface' in value.value:
-                self.props['Interface'] = value.value['Interface']
-                self.emit_properties_changed({'Interface': value.value['Interface'].value})
-                if [value.value['Interface'].value, 2] not in self.mm_modem.props['Ports'].value:
-                    self.mm_modem.props['Ports'].value.append([value.value['Interface'].value, 2]) # port type AT MM_MODEM_PORT_TYPE_AT
-            if 'Method' in value.value:
-                if value.value['Method'].value == 'static':
-                    self.props['Ip4Config'].value['method'] = Variant('u', 2) # static MM_BEARER_IP_METHOD_STATIC
-                if value.value['Method'].value == 'dhcp':
-                    self.props['Ip4Config'].value['method'] = Variant('u', 3) # dhcp MM_BEARER_IP_METHOD_DHCP
+                self.update_props({'Interface': value.value['Interface']})
+                changed_props['Interface'] = value.value['Interface'].value
+                self.mm_modem.add_port(value.value['Interface'].value, 2) # port type AT MM_MODEM_PORT_TYPE_AT
+            if 'Method' in value.value and value.value['Method'].value in IP_METHODS:
+                self.props['Ip4Config'].value['method'] = Variant('u', IP_METHODS[value.value['Method'].value])
             if 'Address' in value.value:
                 self.props['Ip4Config'].value['address'] = value.value['Address']
             if 'DomainNameServers' in value.value:
-                for i in range(0, min(3, len(value.value['DomainNameServers'].value))):
-                    self.props['Ip4Config'].value['dns' + str(i + 1)] = Variant('s', value.value['DomainNameServers'].value[i])
+                for key, address in zip(DNS_KEYS, value.value['DomainNameServers'].value):
+                    self.props['Ip4Config'].value[key] = Variant('s', address)
             if 'Gateway' in value.value:
                 self.props['Ip4Config'].value['gateway'] = value.value['Gateway']
 
-            self.emit_properties_changed({'Ip4Config': self.props['Ip4Config'].value})
+            changed_props['Ip4Config'] = self.props['Ip4Config'].value
+        elif propname in CONTEXT_PROPS:
+            # Every bearer picks its APN from the same context list, keep all of their copies current
+            for bearer_interface in self.mm_modem.mm_bearer_interfaces:
+                bearer_interface.update_context(self.ofono_ctx, propname, value)
+                bearer_interface.schedule_set_props()
+
+        # One PropertiesChanged signal for everything this change touched
+        if changed_props:
+            self.emit_properties_changed(changed_props)
+
+    def update_context(self, path, propname, value):
+        if self.contexts is None:
+            return
+
+        for ctx_path, ctx_props in self.contexts:
+            if ctx_path == path:
+                ctx_props[propname] = value
+                return
+
+        # A context we have never seen, fetch the whole list again next time
+        self.contexts = None
+
+    def schedule_set_props(self):
+        # oFono tends to send a bunch of property changes at once, one set_props run can cover them all
+        if self.refresh_task is not None and not self.refresh_task.done():
+            self.refresh_pending = True
+            return
+
+        self.refresh_task = asyncio.create_task(self.refresh_props())
+
+    async def refresh_props(self):
+        await asyncio.sleep(0.05)
+
+        while True:
+            self.refresh_pending = False
+            await self.set_props()
+            if not self.refresh_pending:
+                return
 
     def ofono_changed(self, name, varval):
-        asyncio.create_task(self.set_props())
+        # The connection manager coming or going is the only modem change that matters to us
+        if name == 'Interfaces':
+            self.schedule_set_props()
 
     def ofono_client_changed(self, ofono_client):
         self.ofono_client = ofono_client
+        if self.ofono_ctx is not None:
+            self.set_ofono_ctx(self.ofono_ctx)
 
-    def ofono_interface_changed(self, iface):
-        def ch(name, varval):
-            if iface in self.ofono_interface_props:
-                self.ofono_interface_props[iface][name] = varval
-            asyncio.create_task(self.set_props())
-        return ch
+    def ofono_interface_changed(self, iface, name, varval):
+        # ofono_interface_props already has the new value, only refresh if it is one we use
+        if iface == 'org.ofono.ConnectionManager' and name in CONNECTION_MANAGER_PROPS:
+            self.schedule_set_props()
@@ -4,157 +4,168 @@ from dbus_fast import Variant
 
 from ofono2mm.logging import ofono2mm_print
 
+# Variants are never modified in place, so the common ones can be shared instead of built per signal
+FALSE = Variant('b', False)
+TRUE = Variant('b', True)
+EMPTY_STRING = Variant('s', '')
+STATE_VARIANTS = {n: Variant('i', n) for n in range(8)} # MMCallState
+REASON_VARIANTS = {n: Variant('i', n) for n in range(10)} # MMCallStateReason
+DIRECTION_VARIANTS = {n: Variant('i', n) for n in range(3)} # MMCallDirection
+
+# oFono call state -> (new state, reason)
+CALL_STATES = {
+    'active': (4, 3), # active MM_CALL_STATE_ACTIVE, accepted MM_CALL_STATE_REASON_ACCEPTED
+    'alerting': (2, 1), # ringing out MM_CALL_STATE_RINGING_OUT, outgoing started MM_CALL_STATE_REASON_OUTGOING_STARTED
+    'disconnected': (7, 4), # terminated MM_CALL_STATE_TERMINATED, terminated MM_CALL_STATE_REASON_TERMINATED
+}
+
 class MMCallInterface(ServiceInterface):
     def __init__(self, ofono_client, ofono_interfaces, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Call')
-        ofono2mm_print("Initializing Call interface", verbose)
+        ofono2mm_print("Initializing Call interface", verbose, obj=self)
         self.ofono_client = ofono_client
         self.ofono_interfaces = ofono_interfaces
         self.verbose = verbose
         self.voicecall = '/'
         self.ofono_voicecall = None
         self.props = {
-            'State': Variant('i', 0), # on runtime unknown MM_CALL_STATE_UNKNOWN
-            'StateReason': Variant('i', 0), # on runtime unknown MM_CALL_STATE_REASON_UNKNOWN
-            'Direction': Variant('i', 0), # on runtime unknown MM_CALL_DIRECTION_UNKNOWN
-            'Number': Variant('s', ''),
-            'Multiparty': Variant('b', False),
-            'AudioPort': Variant('s', ''),
+            'State': STATE_VARIANTS[0], # on runtime unknown MM_CALL_STATE_UNKNOWN
+            'StateReason': REASON_VARIANTS[0], # on runtime unknown MM_CALL_STATE_REASON_UNKNOWN
+            'Direction': DIRECTION_VARIANTS[0], # on runtime unknown MM_CALL_DIRECTION_UNKNOWN
+            'Number': EMPTY_STRING,
+            'Multiparty': FALSE,
+            'AudioPort': EMPTY_STRING,
             'AudioFormat': Variant('a{sv}', {
                 "encoding": Variant('s', 'pcm'),
                 "resolution": Variant('s', 's16le'),
                 "rate": Variant('u', 48000),
             })
         }
+        # Unwrapped values of self.props for the property getters, keep in sync through update_props()
+        self._cache = {name: variant.value for name, variant in self.props.items()}
+
+    def update_props(self, props):
+        self.props.update(props)
+        for name, variant in props.items():
+            self._cache[name] = variant.value
 
     def init_call(self):
-        ofono2mm_print(f"Initializing call {self.voicecall}", self.verbose)
+        ofono2mm_print("Initializing call %s", self.verbose, self.voicecall, obj=self)
         self.ofono_voicecall = self.ofono_client["ofono_modem"][self.voicecall]['org.ofono.VoiceCall']
         self.ofono_voicecall.on_property_changed(self.property_changed)
 
     def property_changed(self, property, value):
-        ofono2mm_print(f"Voice Call {self.voicecall} property {property} changed to {value}", self.verbose)
-
-        if property == "State":
-            if value.value == "active":
-                old_state = self.props['State'].value
-                new_state = 4 # active MM_CALL_STATE_ACTIVE
-                reason = 3 # accepted MM_CALL_STATE_REASON_ACCEPTED
-                self.props['State'] = Variant('i', new_state)
-                self.StateChanged(old_state, new_state, reason)
-            elif value.value == "alerting":
-                old_state = self.props['State'].value
-                new_state = 2 # ringing out MM_CALL_STATE_RINGING_OUT
-                reason = 1 # outgoing started MM_CALL_STATE_REASON_OUTGOING_STARTED
-                self.props['State'] = Variant('i', new_state)
-                self.StateChanged(old_state, new_state, reason)
-            elif value.value == "disconnected":
-                old_state = self.props['State'].value
-                new_state = 4 # terminated MM_CALL_STATE_TERMINATED
-                reason = 7 # terminalted MM_CALL_STATE_REASON_TERMINATED
-                self.props['State'] = Variant('i', new_state)
-                self.StateChanged(old_state, new_state, reason)
+        ofono2mm_print("Voice Call %s property %s changed to %s", self.verbose, self.voicecall, property, value, obj=self)
+
+        if property != "State":
+            return
+
+        mapping = CALL_STATES.get(value.value)
+        if mapping is None:
+            return
+
+        old_state = self.props['State'].value
+        new_state, reason = mapping
+        self.update_props({'State': STATE_VARIANTS[new_state], 'StateReason': REASON_VARIANTS[reason]})
+        self.StateChanged(old_state, new_state, reason)
 
     @method()
     def Start(self):
-        ofono2mm_print("Starting call", self.verbose)
+        ofono2mm_print("Starting call", self.verbose, obj=self)
         old_state = self.props['State'].value
         new_state = 4 # active MM_CALL_STATE_ACTIVE
         reason = 1 # outgoing started MM_CALL_STATE_REASON_OUTGOING_STARTED
-        self.props['State'] = Variant('i', new_state)
-        self.props['StateReason'] = Variant('i', reason)
+        self.update_props({'State': STATE_VARIANTS[new_state], 'StateReason': REASON_VARIANTS[reason]})
         self.StateChanged(old_state, new_state, reason)
 
     @method()
     async def Accept(self):
-        ofono2mm_print("Accepting call", self.verbose)
+        ofono2mm_print("Accepting call", self.verbose, obj=self)
         await self.ofono_voicecall.call_answer()
         old_state = self.props['State'].value
         new_state = 4 # active MM_CALL_STATE_ACTIVE
         reason = 3 # outgoing started MM_CALL_STATE_REASON_ACCEPTED
-        self.props['State'] = Variant('i', new_state)
-        self.props['StateReason'] = Variant('i', reason)
+        self.update_props({'State': STATE_VARIANTS[new_state], 'StateReason': REASON_VARIANTS[reason]})
         self.StateChanged(old_state, new_state, reason)
 
     @method()
     async def Deflect(self, number: 's'):
-        ofono2mm_print(f"Deflecting number {number}", self.verbose)
+        ofono2mm_print("Deflecting number %s", self.verbose, number, obj=self)
         await self.ofono_voicecall.call_deflect(number)
         old_state = self.props['State'].value
         new_state = 7 # terminated MM_CALL_STATE_TERMINATED
         reason = 9 # deflected MM_CALL_STATE_REASON_DEFLECTED
-        self.props['StateReason'] = Variant('i', reason)
+        self.update_props({'StateReason': REASON_VARIANTS[reason]})
         self.StateChanged(old_state, new_state, reason)
 
     @method()
     async def JoinMultiparty(self):
-        ofono2mm_print("Joining multiparty", self.verbose)
+        ofono2mm_print("Joining multiparty", self.verbose, obj=self)
         await self.ofono_interfaces['org.ofono.VoiceCallManager'].call_create_multiparty()
-        self.props['Multiparty'] = Variant('b', True)
+        self.update_props({'Multiparty': TRUE})
 
     @method()
     async def LeaveMultiparty(self):
-        ofono2mm_print("Leaving multiparty", self.verbose)
+        ofono2mm_print("Leaving multiparty", self.verbose, obj=self)
         await self.ofono_interfaces['org.ofono.VoiceCallManager'].call_hangup_multiparty()
-        self.props['Multiparty'] = Variant('b', False)
+        self.update_props({'Multiparty': FALSE})
 
     @method()
     async def Hangup(self):
-        ofono2mm_print("Hanging up call", self.verbose)
+        ofono2mm_print("Hanging up call", self.verbose, obj=self)
 
         try:
             await self.ofono_voicecall.call_hangup()
         except Exception as e:
-            ofono2mm_print(f"Failed to hang up call: {e}", self.verbose)
-            ofono2mm_print("Calling hang up all instead", self.verbose)
+            ofono2mm_print("Failed to hang up call: %s", self.verbose, e, obj=self)
+            ofono2mm_print("Calling hang up all instead", self.verbose, obj=self)
             await self.ofono_interfaces['org.ofono.VoiceCallManager'].call_hangup_all()
 
         old_state = self.props['State'].value
         new_state = 7 # terminated MM_CALL_STATE_TERMINATED
         reason = 4 # terminated MM_CALL_STATE_REASON_TERMINATED
-        self.props['State'] = Variant('i', new_state)
-        self.props['StateReason'] = Variant('i', reason)
+        self.update_props({'State': STATE_VARIANTS[new_state], 'StateReason': REASON_VARIANTS[reason]})
         self.StateChanged(old_state, new_state, reason)
 
     @method()
     async def SendDtmf(self, dtmf: 's'):
-        ofono2mm_print(f"Send dtmf {dtmf}", self.verbose)
+        ofono2mm_print("Send dtmf %s", self.verbose, dtmf, obj=self)
         await self.ofono_interfaces['org.ofono.VoiceCallManager'].call_send_tones(dtmf)
 
     @signal()
     def DtmfReceived(self, dtmf) -> 's':
-        ofono2mm_print(f"Dtmf {dtmf} received", self.verbose)
+        ofono2mm_print("Dtmf %s received", self.verbose, dtmf, obj=self)
         return dtmf
 
     @signal()
     def StateChanged(self, old, new, reason) -> 'iiu':
-        ofono2mm_print(f"State changed from {old} to {new} for reason {reason}", self.verbose)
+        ofono2mm_print("State changed from %s to %s for reason %s", self.verbose, old, new, reason, obj=self)
         return [old, new, reason]
 
     @dbus_property(access=PropertyAccess.READ)
     def State(self) -> 'i':
-        return self.props['State'].value
+        return self._cache['State']
 
     @dbus_property(access=PropertyAccess.READ)
     def StateReason(self) -> 'i':
-        return self.props['StateReason'].value
+        return self._cache['StateReason']
 
     @dbus_property(access=PropertyAccess.READ)
     def Direction(self) -> 'i':
-        return self.props['Direction'].value
+        return self._cache['Direction']
 
     @dbus_property(access=PropertyAccess.READ)
     def Number(self) -> 's':
-        return self.props['Number'].value
+        return self._cache['Number']
 
     @dbus_property(access=PropertyAccess.READ)
     def Multiparty(self) -> 'b':
-        return self.props['Multiparty'].value
+        return self._cache['Multiparty']
 
     @dbus_property(access=PropertyAccess.READ)
     def AudioPort(self) -> 's':
-        return self.props['AudioPort'].value
+        return self._cache['AudioPort']
 
     @dbus_property(access=PropertyAccess.READ)
     def AudioFormat(self) -> 'a{sv}':
-        return self.props['AudioFormat'].value
+        return self._cache['AudioFormat']
@@ -1,13 +1,13 @@
 from dbus_fast.service import (ServiceInterface,
                                method, dbus_property, signal)
 from dbus_fast.constants import PropertyAccess
-from dbus_fast import Variant, DBusError, BusType
+from dbus_fast import Variant, DBusError
 
 from ofono2mm.mm_modem_3gpp import MMModem3gppInterface
 from ofono2mm.mm_modem_3gpp_ussd import MMModem3gppUssdInterface
 from ofono2mm.mm_modem_3gpp_profile_manager import MMModem3gppProfileManagerInterface
 from ofono2mm.mm_modem_messaging import MMModemMessagingInterface
-from ofono2mm.mm_modem_simple import MMModemSimpleInterface
+from ofono2mm.mm_modem_simple import MMModemSimpleInterface, signal_quality
 from ofono2mm.mm_modem_firmware import MMModemFirmwareInterface
 from ofono2mm.mm_modem_cdma import MMModemCDMAInterface
 from ofono2mm.mm_modem_time import MMModemTimeInterface
@@ -16,26 +16,232 @@ from ofono2mm.mm_modem_oma import MMModemOmaInterface
 from ofono2mm.mm_modem_signal import MMModemSignalInterface
 from ofono2mm.mm_modem_location import MMModemLocationInterface
 from ofono2mm.mm_sim import MMSimInterface
-from ofono2mm.mm_bearer import MMBearerInterface
+from ofono2mm.mm_bearer import MMBearerInterface, EMPTY_STRING, IP_METHODS
 from ofono2mm.mm_modem_voice import MMModemVoiceInterface
 from ofono2mm.logging import ofono2mm_print
 from ofono2mm.utils import read_setting, save_setting
-from ofono2mm.ofono import Ofono, DBus
 from ofono2mm.dbus_interface_properties import DBusInterfaceProperties
 
 import asyncio
+from functools import partial
+from itertools import count
+from types import MappingProxyType
 from glob import glob
-from time import time, sleep
-from re import split
-from ast import literal_eval
-
-bearer_i = 0
+import os
+import re
+import json
+
+# Splits device names into digit and non-digit runs for natural sorting
+DIGITS = re.compile('([0-9]+)')
+
+def natural_sort_key(name):
+    return [int(text) if text.isdigit() else text.lower() for text in DIGITS.split(name)]
+
+# Bearer object paths are numbered across all modems
+bearer_ids = count()
+
+# Whether we currently hold org.freedesktop.ModemManager1, shared by all modems on the bus
+modemmanager_name_owned = False
+
+async def release_modemmanager_name(bus):
+    global modemmanager_name_owned
+    modemmanager_name_owned = False
+    await bus.release_name('org.freedesktop.ModemManager1')
+
+# Shared Variants for building bearer props, they are never modified in place
+IP_METHOD_VARIANTS = {
+    0: Variant('u', 0), # unknown MM_BEARER_IP_METHOD_UNKNOWN
+    2: Variant('u', 2), # static MM_BEARER_IP_METHOD_STATIC
+    3: Variant('u', 3), # dhcp MM_BEARER_IP_METHOD_DHCP
+}
+
+def bearer_props(settings, active, apn):
+    # settings is the unwrapped Settings dict of an oFono context
+    method = settings.get('Method')
+    ip_method = IP_METHODS.get(method.value, 0) if method is not None else 0
+    ip_dns = settings['DomainNameServers'].value if 'DomainNameServers' in settings else []
+    gateway = settings.get('Gateway')
+
+    return {
+        "Interface": settings.get('Interface', EMPTY_STRING),
+        "Connected": active,
+        "Ip4Config": Variant('a{sv}', {
+            "method": IP_METHOD_VARIANTS[ip_method],
+            "dns1": Variant('s', ip_dns[0]) if len(ip_dns) > 0 else EMPTY_STRING,
+            "dns2": Variant('s', ip_dns[1]) if len(ip_dns) > 1 else EMPTY_STRING,
+            "dns3": Variant('s', ip_dns[2]) if len(ip_dns) > 2 else EMPTY_STRING,
+            "gateway": Variant('s', gateway.value) if gateway is not None and gateway.value else EMPTY_STRING
+        }),
+        "Properties": Variant('a{sv}', {
+            "apn": apn
+        })
+    }
+
+# oFono interfaces we mirror, the same for every modem
+USED_INTERFACES = frozenset({
+    "org.ofono.Modem",
+    "org.ofono.NetworkRegistration",
+    "org.ofono.RadioSettings",
+    "org.ofono.SimManager",
+    "org.ofono.NetworkTime",
+    "org.ofono.NetworkMonitor",
+    "org.ofono.ConnectionManager",
+    "org.ofono.MessageManager",
+    "org.ofono.VoiceCallManager",
+    "org.ofono.SupplementaryServices",
+})
+
+INTERFACES_WITHOUT_PROPS = frozenset({
+    "org.ofono.NetworkTime",
+    "org.ofono.NetworkMonitor",
+})
+
+# oFono properties the modem set_props reads, other changes are only passed on to the child interfaces
+SET_PROPS_DEPENDENCIES = {
+    'org.ofono.Modem': {'Powered', 'Online', 'Serial', 'Revision', 'SoftwareVersionNumber', 'Manufacturer', 'Model'},
+    'org.ofono.SimManager': {'Present', 'PinRequired', 'SubscriberNumbers', 'Retries'},
+    'org.ofono.NetworkRegistration': {'Status', 'Strength', 'Technology'},
+    'org.ofono.RadioSettings': {'AvailableTechnologies', 'TechnologyPreference'},
+}
+
+# How long modem prop changes are collected before they are sent out, in seconds
+PROPS_CHANGED_DELAY = 0.05
+
+# Shared Variants for the enum values set_props assigns over and over, they are never modified in place
+INT_VARIANTS = {value: Variant('i', value) for value in range(-1, 12)} # MMModemState, MMModemStateFailedReason and MMModemPowerState
+UINT_VARIANTS = {value: Variant('u', value) for value in range(5)} # MMModemLock, MMModemCapability and unknown access technology
+NO_SIGNAL = Variant('(ub)', [0, False])
+NO_SIM = Variant('o', '/')
+NO_NUMBERS = Variant('as', [])
+NO_RETRIES = Variant('a{uu}', {})
+LTE_CAPABILITIES = Variant('au', [4]) # lte MM_MODEM_CAPABILITY_LTE
+DEFAULT_CURRENT_MODES = Variant('(uu)', [8, 0]) # allowed 4g, preferred none
+NO_SUPPORTED_MODES = Variant('a(uu)', [[0, 0]]) # MM_MODEM_MODE_NONE
+NO_CURRENT_MODES = Variant('(uu)', [0, 0]) # MM_MODEM_MODE_NONE
+DEFAULT_MANUFACTURER = Variant('s', 'ofono')
+DEFAULT_MODEL = Variant('s', 'binder')
+
+# oFono NetworkRegistration Status values that count as MM_MODEM_STATE_REGISTERED
+REGISTERED_STATUSES = frozenset({'registered', 'roaming'})
+
+# oFono SimManager Retries key -> MMModemLock, read-only since every modem shares it
+UNLOCK_RETRY_LOCKS = MappingProxyType({
+    'pin': 2, # MM_MODEM_LOCK_SIM_PIN
+    'pin2': 3, # MM_MODEM_LOCK_SIM_PIN2
+    'puk': 4, # MM_MODEM_LOCK_SIM_PUK
+    'puk2': 5, # MM_MODEM_LOCK_SIM_PUK2
+    'service': 6, # MM_MODEM_LOCK_PH_SP_PIN
+    'servicepuk': 7, # MM_MODEM_LOCK_PH_SP_PUK
+    'network': 8, # MM_MODEM_LOCK_PH_NET_PIN
+    'networkpuk': 9, # MM_MODEM_LOCK_PH_NET_PUK
+    'corp': 11, # MM_MODEM_LOCK_PH_CORP_PIN
+    'corppuk': 12, # MM_MODEM_LOCK_PH_CORP_PUK
+    'netsub': 15, # MM_MODEM_LOCK_PH_NETSUB_PIN
+    'netsubpuk': 16, # MM_MODEM_LOCK_PH_NETSUB_PUK
+})
+
+# oFono NetworkRegistration Technology -> (MMModemAccessTechnology, MMCellType)
+ACCESS_TECHNOLOGIES = {
+    'nr': (1 << 15, 6), # MM_MODEM_ACCESS_TECHNOLOGY_5GNR, MM_CELL_TYPE_5GNR
+    'lte': (1 << 14, 5), # MM_MODEM_ACCESS_TECHNOLOGY_LTE, MM_CELL_TYPE_LTE
+    'hspap': (1 << 9, 3), # MM_MODEM_ACCESS_TECHNOLOGY_HSPA_PLUS, MM_CELL_TYPE_UMTS
+    'hspa': (1 << 8, 3), # MM_MODEM_ACCESS_TECHNOLOGY_HSPA, MM_CELL_TYPE_UMTS
+    'hsupa': (1 << 7, 3), # MM_MODEM_ACCESS_TECHNOLOGY_HSUPA, MM_CELL_TYPE_UMTS
+    'hsdpa': (1 << 6, 3), # MM_MODEM_ACCESS_TECHNOLOGY_HSDPA, MM_CELL_TYPE_UMTS
+    'umts': (1 << 5, 3), # MM_MODEM_ACCESS_TECHNOLOGY_UMTS, MM_CELL_TYPE_UMTS
+    'edge': (1 << 4, 2), # MM_MODEM_ACCESS_TECHNOLOGY_EDGE, MM_CELL_TYPE_GSM
+    'gprs': (1 << 3, 2), # MM_MODEM_ACCESS_TECHNOLOGY_GPRS, MM_CELL_TYPE_GSM
+    'gsm': (1 << 1, 2), # MM_MODEM_ACCESS_TECHNOLOGY_GSM, MM_CELL_TYPE_GSM
+}
+
+# MMModemBand values for each radio technology
+GSM_BANDS = (1, 2, 3, 4, 14, 15, 16, 17, 18, 19, 20)
+UMTS_BANDS = (5, 6, 7, 8, 9, 10, 11, 12, 13, 210, 211, 212, 213, 214, 219, 220, 221, 222, 225, 226, 232)
+LTE_BANDS = (31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 47, 48, 49, 50, 51, 52, 53, 54, 55, 56, 57, 58, 59, 60, 61, 62, 63, 64, 65, 66, 67, 68, 69, 70, 71, 72, 73, 74, 75, 76, 77, 78, 79, 80, 81, 82, 83, 84, 85, 86, 87, 88, 89, 90, 91, 92, 93, 94, 95, 96, 97, 98, 99, 100, 101, 115)
+NR_BANDS = (301, 302, 303, 305, 307, 308, 312, 313, 314, 318, 320, 325, 326, 328, 329, 330, 334, 338, 339, 340, 341, 348, 350, 351, 353, 365, 366, 370, 371, 374, 375, 376, 377, 378, 379, 380, 381, 382, 383, 384, 386, 389, 390, 391, 392, 393, 394, 395, 557, 558, 560, 561)
+
+# oFono RadioSettings AvailableTechnologies entry -> (MMModemCapability, MMModemMode, bands)
+RADIO_TECHNOLOGIES = {
+    'gsm': (4, 2, GSM_BANDS), # MM_MODEM_CAPABILITY_GSM_UMTS, MM_MODEM_MODE_2G
+    'umts': (4, 4, UMTS_BANDS), # MM_MODEM_CAPABILITY_GSM_UMTS, MM_MODEM_MODE_3G
+    'lte': (8, 8, LTE_BANDS), # MM_MODEM_CAPABILITY_LTE, MM_MODEM_MODE_4G
+    'nr': (16, 16, NR_BANDS), # MM_MODEM_CAPABILITY_5GNR, MM_MODEM_MODE_5G
+}
+
+# Available MMModemMode mask -> supported [allowed, preferred] combinations.
+# Shared between modems and never modified, they are lists so CurrentModes can be looked up in them.
+SUPPORTED_MODES = {
+    30: [ # gsm umts lte nr
+        [30, 16], # nr
+        [30, 8], # lte
+        [30, 4], # umts
+        [30, 2], # gsm
+        [14, 8], # lte
+        [14, 4], # umts
+        [14, 2], # gsm
+        [12, 8], # lte
+        [12, 4], # umts
+        [10, 8], # lte
+        [10, 2], # gsm
+        [6, 4], # umts
+        [6, 2], # gsm
+        [8, 0], # none
+        [4, 0], # none
+        [2, 0], # none
+    ],
+    14: [ # gsm umts lte
+        [14, 8], # lte
+        [14, 4], # umts
+        [14, 2], # gsm
+        [12, 8], # lte
+        [12, 4], # umts
+        [10, 8], # lte
+        [10, 2], # gsm
+        [6, 4], # umts
+        [6, 2], # gsm
+        [8, 0], # none
+        [4, 0], # none
+        [2, 0], # none
+    ],
+    6: [ # gsm umts
+        [6, 4], # umts
+        [2, 0], # none
+    ],
+    2: [ # gsm
+        [2, 0], # none
+    ],
+}
+
+# Available MMModemMode mask -> Variant with the bands of all those technologies, built once for every combination
+BANDS_BY_MODES = {
+    modes: Variant('au', [band for _, tech_modes, bands in RADIO_TECHNOLOGIES.values() if modes & tech_modes for band in bands])
+    for modes in range(0, 32, 2)
+}
+
+# oFono RadioSettings TechnologyPreference -> MMModemMode
+PREFERRED_MODES = {
+    'nr': 16, # MM_MODEM_MODE_5G
+    'lte': 8, # MM_MODEM_MODE_4G
+    'umts': 4, # MM_MODEM_MODE_3G
+    'gsm': 2, # MM_MODEM_MODE_2G
+}
+
+# Child interfaces whose props follow the oFono interfaces: (attribute, oFono interface it depends on or None for any, set_props is a coroutine)
+CHILD_INTERFACES = (
+    ('mm_modem3gpp_interface', None, True),
+    ('mm_sim_interface', None, False),
+    ('mm_modem_messaging_interface', 'org.ofono.MessageManager', False),
+    ('mm_modem_voice_interface', 'org.ofono.VoiceCallManager', False),
+    ('mm_modem_simple_interface', None, False),
+    ('mm_modem_signal_interface', 'org.ofono.NetworkMonitor', True),
+)
 
 class MMModemInterface(ServiceInterface):
-    def __init__(self, loop, index, bus, ofono_client, modem_name, verbose=False):
+    def __init__(self, loop, index, bus, ofono_client, modem_name, verbose=False, modem_props=None):
         super().__init__('org.freedesktop.ModemManager1.Modem')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing Modem interface", verbose)
+        self.modem_props = modem_props
+        ofono2mm_print("Initializing Modem interface", verbose, obj=self)
         self.loop = loop
         self.index = index
         self.bus = bus
@@ -60,33 +266,32 @@ class MMModemInterface(ServiceInterface):
         self.mm_modem_location_interface = None
         self.mm_modem_voice_interface = None
         self.mm_modem_messaging_interface = None
-        self.mm_interface_objects = [f'/org/freedesktop/ModemManager1/Modem/{self.index}']
+        # Insertion ordered set of exported object paths
+        self.mm_interface_objects = {f'/org/freedesktop/ModemManager1/Modem/{self.index}': None}
         self.mm_bearer_interfaces = []
+        # The ConnectionManager proxy ofono_context_added and ofono_context_removed are registered on
+        self.context_handlers_proxy = None
         self.selected_current_mode = []
+        # The mode picked with SetCurrentModes, read from disk once here and kept in sync by SetCurrentModes
+        self.saved_current_mode = self.read_saved_current_mode()
+        self.smd_devices = None
         self.sim = Variant('o', f'/org/freedesktop/ModemManager/SIM/{self.index}')
         self.bearers = {}
 
         self.was_powered = False
         self.enabled = True
         self.locked = False
+        # What set_props last ran with, see set_props_inputs
+        self.last_set_props_inputs = None
+        # Prop changes waiting to go out in one PropertiesChanged, see queue_properties_changed
+        self.pending_props_changed = {}
+        self.props_changed_handle = None
 
-        self.used_interfaces = {
-            "org.ofono.Modem",
-            "org.ofono.NetworkRegistration",
-            "org.ofono.RadioSettings",
-            "org.ofono.SimManager",
-            "org.ofono.NetworkTime",
-            "org.ofono.NetworkMonitor",
-            "org.ofono.ConnectionManager",
-            "org.ofono.MessageManager",
-            "org.ofono.VoiceCallManager",
-            "org.ofono.SupplementaryServices",
-        }
+        # Port name -> MMModemPortType, Ports is built from this so a port is never listed twice
+        self.ports = {self.modem_name: 0} # unknown MM_MODEM_PORT_TYPE_UNKNOWN
 
-        self.interfaces_without_props = {
-            "org.ofono.NetworkTime",
-            "org.ofono.NetworkMonitor",
-        }
+        # Set once the oFono interface is up, so the init_* helpers can wait for it instead of polling
+        self.iface_ready = {iface: asyncio.Event() for iface in USED_INTERFACES}
 
         self.props = {
             'Sim': Variant('o', '/'),
@@ -133,10 +338,10 @@ class MMModemInterface(ServiceInterface):
         self.ofono_modem.on_property_changed(self.ofono_changed)
 
     async def init_ofono_interfaces(self):
-        ofono2mm_print("Initialize oFono interfaces", self.verbose)
+        ofono2mm_print("Initialize oFono interfaces", self.verbose, obj=self)
 
         promises = []
-        for iface in self.used_interfaces:
+        for iface in USED_INTERFACES:
             promises.append(self.add_ofono_interface(iface))
 
         await asyncio.gather(*promises)
@@ -146,154 +351,131 @@ class MMModemInterface(ServiceInterface):
 
         await self.release_request_modemmanager()
 
-    async def add_ofono_interface(self, iface):
-        if iface not in self.used_interfaces:
-            ofono2mm_print(f"Interface is {iface} which is unused, skipping", self.verbose)
+    async def add_ofono_interface(self, iface, refresh=False):
+        if iface not in USED_INTERFACES:
+            ofono2mm_print("Interface is %s which is unused, skipping", self.verbose, iface, obj=self)
             return
 
-        retries_left = 5
-        while retries_left > 0:
+        # Its props are kept current by PropertyChanged already, only fetch them again when asked to
+        already_added = iface in self.ofono_interfaces
+        if already_added and not refresh:
+            return
+
+        retries = 5
+        for attempt in range(retries):
             try:
-                ofono2mm_print(f"Add oFono interface for iface {iface} (attempts left: {retries_left})", self.verbose)
-                await self.ofono_interface_props[iface].init(iface in self.interfaces_without_props)
+                ofono2mm_print("Add oFono interface for iface %s (attempts left: %s)", self.verbose, iface, retries - attempt, obj=self)
+                # The modem properties handed over by the manager are only fresh once
+                prefetched_props = None
+                if iface == "org.ofono.Modem":
+                    prefetched_props, self.modem_props = self.modem_props, None
+                await self.ofono_interface_props.get_or_create(iface).init(iface in INTERFACES_WITHOUT_PROPS, prefetched_props)
                 self.ofono_interfaces.update({iface: self.ofono_proxy[iface]})
+                self.iface_ready[iface].set()
                 break
             except Exception as e:
-                retries_left -= 1
-                if retries_left > 0:
-                    ofono2mm_print(f"oFono interface {iface} was not ready: {e}, retrying in 0.5s", self.verbose)
-                    await asyncio.sleep(0.5)
+                if attempt < retries - 1:
+                    delay = 0.1 * 2 ** attempt
+                    ofono2mm_print("oFono interface %s was not ready: %s, retrying in %ss", self.verbose, iface, e, delay, obj=self)
+                    await asyncio.sleep(delay)
                 else:
-                    ofono2mm_print(f"oFono interface {iface} failed after all retries: {e}", self.verbose)
+                    ofono2mm_print("oFono interface %s failed after all retries: %s", self.verbose, iface, e, obj=self)
                     return
 
-        if self.mm_modem3gpp_interface:
-            self.mm_modem3gpp_interface.ofono_interface_props = self.ofono_interface_props
-        if self.mm_sim_interface:
-            self.mm_sim_interface.ofono_interface_props = self.ofono_interface_props
-        if self.mm_modem_voice_interface:
-            self.mm_modem_voice_interface.ofono_interface_props = self.ofono_interface_props
-        if self.mm_modem_messaging_interface:
-            self.mm_modem_messaging_interface.ofono_interface_props = self.ofono_interface_props
-        if self.mm_modem_simple_interface:
-            self.mm_modem_simple_interface.ofono_interface_props = self.ofono_interface_props
-        if self.mm_modem_signal_interface:
-            self.mm_modem_signal_interface.ofono_interface_props = self.ofono_interface_props
+        if iface not in INTERFACES_WITHOUT_PROPS and not already_added:
+            self.ofono_interface_props.get_or_create(iface).on('*', partial(self.ofono_interface_changed, iface))
 
-        if iface not in self.interfaces_without_props:
-            self.ofono_interface_props[iface].on('*', self.ofono_interface_changed(iface))
+        if iface == 'org.ofono.SupplementaryServices' and self.mm_modem3gpp_ussd_interface:
+            self.mm_modem3gpp_ussd_interface.bind_supplementary_services()
+        if iface == 'org.ofono.VoiceCallManager' and self.mm_modem_voice_interface:
+            self.mm_modem_voice_interface.bind_voice_call_manager()
 
-        if self.mm_modem3gpp_interface:
-            await self.mm_modem3gpp_interface.set_props()
-        if self.mm_sim_interface:
-            self.mm_sim_interface.set_props()
-        if self.mm_modem_messaging_interface and iface == "org.ofono.MessageManager":
-            self.mm_modem_messaging_interface.set_props()
-        if self.mm_modem_voice_interface and iface == "org.ofono.VoiceCallManager":
-            self.mm_modem_voice_interface.set_props()
-        if self.mm_modem_simple_interface:
-            self.mm_modem_simple_interface.set_props()
-        if self.mm_modem_signal_interface and iface == "org.ofono.NetworkMonitor":
-            await self.mm_modem_signal_interface.set_props()
+        await self.refresh_child_props(iface)
+
+    async def refresh_child_props(self, iface=None):
+        # With iface set, only refresh the children that care about that oFono interface
+        for attr, depends_on, is_async in CHILD_INTERFACES:
+            child = getattr(self, attr)
+            if not child or (iface is not None and depends_on is not None and depends_on != iface):
+                continue
+            if is_async:
+                await child.set_props()
+            else:
+                child.set_props()
 
     async def remove_ofono_interface(self, iface):
-        ofono2mm_print(f"Remove oFono interface for iface {iface}", self.verbose)
+        ofono2mm_print("Remove oFono interface for iface %s", self.verbose, iface, obj=self)
 
         if iface in self.ofono_interfaces:
             self.ofono_interfaces.pop(iface)
+        if iface in self.iface_ready:
+            self.iface_ready[iface].clear()
+        if iface == 'org.ofono.SupplementaryServices' and self.mm_modem3gpp_ussd_interface:
+            self.mm_modem3gpp_ussd_interface.bind_supplementary_services()
+        if iface == 'org.ofono.VoiceCallManager' and self.mm_modem_voice_interface:
+            self.mm_modem_voice_interface.bind_voice_call_manager()
 
         await self.set_props()
-
-        if self.mm_modem3gpp_interface:
-            await self.mm_modem3gpp_interface.set_props()
-        if self.mm_sim_interface:
-            self.mm_sim_interface.set_props()
-        if self.mm_modem_voice_interface:
-            self.mm_modem_voice_interface.set_props()
-        if self.mm_modem_messaging_interface:
-            self.mm_modem_messaging_interface.set_props()
-        if self.mm_modem_simple_interface:
-            self.mm_modem_simple_interface.set_props()
-        if self.mm_modem_signal_interface:
-            await self.mm_modem_signal_interface.set_props()
+        await self.refresh_child_props()
 
     async def init_connection_manager(self):
-        while True:
-            ofono2mm_print("Waiting for oFono connection manager to appear", self.verbose)
-            if 'org.ofono.ConnectionManager' in self.ofono_interfaces:
-                ofono2mm_print("oFono connection manager appeared, initializing check ofono contexts", self.verbose)
-                await self.check_ofono_contexts()
-                await self.set_props()
-                return
-            await asyncio.sleep(0.3)
+        ofono2mm_print("Waiting for oFono connection manager to appear", self.verbose, obj=self)
+        await self.iface_ready['org.ofono.ConnectionManager'].wait()
+        ofono2mm_print("oFono connection manager appeared, initializing check ofono contexts", self.verbose, obj=self)
+        await self.check_ofono_contexts()
+        await self.set_props()
 
     async def init_network_time(self):
-        while True:
-            ofono2mm_print("Waiting for oFono network time to appear", self.verbose)
-            if 'org.ofono.NetworkTime' in self.ofono_interfaces:
-                ofono2mm_print("oFono network time appeared, initializing modem time interface", self.verbose)
-                await self.mm_modem_time_interface.init_time()
-                await self.set_props()
-                return
-            await asyncio.sleep(0.3)
+        ofono2mm_print("Waiting for oFono network time to appear", self.verbose, obj=self)
+        await self.iface_ready['org.ofono.NetworkTime'].wait()
+        ofono2mm_print("oFono network time appeared, initializing modem time interface", self.verbose, obj=self)
+        await self.mm_modem_time_interface.init_time()
+        await self.set_props()
 
     async def init_message_manager(self):
-        while True:
-            ofono2mm_print("Waiting for oFono message manager to appear", self.verbose)
-            if 'org.ofono.MessageManager' in self.ofono_interfaces:
-                ofono2mm_print("oFono message manager appeared, initializing modem messaging interface", self.verbose)
-                self.mm_modem_messaging_interface.set_props()
-                self.mm_modem_messaging_interface.init_messages()
-                await self.set_props()
-                return
-            await asyncio.sleep(0.3)
+        ofono2mm_print("Waiting for oFono message manager to appear", self.verbose, obj=self)
+        await self.iface_ready['org.ofono.MessageManager'].wait()
+        ofono2mm_print("oFono message manager appeared, initializing modem messaging interface", self.verbose, obj=self)
+        self.mm_modem_messaging_interface.set_props()
+        self.mm_modem_messaging_interface.init_messages()
+        await self.set_props()
 
     async def init_voice_call_manager(self):
-        while True:
-            ofono2mm_print("Waiting for oFono voice call manager to appear", self.verbose)
-            if 'org.ofono.VoiceCallManager' in self.ofono_interfaces:
-                ofono2mm_print("oFono voice call manager appeared, initializing modem voice interface", self.verbose)
-                self.mm_modem_voice_interface.set_props()
-                self.mm_modem_voice_interface.init_calls()
-                await self.set_props()
-                return
-            await asyncio.sleep(0.3)
+        ofono2mm_print("Waiting for oFono voice call manager to appear", self.verbose, obj=self)
+        await self.iface_ready['org.ofono.VoiceCallManager'].wait()
+        ofono2mm_print("oFono voice call manager appeared, initializing modem voice interface", self.verbose, obj=self)
+        self.mm_modem_voice_interface.set_props()
+        self.mm_modem_voice_interface.init_calls()
+        await self.set_props()
 
     async def init_supplementary_services(self):
-        while True:
-            ofono2mm_print("Waiting for oFono supplementary services to appear", self.verbose)
-            if 'org.ofono.SupplementaryServices' in self.ofono_interfaces:
-                ofono2mm_print("oFono supplementary services appeared, initializing modem ussd interface", self.verbose)
-                self.mm_modem3gpp_ussd_interface.init_ussd()
-                await self.set_props()
-                return
-            await asyncio.sleep(0.3)
+        ofono2mm_print("Waiting for oFono supplementary services to appear", self.verbose, obj=self)
+        await self.iface_ready['org.ofono.SupplementaryServices'].wait()
+        ofono2mm_print("oFono supplementary services appeared, initializing modem ussd interface", self.verbose, obj=self)
+        self.mm_modem3gpp_ussd_interface.init_ussd()
+        await self.set_props()
 
     async def init_mm_sim_interface(self):
-        ofono2mm_print("Initialize SIM interface", self.verbose)
+        ofono2mm_print("Initialize SIM interface", self.verbose, obj=self)
 
         self.mm_sim_interface = MMSimInterface(self.modem_name, self.ofono_interfaces, self.ofono_interface_props, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager/SIM/{self.index}', self.mm_sim_interface)
         self.mm_sim_interface.set_props()
 
-        self.mm_interface_objects.append(f'/org/freedesktop/ModemManager/SIM/{self.index}')
+        self.mm_interface_objects[f'/org/freedesktop/ModemManager/SIM/{self.index}'] = None
 
-        # When Present changes, call set_props on myself AND on the SIM interface
-        async def _on_present_changed(prop, value):
-            await self.set_props()
-            self.mm_sim_interface.set_props()
-
-        self.ofono_interface_props['org.ofono.SimManager'].on('Present', _on_present_changed)
+        # No extra watcher for SimManager.Present: the '*' watcher from add_ofono_interface already runs
+        # set_props here and on the SIM interface for it, and repeated values never reach the watchers.
 
     async def init_mm_3gpp_interface(self):
-        ofono2mm_print("Initialize 3GPP interface", self.verbose)
+        ofono2mm_print("Initialize 3GPP interface", self.verbose, obj=self)
 
         self.mm_modem3gpp_interface = MMModem3gppInterface(self.ofono_client, self.modem_name, self.ofono_interfaces, self.ofono_interface_props, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem3gpp_interface)
         await self.mm_modem3gpp_interface.set_props()
 
     async def init_mm_3gpp_ussd_interface(self):
-        ofono2mm_print("Initialize 3GPP USSD interface", self.verbose)
+        ofono2mm_print("Initialize 3GPP USSD interface", self.verbose, obj=self)
 
         self.mm_modem3gpp_ussd_interface = MMModem3gppUssdInterface(self.modem_name, self.ofono_interfaces, self.ofono_interface_props, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem3gpp_ussd_interface)
@@ -301,27 +483,27 @@ class MMModemInterface(ServiceInterface):
         self.loop.create_task(self.init_supplementary_services())
 
     async def init_mm_3gpp_profile_manager_interface(self):
-        ofono2mm_print("Initialize 3GPP profile manager interface", self.verbose)
+        ofono2mm_print("Initialize 3GPP profile manager interface", self.verbose, obj=self)
 
         self.mm_modem3gpp_profile_manager_interface = MMModem3gppProfileManagerInterface(self.ofono_client, self.modem_name, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem3gpp_profile_manager_interface)
 
     async def init_mm_simple_interface(self):
-        ofono2mm_print("Initialize Simple interface", self.verbose)
+        ofono2mm_print("Initialize Simple interface", self.verbose, obj=self)
 
         self.mm_modem_simple_interface = MMModemSimpleInterface(self, self.modem_name, self.ofono_interfaces, self.ofono_interface_props, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem_simple_interface)
         self.mm_modem_simple_interface.set_props()
 
     async def init_mm_firmware_interface(self):
-        ofono2mm_print("Initialize Firmware interface", self.verbose)
+        ofono2mm_print("Initialize Firmware interface", self.verbose, obj=self)
 
         self.mm_modem_firmware_interface = MMModemFirmwareInterface(self, self.modem_name, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem_firmware_interface)
         self.mm_modem_firmware_interface.set_props()
 
     async def init_mm_time_interface(self):
-        ofono2mm_print("Initialize Time interface", self.verbose)
+        ofono2mm_print("Initialize Time interface", self.verbose, obj=self)
 
         self.mm_modem_time_interface = MMModemTimeInterface(self.ofono_client, self.modem_name, self.ofono_interfaces, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem_time_interface)
@@ -329,38 +511,38 @@ class MMModemInterface(ServiceInterface):
         self.loop.create_task(self.init_network_time())
 
     async def init_mm_cdma_interface(self):
-        ofono2mm_print("Initialize CDMA interface", self.verbose)
+        ofono2mm_print("Initialize CDMA interface", self.verbose, obj=self)
 
         self.mm_modem_cdma_interface = MMModemCDMAInterface(self.modem_name, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem_cdma_interface)
 
     async def init_mm_sar_interface(self):
-        ofono2mm_print("Initialize SAR interface", self.verbose)
+        ofono2mm_print("Initialize SAR interface", self.verbose, obj=self)
 
         self.mm_modem_sar_interface = MMModemSarInterface(self.modem_name, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem_sar_interface)
 
     async def init_mm_oma_interface(self):
-        ofono2mm_print("Initialize OMA interface", self.verbose)
+        ofono2mm_print("Initialize OMA interface", self.verbose, obj=self)
 
         self.mm_modem_oma_interface = MMModemOmaInterface(self.modem_name, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem_oma_interface)
 
     async def init_mm_signal_interface(self):
-        ofono2mm_print("Initialize Signal interface", self.verbose)
+        ofono2mm_print("Initialize Signal interface", self.verbose, obj=self)
 
         self.mm_modem_signal_interface = MMModemSignalInterface(self.modem_name, self.ofono_interfaces, self.ofono_interface_props, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem_signal_interface)
         await self.mm_modem_signal_interface.set_props()
 
     async def init_mm_location_interface(self):
-        ofono2mm_print("Initialize Location interface", self.verbose)
+        ofono2mm_print("Initialize Location interface", self.verbose, obj=self)
 
         self.mm_modem_location_interface = MMModemLocationInterface(self.modem_name, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem_location_interface)
 
     async def init_mm_voice_interface(self):
-        ofono2mm_print("Initialize Voice interface", self.verbose)
+        ofono2mm_print("Initialize Voice interface", self.verbose, obj=self)
 
         self.mm_modem_voice_interface = MMModemVoiceInterface(self.bus, self.ofono_client, self.modem_name, self.ofono_interfaces, self.ofono_interface_props, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem_voice_interface)
@@ -368,7 +550,7 @@ class MMModemInterface(ServiceInterface):
         self.loop.create_task(self.init_voice_call_manager())
 
     async def init_mm_messaging_interface(self):
-        ofono2mm_print("Initialize Messaging interface", self.verbose)
+        ofono2mm_print("Initialize Messaging interface", self.verbose, obj=self)
 
         self.mm_modem_messaging_interface = MMModemMessagingInterface(self.bus, self.modem_name, self.ofono_interfaces, self.ofono_interface_props, self.verbose)
         self.bus.export(f'/org/freedesktop/ModemManager1/Modem/{self.index}', self.mm_modem_messaging_interface)
@@ -391,40 +573,37 @@ class MMModemInterface(ServiceInterface):
         self.mm_modem_voice_interface = None
         self.mm_modem_messaging_interface = None
 
-        for object in self.mm_interface_objects:
+        # Collect failures and log them once at the end instead of per object
+        failed = []
+        for object in [*self.mm_interface_objects, f'/org/freedesktop/ModemManager1/Modem/{self.index}']:
             try:
-                ofono2mm_print(f"Unexporting object at path {object}", self.verbose)
                 self.bus.unexport(object)
             except Exception as e:
-                ofono2mm_print(f"Failed to unexport object at path {object}: {e}", self.verbose)
+                failed.append(f"{object}: {e}")
 
-        for bearer_interface in self.mm_bearer_interfaces:
-            bearer_interface = None
-
-        try:
-            self.bus.unexport(f'/org/freedesktop/ModemManager1/Modem/{self.index}')
-        except Exception as e:
-            ofono2mm_print(f"Failed to unexport object at path /org/freedesktop/ModemManager1/Modem/{self.index}: {e}", self.verbose)
+        ofono2mm_print("Unexported objects of modem %s", self.verbose, self.index, obj=self)
+        if failed:
+            ofono2mm_print("Failed to unexport objects: %s", self.verbose, ", ".join(failed), obj=self)
 
     def get_mm_modem_simple_interface(self):
         return self.mm_modem_simple_interface
 
     async def check_ofono_contexts(self):
-        ofono2mm_print("Checking ofono contexts", self.verbose)
+        ofono2mm_print("Checking ofono contexts", self.verbose, obj=self)
 
-        if 'org.ofono.SimManager' in self.ofono_interface_props and 'Present' in self.ofono_interface_props['org.ofono.SimManager'].props:
-            if not self.ofono_interface_props['org.ofono.SimManager']['Present'].value:
-                ofono2mm_print("SIM is not present. no need to check ofono contexts", self.verbose)
+        sim_props = self.ofono_interface_props['org.ofono.SimManager'] if 'org.ofono.SimManager' in self.ofono_interface_props else None
+        if sim_props is not None and 'Present' in sim_props:
+            if not sim_props['Present'].value:
+                ofono2mm_print("SIM is not present. no need to check ofono contexts", self.verbose, obj=self)
                 return
         else:
-            ofono2mm_print("SIM manager is not up yet. cannot check ofono contexts", self.verbose)
+            ofono2mm_print("SIM manager is not up yet. cannot check ofono contexts", self.verbose, obj=self)
             return
 
-        if not (not 'PinRequired' in self.ofono_interface_props['org.ofono.SimManager'] or self.ofono_interface_props['org.ofono.SimManager']['PinRequired'].value == 'none'):
-            ofono2mm_print("SIM is still locked and/or not ready. cannot check ofono contexts", self.verbose)
+        if not (not 'PinRequired' in sim_props or sim_props['PinRequired'].value == 'none'):
+            ofono2mm_print("SIM is still locked and/or not ready. cannot check ofono contexts", self.verbose, obj=self)
             return
 
-        global bearer_i
 
         # ConnectionManager and get_contexts can take a bit to come up, so...
 
@@ -440,179 +619,182 @@ class MMModemInterface(ServiceInterface):
                     await self.add_ofono_interface('org.ofono.ConnectionManager')
                     await asyncio.sleep(0.5)
                 else:
-                    ofono2mm_print(f"Failed to get contexts: {e}", self.verbose)
+                    ofono2mm_print("Failed to get contexts: %s", self.verbose, e, obj=self)
                     return
 
-        old_bearer_list = self.props['Bearers'].value
+        # Announce Ports and Bearers once after all contexts are handled, not once per context
+        new_bearers = []
+        ports_changed = False
         for ctx in contexts:
             if ctx[1]['Type'].value == "internet":
                 mm_bearer_interface = MMBearerInterface(self.ofono_client, self.modem_name, self.ofono_interfaces, self.ofono_interface_props, self, self.verbose)
                 self.mm_bearer_interfaces.append(mm_bearer_interface)
 
-                ip_method = 0
-                if 'Method' in ctx[1]['Settings'].value:
-                    if ctx[1]['Settings'].value['Method'].value == "static":
-                        ip_method = 2
-                    if ctx[1]['Settings'].value['Method'].value == "dhcp":
-                        ip_method = 3
-
-                ip_address = ''
-                if 'Address' in ctx[1]['Settings'].value:
-                    ip_address = ctx[1]['Settings'].value['Address'].value
-
-                ip_dns = []
-                if 'DomainNameServers' in ctx[1]['Settings'].value:
-                    ip_dns = ctx[1]['Settings'].value['DomainNameServers'].value
-
-                ip_gateway = ''
-                if 'Gateway' in ctx[1]['Settings'].value:
-                    ip_gateway = ctx[1]['Settings'].value['Gateway'].value
-
-                mm_bearer_interface.props.update({
-                    "Interface": ctx[1]['Settings'].value.get("Interface", Variant('s', '')),
-                    "Connected": ctx[1]['Active'],
-                    "Ip4Config": Variant('a{sv}', {
-                        "method": Variant('u', ip_method),
-                        "dns1": Variant('s', ip_dns[0] if len(ip_dns) > 0 else ''),
-                        "dns2": Variant('s', ip_dns[1] if len(ip_dns) > 1 else ''),
-                        "dns3": Variant('s', ip_dns[2] if len(ip_dns) > 2 else ''),
-                        "gateway": Variant('s', ip_gateway)
-                    }),
-                    "Properties": Variant('a{sv}', {
-                        "apn": ctx[1]['AccessPointName']
-                    })
-                })
+                mm_bearer_interface.update_props(bearer_props(ctx[1]['Settings'].value, ctx[1]['Active'], ctx[1]['AccessPointName']))
 
                 if 'Interface' in ctx[1]['Settings'].value:
-                    self.props['Ports'].value.append([ctx[1]['Settings'].value['Interface'].value, 2]) # port type AT MM_MODEM_PORT_TYPE_AT
-                    self.emit_properties_changed({'Ports': self.props['Ports'].value})
+                    if self.add_port(ctx[1]['Settings'].value['Interface'].value, 2): # port type AT MM_MODEM_PORT_TYPE_AT
+                        ports_changed = True
 
                 ofono_ctx_interface = self.ofono_client["ofono_context"][ctx[0]]["org.ofono.ConnectionContext"]
                 ofono_ctx_interface.on_property_changed(mm_bearer_interface.ofono_context_changed)
-                mm_bearer_interface.ofono_ctx = ctx[0]
+                mm_bearer_interface.set_ofono_ctx(ctx[0])
 
-                object_path = f'/org/freedesktop/ModemManager/Bearer/{bearer_i}'
+                object_path = f'/org/freedesktop/ModemManager/Bearer/{next(bearer_ids)}'
                 mm_bearer_interface.own_object_path = object_path
                 self.bus.export(object_path, mm_bearer_interface)
-                self.props['Bearers'].value.append(object_path)
+                new_bearers.append(object_path)
                 self.bearers[object_path] = mm_bearer_interface
 
-                if object_path not in self.mm_interface_objects:
-                    self.mm_interface_objects.append(object_path)
-
-                bearer_i += 1
+                self.mm_interface_objects[object_path] = None
 
-        if self.props['Bearers'].value == old_bearer_list:
-            self.emit_properties_changed({'Bearers': self.props['Bearers'].value})
+        changed_props = {}
+        if ports_changed:
+            changed_props['Ports'] = self.props['Ports'].value
+        if new_bearers:
+            # Bearers is always replaced, never modified in place, so the old and new values can be told apart
+            self.props['Bearers'] = Variant('ao', self.props['Bearers'].value + new_bearers)
+            changed_props['Bearers'] = self.props['Bearers'].value
+        if changed_props:
+            self.queue_properties_changed(changed_props)
+
+        # This runs again on every SIM unlock, handlers stay registered on the proxy and would pile up
+        connection_manager = self.ofono_interfaces['org.ofono.ConnectionManager']
+        if connection_manager is not self.context_handlers_proxy:
+            connection_manager.on_context_added(self.ofono_context_added)
+            connection_manager.on_context_removed(self.ofono_context_removed)
+            self.context_handlers_proxy = connection_manager
+
+    def add_port(self, name, port_type):
+        # Returns whether Ports changed, emitting is up to the caller
+        if self.ports.get(name) == port_type:
+            return False
+
+        self.ports[name] = port_type
+        self.props['Ports'] = Variant('a(su)', [[port, ptype] for port, ptype in self.ports.items()])
+        return True
+
+    def invalidate_bearer_contexts(self):
+        for bearer_interface in self.mm_bearer_interfaces:
+            bearer_interface.contexts = None
+            bearer_interface.schedule_set_props()
 
-        self.ofono_interfaces['org.ofono.ConnectionManager'].on_context_added(self.ofono_context_added)
+    def ofono_context_removed(self, path):
+        ofono2mm_print("oFono context removed with path %s", self.verbose, path, obj=self)
+        self.invalidate_bearer_contexts()
 
     def ofono_context_added(self, path, properties):
-        ofono2mm_print(f"oFono context added with path {path} and properties {properties}", self.verbose)
+        ofono2mm_print("oFono context added with path %s and properties %s", self.verbose, path, properties, obj=self)
+        self.invalidate_bearer_contexts()
 
-        global bearer_i
         if properties['Type'] == "internet":
             mm_bearer_interface = MMBearerInterface(self.ofono_client, self.modem_name, self.ofono_interfaces, self.ofono_interface_props, self, self.verbose)
             self.mm_bearer_interfaces.append(mm_bearer_interface)
 
-            ip_method = 0
-            if 'Method' in properties['Settings'].value:
-                if properties['Settings'].value['Method'].value == "static":
-                    ip_method = 2
-                elif properties['Settings'].value['Method'].value == "dhcp":
-                    ip_method = 3
-
-            ip_address = ''
-            if 'Address' in properties['Settings'].value:
-                ip_address = properties['Settings'].value['Address'].value
-
-            ip_dns = []
-            if 'DomainNameServers' in properties['Settings'].value:
-                ip_dns = properties['Settings'].value['DomainNameServers'].value
-
-            ip_gateway = ''
-            if 'Gateway' in properties['Settings'].value:
-                ip_gateway = properties['Settings'].value['Gateway'].value
-
-            mm_bearer_interface.props.update({
-                "Interface": properties['Settings'].value['Interface'] if 'Interface' in properties['Settings'].value else Variant('s', ''),
-                "Connected": properties['Active'],
-                "Ip4Config": Variant('a{sv}', {
-                    "method": Variant('u', ip_method),
-                    "dns1": Variant('s', ip_dns[0] if len(ip_dns) > 0 else ''),
-                    "dns2": Variant('s', ip_dns[1] if len(ip_dns) > 1 else ''),
-                    "dns3": Variant('s', ip_dns[2] if len(ip_dns) > 2 else ''),
-                    "gateway": Variant('s', ip_gateway)
-                }),
-                "Properties": Variant('a{sv}', {
-                    "apn": properties['AccessPointName']
-                })
-            })
+            mm_bearer_interface.update_props(bearer_props(properties['Settings'].value, properties['Active'], properties['AccessPointName']))
 
+            changed_props = {}
             if 'Interface' in properties['Settings'].value:
-                self.props['Ports'].value.append([properties['Settings'].value['Interface'].value, 2])
-                self.emit_properties_changed({'Ports': self.props['Ports'].value})
+                if self.add_port(properties['Settings'].value['Interface'].value, 2): # port type AT MM_MODEM_PORT_TYPE_AT
+                    changed_props['Ports'] = self.props['Ports'].value
 
             ofono_ctx_interface = self.ofono_client["ofono_context"][path]['org.ofono.ConnectionContext']
             ofono_ctx_interface.on_property_changed(mm_bearer_interface.ofono_context_changed)
-            mm_bearer_interface.ofono_ctx = path
+            mm_bearer_interface.set_ofono_ctx(path)
 
-            object_path = f'/org/freedesktop/ModemManager/Bearer/{bearer_i}'
+            object_path = f'/org/freedesktop/ModemManager/Bearer/{next(bearer_ids)}'
             mm_bearer_interface.own_object_path = object_path
             self.bus.export(object_path, mm_bearer_interface)
-            self.props['Bearers'].value.append(object_path)
+            self.props['Bearers'] = Variant('ao', self.props['Bearers'].value + [object_path])
             self.bearers[object_path] = mm_bearer_interface
 
-            if object_path not in self.mm_interface_objects:
-                self.mm_interface_objects.append(object_path)
+            self.mm_interface_objects[object_path] = None
 
-            bearer_i += 1
-            self.emit_properties_changed({'Bearers': self.props['Bearers'].value})
+            changed_props['Bearers'] = self.props['Bearers'].value
+            self.queue_properties_changed(changed_props)
 
     async def sim_unlocked(self):
-        ofono2mm_print("SIM is now unlocked, exporting all interfaces again", self.verbose)
+        ofono2mm_print("SIM is now unlocked, exporting all interfaces again", self.verbose, obj=self)
 
         self.loop.create_task(self.init_connection_manager())
 
         promises = []
-        for iface in self.used_interfaces:
-            promises.append(self.add_ofono_interface(iface))
+        for iface in USED_INTERFACES:
+            promises.append(self.add_ofono_interface(iface, refresh=True))
 
         await asyncio.gather(*promises)
 
         await self.release_request_modemmanager()
 
     async def release_request_modemmanager(self):
-        ofono2mm_print("Releasing and requesting the bus name", self.verbose)
+        ofono2mm_print("Releasing and requesting the bus name", self.verbose, obj=self)
 
         if hasattr(self, '_releasing'):
-            ofono2mm_print("Failed to release and request, operation already in progress", self.verbose)
+            ofono2mm_print("Failed to release and request, operation already in progress", self.verbose, obj=self)
             return
         self._releasing = True
 
         # Release and request the name so other apps realize we're here.
         # TODO: this feels like it shouldn't be necessary. We are signaling InterfacesAdded, so... why?
+        # If we don't own the name yet, requesting it already tells everyone, no need to release first.
+        global modemmanager_name_owned
 
-        try:
-            await self.bus.release_name('org.freedesktop.ModemManager1')
-        except Exception as e:
-            ofono2mm_print(f"Failed to release name: {e}", self.verbose)
+        if modemmanager_name_owned:
+            try:
+                await self.bus.release_name('org.freedesktop.ModemManager1')
+            except DBusError as e:
+                ofono2mm_print("Failed to release name: %s", self.verbose, e, obj=self)
 
         try:
             await self.bus.request_name('org.freedesktop.ModemManager1')
-        except Exception as e:
-            ofono2mm_print(f"Failed to request name: {e}", self.verbose)
+            modemmanager_name_owned = True
+        except DBusError as e:
+            ofono2mm_print("Failed to request name: %s", self.verbose, e, obj=self)
 
         delattr(self, '_releasing')
 
+    def read_saved_current_mode(self):
+        saved_mode = read_setting("current_mode").strip()
+        if saved_mode == "False":
+            return None
+
+        try:
+            return json.loads(saved_mode)
+        except ValueError as e:
+            ofono2mm_print("Ignoring saved current mode %s: %s", self.verbose, saved_mode, e, obj=self)
+            return None
+
+    def set_props_inputs(self):
+        # Everything set_props reads, if none of it changed running it again would change nothing either
+        inputs = [self.enabled, self.was_powered, self.locked, self.sim.value, tuple(self.selected_current_mode)]
+        for iface, names in SET_PROPS_DEPENDENCIES.items():
+            if iface in self.ofono_interface_props:
+                # Straight from the plain dict, this runs for every oFono property change.
+                # The Variants get replaced rather than modified when a value changes, so comparing them is enough.
+                props = self.ofono_interface_props[iface].props
+                inputs.append(tuple(props.get(name) for name in names))
+            else:
+                inputs.append(None)
+        return inputs
+
     async def set_props(self):
-        ofono2mm_print("Setting properties", self.verbose)
+        inputs = self.set_props_inputs()
+        if inputs == self.last_set_props_inputs:
+            return
+        # Remember what we started from, if something changes while we await below the next run still picks it up
+        self.last_set_props_inputs = inputs
 
-        old_props = self.props.copy()
+        ofono2mm_print("Setting properties", self.verbose, obj=self)
+
+        # Remember the values of the props we touch instead of copying all of them up front
+        old_values = {}
         old_state = self.props['State'].value
-        self.props['UnlockRequired'] = Variant('u', 1) # modem is unlocked MM_MODEM_LOCK_NONE
-        if 'Powered' in self.ofono_interface_props['org.ofono.Modem'] and self.ofono_interface_props['org.ofono.Modem']['Powered'].value and 'org.ofono.SimManager' in self.ofono_interface_props and self.enabled:
-            if 'Present' in self.ofono_interface_props['org.ofono.SimManager']:
+        # Look the oFono interfaces up once instead of on every check
+        modem_props = self.ofono_interface_props['org.ofono.Modem']
+        sim_props = self.ofono_interface_props['org.ofono.SimManager'] if 'org.ofono.SimManager' in self.ofono_interface_props else None
+        self.set_prop(old_values, 'UnlockRequired', UINT_VARIANTS[1]) # modem is unlocked MM_MODEM_LOCK_NONE
+        if 'Powered' in modem_props and modem_props['Powered'].value and sim_props is not None and self.enabled:
+            if 'Present' in sim_props:
                 if not self.was_powered:
                     # Bring the modem online now that it's powered
                     try:
@@ -621,47 +803,50 @@ class MMModemInterface(ServiceInterface):
                         await self.release_request_modemmanager()
                     except Exception as e:
                         # Might happen in airplane mode although powered should be false. Just coverin' our bases.
-                        ofono2mm_print(f"Failed to set Online to True: {e}", self.verbose)
-                        pass
-
-                if self.ofono_interface_props['org.ofono.SimManager']['Present'].value:
-                    if not 'PinRequired' in self.ofono_interface_props['org.ofono.SimManager'] or self.ofono_interface_props['org.ofono.SimManager']['PinRequired'].value == 'none':
-                        self.props['UnlockRequired'] = Variant('u', 1) # modem is unlocked MM_MODEM_LOCK_NONE
-                        if self.ofono_interface_props['org.ofono.Modem']['Online'].value:
+                        ofono2mm_print("Failed to set Online to True: %s", self.verbose, e, obj=self)
+                        # Nothing set_props reads changes when this fails, make sure the next run tries again
+                        self.last_set_props_inputs = None
+
+                if sim_props['Present'].value:
+                    if not 'PinRequired' in sim_props or sim_props['PinRequired'].value == 'none':
+                        self.set_prop(old_values, 'UnlockRequired', UINT_VARIANTS[1]) # modem is unlocked MM_MODEM_LOCK_NONE
+                        if modem_props['Online'].value:
                             if 'org.ofono.NetworkRegistration' in self.ofono_interface_props:
-                                if ("Status" in self.ofono_interface_props['org.ofono.NetworkRegistration']):
-                                    if self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == 'registered' or self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == 'roaming':
-                                        self.props['State'] = Variant('i', 8) # modem is registered MM_MODEM_STATE_REGISTERED
-                                        if 'Strength' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                                            self.props['SignalQuality'] = Variant('(ub)', [self.ofono_interface_props['org.ofono.NetworkRegistration']['Strength'].value, True])
-                                    elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == 'searching':
-                                        self.props['State'] = Variant('i', 7) # modem is searching MM_MODEM_STATE_SEARCHING
+                                netreg_props = self.ofono_interface_props['org.ofono.NetworkRegistration']
+                                if ("Status" in netreg_props):
+                                    status = netreg_props['Status'].value
+                                    if status in REGISTERED_STATUSES:
+                                        self.set_prop(old_values, 'State', INT_VARIANTS[8]) # modem is registered MM_MODEM_STATE_REGISTERED
+                                        if 'Strength' in netreg_props:
+                                            self.set_prop(old_values, 'SignalQuality', signal_quality(netreg_props['Strength'].value))
+                                    elif status == 'searching':
+                                        self.set_prop(old_values, 'State', INT_VARIANTS[7]) # modem is searching MM_MODEM_STATE_SEARCHING
                                     else:
-                                        self.props['State'] = Variant('i', 6) # modem is enabled MM_MODEM_STATE_ENABLED
+                                        self.set_prop(old_values, 'State', INT_VARIANTS[6]) # modem is enabled MM_MODEM_STATE_ENABLED
                                 else:
-                                    self.props['State'] = Variant('i', 6) # modem is enabled MM_MODEM_STATE_ENABLED
+                                    self.set_prop(old_values, 'State', INT_VARIANTS[6]) # modem is enabled MM_MODEM_STATE_ENABLED
                             else:
-                                self.props['State'] = Variant('i', 6) # modem is enabled MM_MODEM_STATE_ENABLED
+                                self.set_prop(old_values, 'State', INT_VARIANTS[6]) # modem is enabled MM_MODEM_STATE_ENABLED
                         else:
-                            self.props['State'] = Variant('i', 3) # modem is disabled MM_MODEM_STATE_DISABLED
+                            self.set_prop(old_values, 'State', INT_VARIANTS[3]) # modem is disabled MM_MODEM_STATE_DISABLED
 
-                        self.props['UnlockRequired'] = Variant('u', 1) # modem is unlocked MM_MODEM_LOCK_NONE
+                        self.set_prop(old_values, 'UnlockRequired', UINT_VARIANTS[1]) # modem is unlocked MM_MODEM_LOCK_NONE
                     else:
-                        self.props['UnlockRequired'] = Variant('u', 2) # modem needs a pin MM_MODEM_LOCK_SIM_PIN
-                        self.props['State'] = Variant('i', 2) # modem is locked MM_MODEM_STATE_LOCKED
+                        self.set_prop(old_values, 'UnlockRequired', UINT_VARIANTS[2]) # modem needs a pin MM_MODEM_LOCK_SIM_PIN
+                        self.set_prop(old_values, 'State', INT_VARIANTS[2]) # modem is locked MM_MODEM_STATE_LOCKED
                         self.locked = True
 
-                    self.props['Sim'] = self.sim
-                    self.props['StateFailedReason'] = Variant('i', 0) # no failure MM_MODEM_STATE_FAILED_REASON_NONE
+                    self.set_prop(old_values, 'Sim', self.sim)
+                    self.set_prop(old_values, 'StateFailedReason', INT_VARIANTS[0]) # no failure MM_MODEM_STATE_FAILED_REASON_NONE
                 else:
-                    self.props['Sim'] = Variant('o', '/')
-                    self.props['State'] = Variant('i', -1) # state unknown
-                    self.props['StateFailedReason'] = Variant('i', 2) # sim missing MM_MODEM_STATE_FAILED_REASON_SIM_MISSING
+                    self.set_prop(old_values, 'Sim', NO_SIM)
+                    self.set_prop(old_values, 'State', INT_VARIANTS[-1]) # state unknown
+                    self.set_prop(old_values, 'StateFailedReason', INT_VARIANTS[2]) # sim missing MM_MODEM_STATE_FAILED_REASON_SIM_MISSING
             else:
-                self.props['State'] = Variant('i', -1) # state unknown
-                self.props['StateFailedReason'] = Variant('i', 2) # sim missing MM_MODEM_STATE_FAILED_REASON_SIM_MISSING
+                self.set_prop(old_values, 'State', INT_VARIANTS[-1]) # state unknown
+                self.set_prop(old_values, 'StateFailedReason', INT_VARIANTS[2]) # sim missing MM_MODEM_STATE_FAILED_REASON_SIM_MISSING
 
-            self.props['PowerState'] = Variant('i', 3) # power is on MM_MODEM_POWER_STATE_ON
+            self.set_prop(old_values, 'PowerState', INT_VARIANTS[3]) # power is on MM_MODEM_POWER_STATE_ON
 
             lock_state = self.props['UnlockRequired'].value > 1
             if self.locked == True and self.locked != lock_state:
@@ -669,222 +854,135 @@ class MMModemInterface(ServiceInterface):
                 await self.sim_unlocked()
         else:
             self.was_powered = False
-            self.props['State'] = Variant('i', 3) # modem is disabled MM_MODEM_STATE_DISABLED
-            self.props['PowerState'] = Variant('i', 1) # power is off MM_MODEM_POWER_STATE_OFF
-
-        if 'org.ofono.SimManager' in self.ofono_interface_props:
-            self.props['OwnNumbers'] = Variant('as', self.ofono_interface_props['org.ofono.SimManager']['SubscriberNumbers'].value if 'SubscriberNumbers' in self.ofono_interface_props['org.ofono.SimManager'] else [])
-
-            if 'Retries' in self.ofono_interface_props['org.ofono.SimManager']:
-                unlock_retries = {}
-                if 'pin' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[2] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['pin'] # MM_MODEM_LOCK_SIM_PIN
-
-                if 'pin2' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[3] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['pin2'] # MM_MODEM_LOCK_SIM_PIN2
-
-                if 'puk' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[4] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['puk'] # MM_MODEM_LOCK_SIM_PUK
+            self.set_prop(old_values, 'State', INT_VARIANTS[3]) # modem is disabled MM_MODEM_STATE_DISABLED
+            self.set_prop(old_values, 'PowerState', INT_VARIANTS[1]) # power is off MM_MODEM_POWER_STATE_OFF
 
-                if 'puk2' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[5] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['puk2'] # MM_MODEM_LOCK_SIM_PUK2
+        if sim_props is not None:
+            self.set_prop(old_values, 'OwnNumbers', sim_props.get('SubscriberNumbers', NO_NUMBERS))
 
-                if 'service' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[6] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['service'] # MM_MODEM_LOCK_PH_SP_PIN
-
-                if 'servicepuk' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[7] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['servicepuk'] # MM_MODEM_LOCK_PH_SP_PUK
-
-                if 'network' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[8] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['network'] # MM_MODEM_LOCK_PH_NET_PIN
-
-                if 'networkpuk' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[9] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['networkpuk'] # MM_MODEM_LOCK_PH_NET_PUK
-
-                if 'corp' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[11] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['corp'] # MM_MODEM_LOCK_PH_CORP_PIN
+            retries = sim_props['Retries'].value if 'Retries' in sim_props else {}
+            unlock_retries = {mm_lock: retries[ofono_lock] for ofono_lock, mm_lock in UNLOCK_RETRY_LOCKS.items() if ofono_lock in retries}
+            self.set_prop(old_values, 'UnlockRetries', Variant('a{uu}', unlock_retries))
+        else:
+            self.set_prop(old_values, 'OwnNumbers', NO_NUMBERS)
+            self.set_prop(old_values, 'UnlockRetries', NO_RETRIES)
 
-                if 'corppuk' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[12] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['corppuk'] # MM_MODEM_LOCK_PH_CORP_PUK
+        # Bound here and not at the top, sim_unlocked above can bring these interfaces up
+        netreg_props = self.ofono_interface_props['org.ofono.NetworkRegistration'] if 'org.ofono.NetworkRegistration' in self.ofono_interface_props else None
+        radio_props = self.ofono_interface_props['org.ofono.RadioSettings'] if 'org.ofono.RadioSettings' in self.ofono_interface_props else None
 
-                if 'netsub' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[15] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['netsub'] # MM_MODEM_LOCK_PH_NETSUB_PIN
+        if netreg_props is not None and self.props['State'].value == 8:
+            if "Technology" in netreg_props:
+                current_tech, cell_type = ACCESS_TECHNOLOGIES.get(netreg_props["Technology"].value, (0, None))
+                if cell_type is not None:
+                    self.mm_cell_type = cell_type
 
-                if 'netsubpuk' in self.ofono_interface_props['org.ofono.SimManager']['Retries'].value:
-                    unlock_retries[16] = self.ofono_interface_props['org.ofono.SimManager']['Retries'].value['netsubpuk'] # MM_MODEM_LOCK_PH_NETSUB_PUK
+                self.set_prop(old_values, 'AccessTechnologies', Variant('u', current_tech))
             else:
-                unlock_retries = {}
-
-            self.props['UnlockRetries'] = Variant('a{uu}', unlock_retries)
+                self.set_prop(old_values, 'AccessTechnologies', UINT_VARIANTS[0]) # network is unknown MM_MODEM_ACCESS_TECHNOLOGY_UNKNOWN
         else:
-            self.props['OwnNumbers'] = Variant('as', [])
-            self.props['UnlockRetries'] = Variant('a{uu}', {})
-
-        if 'org.ofono.NetworkRegistration' in self.ofono_interface_props and self.props['State'].value == 8:
-            if "Technology" in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                current_tech = 0
-                if self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "nr":
-                    current_tech |= 1 << 15 # network is 5g MM_MODEM_ACCESS_TECHNOLOGY_5GNR
-                    self.mm_cell_type = 6 # cell type is 5g MM_CELL_TYPE_5GNR
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "lte":
-                    current_tech |= 1 << 14 # network is lte MM_MODEM_ACCESS_TECHNOLOGY_LTE
-                    self.mm_cell_type = 5 # cell type is lte MM_CELL_TYPE_LTE
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "hspap":
-                    current_tech |= 1 << 9 # network is hspa plus MM_MODEM_ACCESS_TECHNOLOGY_HSPA_PLUS
-                    self.mm_cell_type = 3 # cell type is umts MM_CELL_TYPE_UMTS
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "hspa":
-                    current_tech |= 1 << 8 # network is hspa MM_MODEM_ACCESS_TECHNOLOGY_HSPA
-                    self.mm_cell_type = 3 # cell type is umts MM_CELL_TYPE_UMTS
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "hsupa":
-                    current_tech |= 1 << 7 # network is hsupa MM_MODEM_ACCESS_TECHNOLOGY_HSUPA
-                    self.mm_cell_type = 3 # cell type is umts MM_CELL_TYPE_UMTS
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "hsdpa":
-                    current_tech |= 1 << 6 # network is hsdpa MM_MODEM_ACCESS_TECHNOLOGY_HSDPA
-                    self.mm_cell_type = 3 # cell type is umts MM_CELL_TYPE_UMTS
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "umts":
-                    current_tech |= 1 << 5 # network is umts MM_MODEM_ACCESS_TECHNOLOGY_UMTS
-                    self.mm_cell_type = 3 # cell type is umts MM_CELL_TYPE_UMTS
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "edge":
-                    current_tech |= 1 << 4 # network is edge MM_MODEM_ACCESS_TECHNOLOGY_EDGE
-                    self.mm_cell_type = 2 # cell type is gsm MM_CELL_TYPE_GSM
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "gprs":
-                    current_tech |= 1 << 3 # network is gprs MM_MODEM_ACCESS_TECHNOLOGY_GPRS
-                    self.mm_cell_type = 2 # cell type is gsm MM_CELL_TYPE_GSM
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "gsm":
-                    current_tech |= 1 << 1 # network is gsm MM_MODEM_ACCESS_TECHNOLOGY_GSM
-                    self.mm_cell_type = 2 # cell type is gsm MM_CELL_TYPE_GSM
-
-                self.props['AccessTechnologies'] = Variant('u', current_tech)
-            else:
-                self.props['AccessTechnologies'] = Variant('u', 0) # network is unknown MM_MODEM_ACCESS_TECHNOLOGY_UNKNOWN
-        else:
-            self.props['AccessTechnologies'] = Variant('u', 0)
-            self.props['SignalQuality'] = Variant('(ub)', [0, False])
+            self.set_prop(old_values, 'AccessTechnologies', UINT_VARIANTS[0])
+            self.set_prop(old_values, 'SignalQuality', NO_SIGNAL)
 
         caps = 0
         modes = 0
         pref = 0
-        supported_bands = []
-        gsm_bands = [1, 2, 3, 4, 14, 15, 16, 17, 18, 19, 20]
-        umts_bands = [5, 6, 7, 8, 9, 10, 11, 12, 13, 210, 211, 212, 213, 214, 219, 220, 221, 222, 225, 226, 232]
-        lte_bands = [31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 47, 48, 49, 50, 51, 52, 53, 54, 55, 56, 57, 58, 59, 60, 61, 62, 63, 64, 65, 66, 67, 68, 69, 70, 71, 72, 73, 74, 75, 76, 77, 78, 79, 80, 81, 82, 83, 84, 85, 86, 87, 88, 89, 90, 91, 92, 93, 94, 95, 96, 97, 98, 99, 100, 101, 115]
-        nr_bands = [301, 302, 303, 305, 307, 308, 312, 313, 314, 318, 320, 325, 326, 328, 329, 330, 334, 338, 339, 340, 341, 348, 350, 351, 353, 365, 366, 370, 371, 374, 375, 376, 377, 378, 379, 380, 381, 382, 383, 384, 386, 389, 390, 391, 392, 393, 394, 395, 557, 558, 560, 561]
-        if 'org.ofono.RadioSettings' in self.ofono_interface_props:
-            if 'AvailableTechnologies' in self.ofono_interface_props['org.ofono.RadioSettings']:
-                ofono_techs = self.ofono_interface_props['org.ofono.RadioSettings']['AvailableTechnologies'].value
-                if 'gsm' in ofono_techs:
-                    caps |= 4
-                    modes |= 2
-                    supported_bands.extend(gsm_bands)
-                if 'umts' in ofono_techs:
-                    caps |= 4
-                    modes |= 4
-                    supported_bands.extend(umts_bands)
-                if 'lte' in ofono_techs:
-                    caps |= 8
-                    modes |= 8
-                    supported_bands.extend(lte_bands)
-                if 'nr' in ofono_techs:
-                    caps |= 16
-                    modes |= 16
-                    supported_bands.extend(nr_bands)
-
-            if 'TechnologyPreference' in self.ofono_interface_props['org.ofono.RadioSettings']:
-                ofono_pref =  self.ofono_interface_props['org.ofono.RadioSettings']['TechnologyPreference'].value
-                if ofono_pref == 'nr':
-                    pref = 16 # current mode nr MM_MODEM_MODE_5G
-                if ofono_pref == 'lte':
-                    pref = 8 # current mode lte MM_MODEM_MODE_4G
-                if ofono_pref == 'umts':
-                    pref = 4 # current mode umts MM_MODEM_MODE_3G
-                if ofono_pref == 'gsm':
-                    pref = 2 # current mode gsm MM_MODEM_MODE_2G
-
-        self.props['CurrentCapabilities'] = Variant('u', caps)
-        self.props['SupportedCapabilities'] = Variant('au', [caps])
-
-        self.props['CurrentBands'] = Variant('au', supported_bands)
-        self.props['SupportedBands'] = Variant('au', supported_bands)
+        if radio_props is not None:
+            if 'AvailableTechnologies' in radio_props:
+                ofono_techs = radio_props['AvailableTechnologies'].value
+                for tech, (tech_caps, tech_modes, _) in RADIO_TECHNOLOGIES.items():
+                    if tech in ofono_techs:
+                        caps |= tech_caps
+                        modes |= tech_modes
+
+            if 'TechnologyPreference' in radio_props:
+                pref = PREFERRED_MODES.get(radio_props['TechnologyPreference'].value, pref)
+
+        self.set_prop(old_values, 'CurrentCapabilities', Variant('u', caps))
+        self.set_prop(old_values, 'SupportedCapabilities', Variant('au', [caps]))
+
+        self.set_prop(old_values, 'CurrentBands', BANDS_BY_MODES[modes])
+        self.set_prop(old_values, 'SupportedBands', BANDS_BY_MODES[modes])
 
         if caps == 0:
-            self.props['CurrentCapabilities'] = Variant('u', 4) # lte MM_MODEM_CAPABILITY_LTE
-            self.props['SupportedCapabilities'] = Variant('au', [4]) # lte MM_MODEM_CAPABILITY_LTE
-
-        supported_modes = []
-        if modes == 30: # gsm umts lte nr
-            supported_modes.append([30, 16]) # nr
-            supported_modes.append([30, 8]) # lte
-            supported_modes.append([30, 4]) # umts
-            supported_modes.append([30, 2]) # gsm
-            supported_modes.append([14, 8]) # lte
-            supported_modes.append([14, 4]) # umts
-            supported_modes.append([14, 2]) # gsm
-            supported_modes.append([12, 8]) # lte
-            supported_modes.append([12, 4]) # umts
-            supported_modes.append([10, 8]) # lte
-            supported_modes.append([10, 2]) # gsm
-            supported_modes.append([6, 4]) # umts
-            supported_modes.append([6, 2]) # gsm
-            supported_modes.append([8, 0]) # none
-            supported_modes.append([4, 0]) # none
-            supported_modes.append([2, 0]) # none
-        if modes == 14: # gsm umts lte
-            supported_modes.append([14, 8]) # lte
-            supported_modes.append([14, 4]) # umts
-            supported_modes.append([14, 2]) # gsm
-            supported_modes.append([12, 8]) # lte
-            supported_modes.append([12, 4]) # umts
-            supported_modes.append([10, 8]) # lte
-            supported_modes.append([10, 2]) # gsm
-            supported_modes.append([6, 4]) # umts
-            supported_modes.append([6, 2]) # gsm
-            supported_modes.append([8, 0]) # none
-            supported_modes.append([4, 0]) # none
-            supported_modes.append([2, 0]) # none
-        if modes == 6: # gsm umts
-            supported_modes.append([6, 4]) # umts
-            supported_modes.append([2, 0]) # none
-        if modes == 2: # gsm
-            supported_modes.append([2, 0]) # none
-
-        self.props['SupportedModes'] = Variant('a(uu)', supported_modes)
+            self.set_prop(old_values, 'CurrentCapabilities', UINT_VARIANTS[4]) # lte MM_MODEM_CAPABILITY_LTE
+            self.set_prop(old_values, 'SupportedCapabilities', LTE_CAPABILITIES) # lte MM_MODEM_CAPABILITY_LTE
+
+        supported_modes = SUPPORTED_MODES.get(modes, [])
+
+        self.set_prop(old_values, 'SupportedModes', Variant('a(uu)', supported_modes))
         if self.selected_current_mode in supported_modes:
-            self.props['CurrentModes'] = Variant('(uu)', self.selected_current_mode)
-        elif read_setting("current_mode") != "False":
-            self.selected_current_mode = literal_eval(read_setting("current_mode").strip())
+            self.set_prop(old_values, 'CurrentModes', Variant('(uu)', self.selected_current_mode))
+        elif self.saved_current_mode is not None:
+            self.selected_current_mode = self.saved_current_mode
             if self.selected_current_mode in supported_modes:
-                self.props['CurrentModes'] = Variant('(uu)', self.selected_current_mode)
+                self.set_prop(old_values, 'CurrentModes', Variant('(uu)', self.selected_current_mode))
             else:
-                self.props['CurrentModes'] = Variant('(uu)', [8, 0])
+                self.set_prop(old_values, 'CurrentModes', DEFAULT_CURRENT_MODES)
         else:
-            self.props['CurrentModes'] = Variant('(uu)', [8, 0]) # allowed 4g, preferred none
+            self.set_prop(old_values, 'CurrentModes', DEFAULT_CURRENT_MODES) # allowed 4g, preferred none
 
         if supported_modes == []:
-            self.props['SupportedModes'] = Variant('a(uu)', [[0, 0]]) # allowed mode none, preferred mode none MM_MODEM_MODE_NONE
-            self.props['CurrentModes'] = Variant('(uu)', [0, 0]) # allowed mode none, preferred mode none MM_MODEM_MODE_NONE
+            self.set_prop(old_values, 'SupportedModes', NO_SUPPORTED_MODES) # allowed mode none, preferred mode none MM_MODEM_MODE_NONE
+            self.set_prop(old_values, 'CurrentModes', NO_CURRENT_MODES) # allowed mode none, preferred mode none MM_MODEM_MODE_NONE
 
-        self.props['EquipmentIdentifier'] = Variant('s', self.ofono_interface_props['org.ofono.Modem']['Serial'].value if 'Serial' in self.ofono_interface_props['org.ofono.Modem'] else '')
-        self.props['HardwareRevision'] = Variant('s', self.ofono_interface_props['org.ofono.Modem']['Revision'].value if 'Revision' in self.ofono_interface_props['org.ofono.Modem'] else '')
-        self.props['Revision'] = Variant('s', self.ofono_interface_props['org.ofono.Modem']['SoftwareVersionNumber'].value if 'SoftwareVersionNumber' in self.ofono_interface_props['org.ofono.Modem'] else '')
-        self.props['Manufacturer'] = Variant('s', self.ofono_interface_props['org.ofono.Modem']['Manufacturer'].value if 'Manufacturer' in self.ofono_interface_props['org.ofono.Modem'] else 'ofono')
-        self.props['Model'] = Variant('s', self.ofono_interface_props['org.ofono.Modem']['Model'].value if 'Model' in self.ofono_interface_props['org.ofono.Modem'] else 'binder')
+        # oFono hands these out as 's' Variants already, use them as they are
+        self.set_prop(old_values, 'EquipmentIdentifier', modem_props.get('Serial', EMPTY_STRING))
+        self.set_prop(old_values, 'HardwareRevision', modem_props.get('Revision', EMPTY_STRING))
+        self.set_prop(old_values, 'Revision', modem_props.get('SoftwareVersionNumber', EMPTY_STRING))
+        self.set_prop(old_values, 'Manufacturer', modem_props.get('Manufacturer', DEFAULT_MANUFACTURER))
+        self.set_prop(old_values, 'Model', modem_props.get('Model', DEFAULT_MODEL))
 
         if old_state != self.props['State'].value:
             self.StateChanged(old_state, self.props['State'].value, 0)
 
-        changed_props = {}
-        for prop in self.props:
-            if self.props[prop].value != old_props[prop].value:
-                changed_props.update({ prop: self.props[prop].value })
+        changed_props = {name: self.props[name].value for name, old_value in old_values.items() if self.props[name].value != old_value}
+        if changed_props:
+            self.queue_properties_changed(changed_props)
+
+    def update_prop(self, name, variant):
+        # Set a single prop and only tell D-Bus about it if it is actually different
+        if self.props[name].value == variant.value:
+            return False
+        self.props[name] = variant
+        # Props were changed behind set_props' back, let the next run recompute them
+        self.last_set_props_inputs = None
+        self.queue_properties_changed({name: variant.value})
+        return True
+
+    def queue_properties_changed(self, changed_props):
+        # Signal strength and registration updates come in bursts, send them out as one PropertiesChanged
+        self.pending_props_changed.update(changed_props)
+        if self.props_changed_handle is None:
+            self.props_changed_handle = self.loop.call_later(PROPS_CHANGED_DELAY, self.flush_properties_changed)
+
+    def flush_properties_changed(self):
+        changed_props, self.pending_props_changed = self.pending_props_changed, {}
+        self.props_changed_handle = None
+        if changed_props:
+            self.emit_properties_changed(changed_props)
+
+    def set_state(self, new_state):
+        old_state = self.props['State'].value
+        if old_state == new_state:
+            return
+        self.props['State'] = Variant('i', new_state)
+        self.last_set_props_inputs = None
+        self.StateChanged(old_state, new_state, 0)
+        self.queue_properties_changed({'State': new_state})
 
-        self.emit_properties_changed(changed_props)
+    def set_prop(self, old_values, name, variant):
+        # A prop can be assigned more than once per set_props run, keep the value from before the first one
+        if name not in old_values:
+            old_values[name] = self.props[name].value
+        self.props[name] = variant
 
     @method()
     async def Enable(self, enable: 'b'):
-        ofono2mm_print(f"Enable with state {enable}", self.verbose)
+        ofono2mm_print("Enable with state %s", self.verbose, enable, obj=self)
 
         if self.props['State'].value == -1:
-            ofono2mm_print("Modem is in an unknown state, skipping", self.verbose)
+            ofono2mm_print("Modem is in an unknown state, skipping", self.verbose, obj=self)
             return
 
         self.enabled = enable
@@ -894,36 +992,32 @@ class MMModemInterface(ServiceInterface):
                 await self.ofono_modem.call_set_property('Powered', Variant('b', enable))
                 await self.ofono_modem.call_set_property('Online', Variant('b', enable))
             except Exception as e:
-                ofono2mm_print(f"Failed to enable with state {enable}: {e}", self.verbose)
+                ofono2mm_print("Failed to enable with state %s: %s", self.verbose, enable, e, obj=self)
         else:
             try:
                 await self.ofono_modem.call_set_property('Online', Variant('b', enable))
             except Exception as e:
-                ofono2mm_print(f"Failed to enable with state {enable}: {e}", self.verbose)
+                ofono2mm_print("Failed to enable with state %s: %s", self.verbose, enable, e, obj=self)
 
-        old_state = self.props['State'].value
-        self.props['State'] = Variant('i', 6 if enable else 3) # 6 is STATE_ENABLED, 3 is STATE_DISABLED
-        self.StateChanged(old_state, self.props['State'].value, 0)
-        self.emit_properties_changed({'State': self.props['State'].value})
+        self.set_state(6 if enable else 3) # 6 is STATE_ENABLED, 3 is STATE_DISABLED
 
         await self.set_props()
 
     @method()
     def ListBearers(self) -> 'ao':
-        ofono2mm_print("Listing bearers", self.verbose)
+        ofono2mm_print("Listing bearers", self.verbose, obj=self)
         return self.props['Bearers'].value
 
     @method()
     async def CreateBearer(self, properties: 'a{sv}') -> 'o':
-        ofono2mm_print(f"Create bearer with properties {properties}", self.verbose)
+        ofono2mm_print("Create bearer with properties %s", self.verbose, properties, obj=self)
 
         try:
             return await self.doCreateBearer(properties)
         except Exception as e:
-            ofono2mm_print(f"Failed to create bearer with properties {properties}: {e}", self.verbose)
+            ofono2mm_print("Failed to create bearer with properties %s: %s", self.verbose, properties, e, obj=self)
 
     async def doCreateBearer(self, properties):
-        global bearer_i
 
         # ConnectionManager and get_contexts can take a bit to come up, so...
 
@@ -939,108 +1033,101 @@ class MMModemInterface(ServiceInterface):
                     await self.add_ofono_interface('org.ofono.ConnectionManager')
                     await asyncio.sleep(0.5)
                 else:
-                    ofono2mm_print(f"Failed to get contexts: {e}", self.verbose)
+                    ofono2mm_print("Failed to get contexts: %s", self.verbose, e, obj=self)
                     return
 
-        ofono2mm_print(f"Creating bearer {bearer_i} with properties: {properties}", self.verbose)
+        ofono2mm_print("Creating bearer with properties: %s", self.verbose, properties, obj=self)
         mm_bearer_interface = MMBearerInterface(self.ofono_client, self.modem_name, self.ofono_interfaces, self.ofono_interface_props, self, self.verbose)
         self.mm_bearer_interfaces.append(mm_bearer_interface)
-        mm_bearer_interface.props.update({
+        mm_bearer_interface.update_props({
             "Properties": Variant('a{sv}', properties)
         })
 
         # users would usually have to do
         # set-context-property 0 AccessPointName example.apn && activate-context 1
         # to activate the correct context for ofono2mm to use, lets do it on bearer creation to not need ofono scripts
+        # The contexts we just fetched above are still current, no need to ask oFono again
         chosen_apn = ''
         ofono_ctx = ''
         internet_ctx_exists = False
-        contexts = []
-        try:
-            contexts = await self.ofono_proxy['org.ofono.ConnectionManager'].call_get_contexts()
-        except Exception as e:
-            ofono2mm_print(f"Failed to get ofono contexts, ignoring", self.verbose)
 
         for ctx in contexts:
-            name = ctx[1].get('Type', Variant('s', '')).value
-            apn = ctx[1].get('AccessPointName', Variant('s', '')).value
+            name = ctx[1].get('Type', EMPTY_STRING).value
+            apn = ctx[1].get('AccessPointName', EMPTY_STRING).value
             if name.lower() == "internet":
                 if apn:
                     chosen_apn = apn
                 ofono_ctx = ctx[0]
 
-            if ofono_ctx:
-                internet_ctx_exists = True
-                ofono_ctx_interface = self.ofono_client["ofono_context"][ofono_ctx]['org.ofono.ConnectionContext']
-                await ofono_ctx_interface.call_set_property("Active", Variant('b', False))
-                await ofono_ctx_interface.call_set_property("AccessPointName", Variant('s', chosen_apn))
-                await ofono_ctx_interface.call_set_property("Protocol", Variant('s', 'ip'))
-                await ofono_ctx_interface.call_set_property("Active", Variant('b', True))
+        if ofono_ctx:
+            internet_ctx_exists = True
+            ofono_ctx_interface = self.ofono_client["ofono_context"][ofono_ctx]['org.ofono.ConnectionContext']
+            await ofono_ctx_interface.call_set_property("Active", Variant('b', False))
+            # APN and protocol don't depend on each other, set them in one round-trip
+            await asyncio.gather(ofono_ctx_interface.call_set_property("AccessPointName", Variant('s', chosen_apn)),
+                                 ofono_ctx_interface.call_set_property("Protocol", Variant('s', 'ip')))
+            await ofono_ctx_interface.call_set_property("Active", Variant('b', True))
 
         if not internet_ctx_exists:
             try:
                 ofono_ctx = await self.ofono_proxy['org.ofono.ConnectionManager'].call_add_context("internet")
                 ofono_ctx_interface = self.ofono_client["ofono_context"][ofono_ctx]['org.ofono.ConnectionContext']
+                ctx_props = [ofono_ctx_interface.call_set_property("Protocol", Variant('s', 'ip'))]
                 if 'apn' in properties:
-                    await ofono_ctx_interface.call_set_property("AccessPointName", properties['apn'])
-                await ofono_ctx_interface.call_set_property("Protocol", Variant('s', 'ip'))
-                mm_bearer_interface.ofono_ctx = ofono_ctx
+                    ctx_props.append(ofono_ctx_interface.call_set_property("AccessPointName", properties['apn']))
+                await asyncio.gather(*ctx_props)
+                mm_bearer_interface.set_ofono_ctx(ofono_ctx)
                 await mm_bearer_interface.add_auth_ofono(properties['username'].value if 'username' in properties else '',
                                                          properties['password'].value if 'password' in properties else '')
             except Exception as e:
                # should be fine? both apndb and mbpi provision do this for us so.... lets just ignore for now
-               ofono2mm_print(f"Failed to create internet context: {e}, ignoring", self.verbose)
+               ofono2mm_print("Failed to create internet context: %s, ignoring", self.verbose, e, obj=self)
         else:
-            mm_bearer_interface.ofono_ctx = ofono_ctx
+            mm_bearer_interface.set_ofono_ctx(ofono_ctx)
             try:
                 await mm_bearer_interface.add_auth_ofono(properties['username'].value if 'username' in properties else '',
                                                          properties['password'].value if 'password' in properties else '')
             except Exception as e:
                # this should also be fine, as it again comes from apndb or mbpi so we don't really nee to touch it
-               ofono2mm_print(f"Failed to set ofono authentication: {e}, ignoring", self.verbose)
+               ofono2mm_print("Failed to set ofono authentication: %s, ignoring", self.verbose, e, obj=self)
 
-        object_path = f'/org/freedesktop/ModemManager/Bearer/{bearer_i}'
+        object_path = f'/org/freedesktop/ModemManager/Bearer/{next(bearer_ids)}'
         mm_bearer_interface.own_object_path = object_path
         self.bus.export(object_path, mm_bearer_interface)
 
-        self.props['Bearers'].value.append(object_path)
+        self.props['Bearers'] = Variant('ao', self.props['Bearers'].value + [object_path])
         self.bearers[object_path] = mm_bearer_interface
 
-        if object_path not in self.mm_interface_objects:
-            self.mm_interface_objects.append(object_path)
+        self.mm_interface_objects[object_path] = None
 
-        bearer_i += 1
-        self.emit_properties_changed({'Bearers': self.props['Bearers'].value})
+        self.queue_properties_changed({'Bearers': self.props['Bearers'].value})
 
-        ofono2mm_print(f"Exported bearer at object path {object_path}", self.verbose)
+        ofono2mm_print("Exported bearer at object path %s", self.verbose, object_path, obj=self)
 
         return object_path
 
     @method()
     async def DeleteBearer(self, path: 'o'):
-        ofono2mm_print(f"Delete bearer with object path {path}", self.verbose)
+        ofono2mm_print("Delete bearer with object path %s", self.verbose, path, obj=self)
 
         if path in self.props['Bearers'].value:
-            self.props['Bearers'].value.remove(path)
+            self.props['Bearers'] = Variant('ao', [bearer for bearer in self.props['Bearers'].value if bearer != path])
             await self.ofono_proxy['org.ofono.ConnectionManager'].call_remove_context(self.bearers[path].ofono_ctx)
             self.bearers.pop(path)
             self.bus.unexport(path)
-            self.emit_properties_changed({'Bearers': self.props['Bearers'].value})
+            self.queue_properties_changed({'Bearers': self.props['Bearers'].value})
 
-            if path in self.mm_interface_objects:
-                self.mm_interface_objects.remove(path)
+            self.mm_interface_objects.pop(path, None)
 
     @method()
     async def Reset(self):
-        ofono2mm_print("Resetting modem", self.verbose)
+        ofono2mm_print("Resetting modem", self.verbose, obj=self)
 
+        self.smd_devices = None
         await self.ofono_modem.call_set_property('Powered', Variant('b', False))
         await self.ofono_modem.call_set_property('Powered', Variant('b', True))
 
-        old_state = self.props['State'].value
-        self.props['State'] = Variant('i', 6)  # 6 typically represents an enabled state
-        self.StateChanged(old_state, self.props['State'].value, 0)
-        self.emit_properties_changed({'State': self.props['State'].value})
+        self.set_state(6) # 6 typically represents an enabled state
 
         await self.ofono_modem.call_set_property('Online', Variant('b', True))
 
@@ -1048,16 +1135,13 @@ class MMModemInterface(ServiceInterface):
 
     @method()
     async def FactoryReset(self, code: 's'):
-        ofono2mm_print(f"Factory Resetting modem with carrier code {code}", self.verbose)
+        ofono2mm_print("Factory Resetting modem with carrier code %s", self.verbose, code, obj=self)
 
         # not quite a factory reset but better than nothing
         await self.ofono_modem.call_set_property('Powered', Variant('b', False))
         await self.ofono_modem.call_set_property('Powered', Variant('b', True))
 
-        old_state = self.props['State'].value
-        self.props['State'] = Variant('i', 6)  # 6 typically represents an enabled state
-        self.StateChanged(old_state, self.props['State'].value, 0)
-        self.emit_properties_changed({'State': self.props['State'].value})
+        self.set_state(6) # 6 typically represents an enabled state
 
         await self.ofono_modem.call_set_property('Online', Variant('b', True))
 
@@ -1065,10 +1149,10 @@ class MMModemInterface(ServiceInterface):
 
     @method()
     async def SetPowerState(self, state: 'u'):
-        ofono2mm_print(f"Setting power state to {state}", self.verbose)
+        ofono2mm_print("Setting power state to %s", self.verbose, state, obj=self)
 
         if self.props['State'].value != 3:
-            ofono2mm_print("SetPowerState ignored, modem is disabled", self.verbose)
+            ofono2mm_print("SetPowerState ignored, modem is disabled", self.verbose, obj=self)
             return
 
         if state == 1:
@@ -1077,20 +1161,18 @@ class MMModemInterface(ServiceInterface):
             self.was_powered = True
 
         await self.ofono_modem.call_set_property('Powered', Variant('b', True))
-        self.props['PowerState'] = Variant('i', state)
-        self.emit_properties_changed({'PowerState': self.props['PowerState'].value})
+        self.update_prop('PowerState', Variant('i', state))
 
         await self.set_props()
 
     @method()
     def SetCurrentCapabilities(self, capabilities: 'u'):
-        ofono2mm_print(f"Setting current capabilities to {capabilities}", self.verbose)
-        self.props['CurrentCapabilities'] = Variant('u', capabilities)
-        self.emit_properties_changed({'CurrentCapabilities': self.props['CurrentCapabilities'].value})
+        ofono2mm_print("Setting current capabilities to %s", self.verbose, capabilities, obj=self)
+        self.update_prop('CurrentCapabilities', Variant('u', capabilities))
 
     @method()
     async def SetCurrentModes(self, modes: '(uu)'):
-        ofono2mm_print(f"Setting current modes to {modes}", self.verbose)
+        ofono2mm_print("Setting current modes to %s", self.verbose, modes, obj=self)
 
         if modes in self.props['SupportedModes'].value:
             if True:
@@ -1114,29 +1196,28 @@ class MMModemInterface(ServiceInterface):
                     await self.ofono_proxy['org.ofono.RadioSettings'].call_set_property('TechnologyPreference', Variant('s', 'nr'))
 
             self.selected_current_mode = modes
-            if read_setting('current_mode').strip() != str(modes):
-                ofono2mm_print(f"Saving selected current mode {modes}", self.verbose)
-                save_setting('current_mode', str(modes))
+            if self.saved_current_mode != modes:
+                ofono2mm_print("Saving selected current mode %s", self.verbose, modes, obj=self)
+                save_setting('current_mode', json.dumps(list(modes)))
+                self.saved_current_mode = modes
 
-            self.props['CurrentModes'] = Variant('(uu)', modes)
-            self.emit_properties_changed({'CurrentModes': self.props['CurrentModes'].value})
+            self.update_prop('CurrentModes', Variant('(uu)', modes))
         else:
             raise DBusError('org.freedesktop.ModemManager1.Error.Core.Unsupported', f'The given combination of allowed and preferred modes is not supported')
 
     @method()
     def SetCurrentBands(self, bands: 'au'):
-        ofono2mm_print(f"Setting current bands to {bands}", self.verbose)
-        self.props['CurrentBands'] = Variant('u', bands)
+        ofono2mm_print("Setting current bands to %s", self.verbose, bands, obj=self)
+        self.update_prop('CurrentBands', Variant('au', list(bands)))
 
     @method()
     def SetPrimarySimSlot(self, sim_slot: 'u'):
-        ofono2mm_print(f"Setting primary sim slot to {sim_slot}", self.verbose)
-        self.props['PrimarySimSlot'] = Variant('u', sim_slot)
-        self.emit_properties_changed({'PrimarySimSlot': self.props['PrimarySimSlot'].value})
+        ofono2mm_print("Setting primary sim slot to %s", self.verbose, sim_slot, obj=self)
+        self.update_prop('PrimarySimSlot', Variant('u', sim_slot))
 
     @method()
     def GetCellInfo(self) -> 'aa{sv}':
-        ofono2mm_print("Returning cell info", self.verbose)
+        ofono2mm_print("Returning cell info", self.verbose, obj=self)
 
         cell_info = {
             "cell-type": Variant("u", self.mm_cell_type),
@@ -1147,7 +1228,7 @@ class MMModemInterface(ServiceInterface):
 
     @method()
     async def Command(self, cmd: 's', timeout: 'u') -> 's':
-        ofono2mm_print(f"Running command {cmd} with timeout {timeout}", self.verbose)
+        ofono2mm_print("Running command %s with timeout %s", self.verbose, cmd, timeout, obj=self)
 
         if cmd == '':
             return ''
@@ -1155,40 +1236,66 @@ class MMModemInterface(ServiceInterface):
         if cmd[:2] != "AT":
             return ''
 
-        smd_devices = glob('/dev/smd*')
+        # The smd nodes don't come and go while the modem is up, only look for them again after a reset
+        if self.smd_devices is None:
+            self.smd_devices = sorted(glob('/dev/smd*'), key=natural_sort_key)
 
-        smd_devices.sort(key=lambda s: [int(text) if text.isdigit() else text.lower() for text in split('([0-9]+)', s)])
-        if smd_devices:
-            device_path = smd_devices[0]
+        if self.smd_devices:
+            device_path = self.smd_devices[0]
         else:
             return ''
 
-        data_to_write = f"{cmd}\r"
+        # Don't block the event loop while the modem answers, wait for the fd to become readable instead
+        loop = asyncio.get_running_loop()
+        answered = loop.create_future()
+        received = bytearray()
 
-        with open(device_path, 'w') as device_file:
-            device_file.write(data_to_write)
+        def on_readable():
+            try:
+                chunk = os.read(fd, 4096)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                # The fd stays readable after an error, stop watching it instead of spinning until the timeout
+                loop.remove_reader(fd)
+                if not answered.done():
+                    answered.set_exception(e)
+                return
 
-        with open(device_path, 'r') as device_file:
-            start_time = time()
-            received_data = ""
-            while True:
-                line = device_file.readline()
-                if line:
-                    if time() - start_time > 5:
-                        return ''
+            received.extend(chunk)
+            # An empty read means the other end hung up, hand back whatever arrived so far
+            if chunk == b'' or b"OK" in received or b"ERROR" in received:
+                loop.remove_reader(fd)
+                if not answered.done():
+                    answered.set_result(None)
 
-                    received_data += line
-                    if "OK" in received_data:
-                        break
-                    if "ERROR" in received_data:
-                        break
+        try:
+            fd = os.open(device_path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        except OSError as e:
+            ofono2mm_print("Failed to open %s: %s", self.verbose, device_path, e, obj=self)
+            self.smd_devices = None
+            return ''
 
-                sleep(0.1)
+        try:
+            os.write(fd, f"{cmd}\r".encode())
+            loop.add_reader(fd, on_readable)
+            try:
+                await asyncio.wait_for(answered, 5)
+            finally:
+                loop.remove_reader(fd)
+        except asyncio.TimeoutError:
+            return ''
+        except OSError as e:
+            ofono2mm_print("Failed to talk to %s: %s", self.verbose, device_path, e, obj=self)
+            return ''
+        finally:
+            os.close(fd)
 
+        received_data = received.decode(errors='replace')
         data = received_data.strip()
         data_print = data.replace('\n', ' ')
         if data != '':
-            ofono2mm_print(f"Modem returned: {data_print}", self.verbose)
+            ofono2mm_print("Modem returned: %s", self.verbose, data_print, obj=self)
             return data
         else:
             return ''
@@ -1334,7 +1441,9 @@ class MMModemInterface(ServiceInterface):
         return self.props['SupportedIpFamilies'].value
 
     async def ofono_changed(self, name, varval):
-        await self.set_props()
+        # Interfaces, Features, Emergency and friends don't feed into any modem prop
+        if name in SET_PROPS_DEPENDENCIES['org.ofono.Modem']:
+            await self.set_props()
         if self.mm_modem3gpp_interface:
             self.mm_modem3gpp_interface.ofono_changed(name, varval)
         if self.mm_sim_interface:
@@ -1351,21 +1460,17 @@ class MMModemInterface(ServiceInterface):
             if bearer_interface:
                 bearer_interface.ofono_changed(name, varval)
 
-    def ofono_interface_changed(self, iface):
-        async def ofono_interface_property_changed(name, varval):
-            ofono2mm_print(f"Property name: {name}, property value: {varval.value}", self.verbose)
-            if iface in self.ofono_interface_props:
-                await self.set_props()
-                if self.mm_modem3gpp_interface:
-                    self.mm_modem3gpp_interface.ofono_interface_changed(iface)(name, varval)
-                if self.mm_sim_interface:
-                    self.mm_sim_interface.ofono_interface_changed(iface)(name, varval)
-                if self.mm_modem_voice_interface:
-                    self.mm_modem_voice_interface.ofono_interface_changed(iface)(name, varval)
-                if self.mm_modem_messaging_interface:
-                    self.mm_modem_messaging_interface.ofono_interface_changed(iface)(name, varval)
-                if self.mm_modem_simple_interface:
-                    self.mm_modem_simple_interface.ofono_interface_changed(iface)(name, varval)
-                if self.mm_modem_signal_interface:
-                    self.mm_modem_signal_interface.ofono_interface_changed(iface)(name, varval)
-        return ofono_interface_property_changed
+    async def ofono_interface_changed(self, iface, name, varval):
+        ofono2mm_print("Property name: %s, property value: %s", self.verbose, name, varval.value, obj=self)
+        if iface not in self.ofono_interface_props:
+            return
+
+        if name in SET_PROPS_DEPENDENCIES.get(iface, ()):
+            await self.set_props()
+        for attr, depends_on, is_async in CHILD_INTERFACES:
+            child = getattr(self, attr)
+            if child:
+                child.ofono_interface_changed(iface, name, varval)
+        for bearer_interface in self.mm_bearer_interfaces:
+            if bearer_interface:
+                bearer_interface.ofono_interface_changed(iface, name, varval)
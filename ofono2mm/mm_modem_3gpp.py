@@ -10,7 +10,7 @@ class MMModem3gppInterface(ServiceInterface):
     def __init__(self, ofono_client, modem_name, ofono_interfaces, ofono_interface_props, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Modem3gpp')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing 3GPP interface", verbose)
+        ofono2mm_print("Initializing 3GPP interface", verbose, obj=self)
         self.ofono_client = ofono_client
         self.ofono_interfaces = ofono_interfaces
         self.ofono_interface_props = ofono_interface_props
@@ -40,62 +40,67 @@ class MMModem3gppInterface(ServiceInterface):
         }
 
     async def set_props(self):
-        ofono2mm_print("Setting properties", self.verbose)
+        ofono2mm_print("Setting properties", self.verbose, obj=self)
 
-        old_props = self.props.copy()
+        # Remember the values of the props we touch instead of copying all of them up front
+        old_values = {}
 
-        if 'org.ofono.SimManager' in self.ofono_interface_props and 'Present' in self.ofono_interface_props['org.ofono.SimManager'].props:
-            if not self.ofono_interface_props['org.ofono.SimManager']['Present'].value:
-                ofono2mm_print("SIM is not present. no need to set 3gpp props", self.verbose)
+        sim_props = self.ofono_interface_props['org.ofono.SimManager'] if 'org.ofono.SimManager' in self.ofono_interface_props else None
+        if sim_props is not None and 'Present' in sim_props:
+            if not sim_props['Present'].value:
+                ofono2mm_print("SIM is not present. no need to set 3gpp props", self.verbose, obj=self)
                 return
         else:
-            ofono2mm_print("SIM manager is not up yet. cannot set 3gpp props", self.verbose)
+            ofono2mm_print("SIM manager is not up yet. cannot set 3gpp props", self.verbose, obj=self)
             return
 
-        if not (not 'PinRequired' in self.ofono_interface_props['org.ofono.SimManager'] or self.ofono_interface_props['org.ofono.SimManager']['PinRequired'].value == 'none'):
-            ofono2mm_print("SIM is still locked and/or not ready. cannot set 3gpp props", self.verbose)
+        if not (not 'PinRequired' in sim_props or sim_props['PinRequired'].value == 'none'):
+            ofono2mm_print("SIM is still locked and/or not ready. cannot set 3gpp props", self.verbose, obj=self)
             return
 
         if 'org.ofono.NetworkRegistration' in self.ofono_interface_props:
-            self.props['OperatorName'] = Variant('s', self.ofono_interface_props['org.ofono.NetworkRegistration']['Name'].value if "Name" in self.ofono_interface_props['org.ofono.NetworkRegistration'] else '')
+            netreg_props = self.ofono_interface_props['org.ofono.NetworkRegistration']
+            self.set_prop(old_values, 'OperatorName', Variant('s', netreg_props['Name'].value if "Name" in netreg_props else ''))
 
             MCC = ''
-            if 'MobileCountryCode' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                MCC = self.ofono_interface_props['org.ofono.NetworkRegistration']['MobileCountryCode'].value
+            if 'MobileCountryCode' in netreg_props:
+                MCC = netreg_props['MobileCountryCode'].value
 
             MNC = ''
-            if 'MobileNetworkCode' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                MNC = self.ofono_interface_props['org.ofono.NetworkRegistration']['MobileNetworkCode'].value
-
-            self.props['OperatorCode'] = Variant('s', f'{MCC}{MNC}')
-            if 'Status' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                if self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "unregistered":
-                    self.props['RegistrationState'] = Variant('u', 0) # idle MM_MODEM_3GPP_REGISTRATION_STATE_IDLE
-                    self.props['PacketServiceState'] = Variant('u', 1) # detached MM_MODEM_3GPP_PACKET_SERVICE_STATE_DETACHED
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "registered":
-                    self.props['RegistrationState'] = Variant('u', 1) # home MM_MODEM_3GPP_REGISTRATION_STATE_HOME
-                    self.props['PacketServiceState'] = Variant('u', 2) # attached MM_MODEM_3GPP_PACKET_SERVICE_STATE_ATTACHED
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "searching":
-                    self.props['RegistrationState'] = Variant('u', 2) # searching MM_MODEM_3GPP_REGISTRATION_STATE_SEARCHING
-                    self.props['PacketServiceState'] = Variant('u', 0) # unknown MM_MODEM_3GPP_PACKET_SERVICE_STATE_UNKNOWN
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "denied":
-                    self.props['RegistrationState'] = Variant('u', 3) # denied MM_MODEM_3GPP_REGISTRATION_STATE_DENIED
-                    self.props['PacketServiceState'] = Variant('u', 0) # unknown MM_MODEM_3GPP_PACKET_SERVICE_STATE_UNKNOWN
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "unknown":
-                    self.props['RegistrationState'] = Variant('u', 4) # unknown MM_MODEM_3GPP_REGISTRATION_STATE_UNKNOWN
-                    self.props['PacketServiceState'] = Variant('u', 0) # unknown MM_MODEM_3GPP_PACKET_SERVICE_STATE_UNKNOWN
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "roaming":
-                    self.props['RegistrationState'] = Variant('u', 5) # MM_MODEM_3GPP_REGISTRATION_STATE_ROAMING
-                    self.props['PacketServiceState'] = Variant('u', 2) # attached MM_MODEM_3GPP_PACKET_SERVICE_STATE_ATTACHED
+            if 'MobileNetworkCode' in netreg_props:
+                MNC = netreg_props['MobileNetworkCode'].value
+
+            self.set_prop(old_values, 'OperatorCode', Variant('s', f'{MCC}{MNC}'))
+            if 'Status' in netreg_props:
+                status = netreg_props['Status'].value
+                if status == "unregistered":
+                    self.set_prop(old_values, 'RegistrationState', Variant('u', 0)) # idle MM_MODEM_3GPP_REGISTRATION_STATE_IDLE
+                    self.set_prop(old_values, 'PacketServiceState', Variant('u', 1)) # detached MM_MODEM_3GPP_PACKET_SERVICE_STATE_DETACHED
+                elif status == "registered":
+                    self.set_prop(old_values, 'RegistrationState', Variant('u', 1)) # home MM_MODEM_3GPP_REGISTRATION_STATE_HOME
+                    self.set_prop(old_values, 'PacketServiceState', Variant('u', 2)) # attached MM_MODEM_3GPP_PACKET_SERVICE_STATE_ATTACHED
+                elif status == "searching":
+                    self.set_prop(old_values, 'RegistrationState', Variant('u', 2)) # searching MM_MODEM_3GPP_REGISTRATION_STATE_SEARCHING
+                    self.set_prop(old_values, 'PacketServiceState', Variant('u', 0)) # unknown MM_MODEM_3GPP_PACKET_SERVICE_STATE_UNKNOWN
+                elif status == "denied":
+                    self.set_prop(old_values, 'RegistrationState', Variant('u', 3)) # denied MM_MODEM_3GPP_REGISTRATION_STATE_DENIED
+                    self.set_prop(old_values, 'PacketServiceState', Variant('u', 0)) # unknown MM_MODEM_3GPP_PACKET_SERVICE_STATE_UNKNOWN
+                elif status == "unknown":
+                    self.set_prop(old_values, 'RegistrationState', Variant('u', 4)) # unknown MM_MODEM_3GPP_REGISTRATION_STATE_UNKNOWN
+                    self.set_prop(old_values, 'PacketServiceState', Variant('u', 0)) # unknown MM_MODEM_3GPP_PACKET_SERVICE_STATE_UNKNOWN
+                elif status == "roaming":
+                    self.set_prop(old_values, 'RegistrationState', Variant('u', 5)) # MM_MODEM_3GPP_REGISTRATION_STATE_ROAMING
+                    self.set_prop(old_values, 'PacketServiceState', Variant('u', 2)) # attached MM_MODEM_3GPP_PACKET_SERVICE_STATE_ATTACHED
             else:
-                self.props['RegistrationState'] = Variant('u', 4) # unknown MM_MODEM_3GPP_REGISTRATION_STATE_UNKNOWN
+                self.set_prop(old_values, 'RegistrationState', Variant('u', 4)) # unknown MM_MODEM_3GPP_REGISTRATION_STATE_UNKNOWN
         else:
-            self.props['OperatorName'] = Variant('s', '')
-            self.props['OperatorCode'] = Variant('s', '')
-            self.props['RegistrationState'] = Variant('u', 4) # unknown MM_MODEM_3GPP_REGISTRATION_STATE_UNKNOWN
+            self.set_prop(old_values, 'OperatorName', Variant('s', ''))
+            self.set_prop(old_values, 'OperatorCode', Variant('s', ''))
+            self.set_prop(old_values, 'RegistrationState', Variant('u', 4)) # unknown MM_MODEM_3GPP_REGISTRATION_STATE_UNKNOWN
 
-        self.props['Imei'] = Variant('s', self.ofono_interface_props['org.ofono.Modem']['Serial'].value if 'Serial' in self.ofono_interface_props['org.ofono.Modem'] else '')
-        self.props['EnabledFacilityLocks'] = Variant('u', 0) # none MM_MODEM_3GPP_FACILITY_NONE
+        modem_props = self.ofono_interface_props['org.ofono.Modem']
+        self.set_prop(old_values, 'Imei', Variant('s', modem_props['Serial'].value if 'Serial' in modem_props else ''))
+        self.set_prop(old_values, 'EnabledFacilityLocks', Variant('u', 0)) # none MM_MODEM_3GPP_FACILITY_NONE
 
         try:
             contexts = await self.ofono_interfaces['org.ofono.ConnectionManager'].call_get_contexts()
@@ -115,18 +120,21 @@ class MMModem3gppInterface(ServiceInterface):
                     else:
                         self.props['InitialEpsBearerSettings'].value['allowed-auth'] = Variant('u', 0) # unknown MM_BEARER_ALLOWED_AUTH_UNKNOWN
         except Exception as e:
-            ofono2mm_print(f"Failed to set eps bearer settings: {e}", self.verbose)
+            ofono2mm_print("Failed to set eps bearer settings: %s", self.verbose, e, obj=self)
 
-        changed_props = {}
-        for prop in self.props:
-            if self.props[prop].value != old_props[prop].value:
-                changed_props.update({ prop: self.props[prop].value })
+        changed_props = {name: self.props[name].value for name, old_value in old_values.items() if self.props[name].value != old_value}
+        if changed_props:
+            self.emit_properties_changed(changed_props)
 
-        self.emit_properties_changed(changed_props)
+    def set_prop(self, old_values, name, variant):
+        # A prop can be assigned more than once per set_props run, keep the value from before the first one
+        if name not in old_values:
+            old_values[name] = self.props[name].value
+        self.props[name] = variant
 
     @method()
     async def Register(self, operator_id: 's'):
-        ofono2mm_print(f"Register with operator id '{operator_id}'", self.verbose)
+        ofono2mm_print("Register with operator id '%s'", self.verbose, operator_id, obj=self)
 
         if 'org.ofono.NetworkRegistration' in self.ofono_interface_props and 'Status' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
             if self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "unknown":
@@ -139,17 +147,17 @@ class MMModem3gppInterface(ServiceInterface):
                 try:
                     await self.ofono_interfaces['org.ofono.NetworkRegistration'].call_register()
                 except DBusError:
-                    ofono2mm_print(f"Failed to register to default operator", self.verbose)
+                    ofono2mm_print("Failed to register to default operator", self.verbose, obj=self)
             return
         try:
             ofono_operator_interface = self.ofono_client["ofono_operator"][f"{self.modem_name}/operator/{operator_id}"]['org.ofono.NetworkOperator']
             await ofono_operator_interface.call_register()
         except DBusError:
-            ofono2mm_print(f"Failed to register to operator_id {operator_id}", self.verbose)
+            ofono2mm_print("Failed to register to operator_id %s", self.verbose, operator_id, obj=self)
 
     @method()
     async def Scan(self) -> 'aa{sv}':
-        ofono2mm_print("Scanning the network", self.verbose)
+        ofono2mm_print("Scanning the network", self.verbose, obj=self)
 
         operators = []
         ofono_operators = await self.ofono_interfaces['org.ofono.NetworkRegistration'].call_scan()
@@ -262,7 +270,5 @@ class MMModem3gppInterface(ServiceInterface):
     def ofono_client_changed(self, ofono_client):
         self.ofono_client = ofono_client
 
-    def ofono_interface_changed(self, iface):
-        def ch(name, varval):
-            asyncio.create_task(self.set_props())
-        return ch
+    def ofono_interface_changed(self, iface, name, varval):
+        asyncio.create_task(self.set_props())
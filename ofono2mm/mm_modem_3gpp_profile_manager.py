@@ -9,7 +9,7 @@ class MMModem3gppProfileManagerInterface(ServiceInterface):
     def __init__(self, ofono_client, modem_name, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Modem3gpp.ProfileManager')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing 3GPP profile manager interface", verbose)
+        ofono2mm_print("Initializing 3GPP profile manager interface", verbose, obj=self)
         self.ofono_client = ofono_client
         self.verbose = verbose
         self.index_field = 'profile-id'
@@ -30,7 +30,7 @@ class MMModem3gppProfileManagerInterface(ServiceInterface):
 
     @method()
     async def List(self) -> 'aa{sv}':
-        ofono2mm_print("Returning list of profiles", self.verbose)
+        ofono2mm_print("Returning list of profiles", self.verbose, obj=self)
         properties = {}
         for key, value in self.props.items():
             if key != "roaming-allowance":
@@ -40,7 +40,7 @@ class MMModem3gppProfileManagerInterface(ServiceInterface):
 
     @method()
     async def Set(self, requested_properties: 'a{sv}') -> 'a{sv}':
-        ofono2mm_print(f"Setting profile with properties {requested_properties}", self.verbose)
+        ofono2mm_print("Setting profile with properties %s", self.verbose, requested_properties, obj=self)
 
         stored_properties = {}
         for key, value in requested_properties.items():
@@ -61,7 +61,7 @@ class MMModem3gppProfileManagerInterface(ServiceInterface):
 
     @method()
     async def Delete(self, properties: 'a{sv}'):
-        ofono2mm_print(f"Deleting profile with properties {properties}", self.verbose)
+        ofono2mm_print("Deleting profile with properties %s", self.verbose, properties, obj=self)
 
         for key in properties.items():
             if key in self.props:
@@ -69,7 +69,7 @@ class MMModem3gppProfileManagerInterface(ServiceInterface):
 
     @signal()
     def Updated(self):
-        ofono2mm_print("Signal: Updated emitted", self.verbose)
+        ofono2mm_print("Signal: Updated emitted", self.verbose, obj=self)
 
     @dbus_property(access=PropertyAccess.READ)
     def IndexField(self) -> 's':
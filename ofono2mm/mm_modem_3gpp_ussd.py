@@ -6,11 +6,22 @@ from dbus_fast import Variant, DBusError
 
 from ofono2mm.logging import ofono2mm_print
 
+# How long Respond keeps retrying while oFono says the operation is in progress, and how often at least, in seconds
+RESPOND_TIMEOUT = 50
+RESPOND_RETRY_INTERVAL = 5
+
+# oFono session states, anything else is MM_MODEM_3GPP_USSD_SESSION_STATE_UNKNOWN
+USSD_STATES = {
+    'idle': 1, # idle MM_MODEM_3GPP_USSD_SESSION_STATE_IDLE
+    'active': 2, # active MM_MODEM_3GPP_USSD_SESSION_STATE_ACTIVE
+    'user-response': 3, # user response MM_MODEM_3GPP_USSD_SESSION_STATE_USER_RESPONSE
+}
+
 class MMModem3gppUssdInterface(ServiceInterface):
     def __init__(self, modem_name, ofono_interfaces, ofono_interface_props, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Modem3gpp.Ussd')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing 3GPP USSD interface", verbose)
+        ofono2mm_print("Initializing 3GPP USSD interface", verbose, obj=self)
         self.ofono_interfaces = ofono_interfaces
         self.ofono_interface_props = ofono_interface_props
         self.verbose = verbose
@@ -19,67 +30,95 @@ class MMModem3gppUssdInterface(ServiceInterface):
             'NetworkNotification': Variant('s', ''),
             'NetworkRequest': Variant('s', ''),
         }
+        # Set whenever oFono reports a new session state, Respond waits on it
+        self.state_changed = asyncio.Event()
+        # oFono SupplementaryServices proxy, bound once instead of looked up on every call
+        self.supplementary_services = None
 
     def init_ussd(self):
-        ofono2mm_print("Initializing signals", self.verbose)
+        ofono2mm_print("Initializing signals", self.verbose, obj=self)
+
+        self.bind_supplementary_services()
+        if self.supplementary_services:
+            self.supplementary_services.on_notification_received(self.save_notification_received)
+            self.supplementary_services.on_request_received(self.save_request_received)
+            self.supplementary_services.on_property_changed(self.property_changed)
 
-        if 'org.ofono.SupplementaryServices' in self.ofono_interfaces:
-            self.ofono_interfaces['org.ofono.SupplementaryServices'].on_notification_received(self.save_notification_received)
-            self.ofono_interfaces['org.ofono.SupplementaryServices'].on_request_received(self.save_request_received)
-            self.ofono_interfaces['org.ofono.SupplementaryServices'].on_property_changed(self.property_changed)
+    def bind_supplementary_services(self):
+        self.supplementary_services = self.ofono_interfaces.get('org.ofono.SupplementaryServices')
+
+    def check_supplementary_services(self):
+        if not self.supplementary_services:
+            raise DBusError('org.freedesktop.ModemManager1.Error.Core.Unsupported', 'Cannot use USSD: supplementary services are not available')
 
     @method()
     async def Initiate(self, command: 's') -> 's':
-        ofono2mm_print(f"Initiating USSD with command {command}", self.verbose)
+        ofono2mm_print("Initiating USSD with command %s", self.verbose, command, obj=self)
 
         if self.props['State'].value in (2, 3): # 2: active, 3: user-response
             raise DBusError('org.freedesktop.ModemManager1.Error.Core.WrongState', 'Cannot initiate USSD: a session is already active')
 
-        ret = await self.ofono_interfaces['org.ofono.SupplementaryServices'].call_initiate(command)
+        self.check_supplementary_services()
+        ret = await self.supplementary_services.call_initiate(command)
         ussd_string = ret[1].value
-        ofono2mm_print(f"USSD request result: {ussd_string}", self.verbose)
+        ofono2mm_print("USSD request result: %s", self.verbose, ussd_string, obj=self)
         return ussd_string
 
     @method()
     async def Respond(self, response: 's') -> 's':
-        ofono2mm_print(f"Respond to 3GPP with command {response}", self.verbose)
+        ofono2mm_print("Respond to 3GPP with command %s", self.verbose, response, obj=self)
 
         if self.props['State'].value in (1, 2): # 1: idle, 2: active
             raise DBusError('org.freedesktop.ModemManager1.Error.Core.WrongState', 'Cannot respond USSD: no active session')
 
-        # for some reason ofono refuses to respond for 20-30 seconds after it has been initiated
-        retries = 10
-        for attempt in range(retries):
+        self.check_supplementary_services()
+
+        # for some reason ofono refuses to respond for 20-30 seconds after it has been initiated.
+        # Try again as soon as the session state moves on, or every few seconds if it doesn't.
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + RESPOND_TIMEOUT
+        while True:
+            self.state_changed.clear()
             try:
-                result = await self.ofono_interfaces['org.ofono.SupplementaryServices'].call_respond(response)
+                result = await self.supplementary_services.call_respond(response)
                 return result
-            except Exception as e:
-                ofono2mm_print(f"Attempt {attempt + 1}: Failed to respond: {e}", self.verbose)
-                if str(e) == "Operation already in progress" and attempt < retries - 1:
-                    # there must be a better way...
-                    await asyncio.sleep(5)
-                else:
+            except DBusError as e:
+                ofono2mm_print("Failed to respond: %s", self.verbose, e, obj=self)
+                remaining = deadline - loop.time()
+                if e.type != 'org.ofono.Error.InProgress' or remaining <= 0:
                     return ''
-        return ''
+            except Exception as e:
+                ofono2mm_print("Failed to respond: %s", self.verbose, e, obj=self)
+                return ''
+
+            try:
+                await asyncio.wait_for(self.state_changed.wait(), min(RESPOND_RETRY_INTERVAL, remaining))
+            except asyncio.TimeoutError:
+                pass
 
     @method()
     async def Cancel(self):
-        ofono2mm_print("Cancelling USSD request", self.verbose)
+        ofono2mm_print("Cancelling USSD request", self.verbose, obj=self)
 
+        self.check_supplementary_services()
         try:
-            await self.ofono_interfaces['org.ofono.SupplementaryServices'].call_cancel()
+            await self.supplementary_services.call_cancel()
         except DBusError as e:
-            if "Operation is not active or in progress" in str(e):
+            if e.type == 'org.ofono.Error.NotActive':
                 raise DBusError('org.freedesktop.ModemManager1.Error.Core.WrongState', 'Cannot respond USSD: no active session')
+            ofono2mm_print("Failed to cancel USSD: %s", self.verbose, e, obj=self)
         except Exception as e:
-            ofono2mm_print(f"Failed to cancel USSD: {e}", self.verbose)
+            ofono2mm_print("Failed to cancel USSD: %s", self.verbose, e, obj=self)
 
     @dbus_property(access=PropertyAccess.READ)
     async def State(self) -> 'u':
         return self.props['State'].value
 
     def save_notification_received(self, message):
-        ofono2mm_print(f"Save notification with message {message}", self.verbose)
+        ofono2mm_print("Save notification with message %s", self.verbose, message, obj=self)
+        if self.props['NetworkNotification'].value == message:
+            return
+
         self.props['NetworkNotification'] = Variant('s', message)
         self.emit_properties_changed({'NetworkNotification': self.props['NetworkNotification'].value})
 
@@ -88,7 +127,10 @@ class MMModem3gppUssdInterface(ServiceInterface):
         return self.props['NetworkNotification'].value
 
     def save_request_received(self, message):
-        ofono2mm_print(f"Save request with message {message}", self.verbose)
+        ofono2mm_print("Save request with message %s", self.verbose, message, obj=self)
+        if self.props['NetworkRequest'].value == message:
+            return
+
         self.props['NetworkRequest'] = Variant('s', message)
         self.emit_properties_changed({'NetworkRequest': self.props['NetworkRequest'].value})
 
@@ -97,15 +139,8 @@ class MMModem3gppUssdInterface(ServiceInterface):
         return self.props['NetworkRequest'].value
 
     async def property_changed(self, property, value):
-        ofono2mm_print(f"Property changed: {property}: {value.value}", self.verbose)
+        ofono2mm_print("Property changed: %s: %s", self.verbose, property, value.value, obj=self)
         if property == "State":
-            if value.value == 'idle':
-                state = 1 # idle MM_MODEM_3GPP_USSD_SESSION_STATE_IDLE
-            elif value.value == "active":
-                state = 2 # active MM_MODEM_3GPP_USSD_SESSION_STATE_ACTIVE
-            elif value.value == "user-response":
-                state = 3 # user response MM_MODEM_3GPP_USSD_SESSION_STATE_USER_RESPONSE
-            else:
-                state = 0 # unknown MM_MODEM_3GPP_USSD_SESSION_STATE_UNKNOWN
-            self.props['State'] = Variant('u', state)
+            self.props['State'] = Variant('u', USSD_STATES.get(value.value, 0))
+            self.state_changed.set()
             self.emit_properties_changed({'State': self.props['State'].value})
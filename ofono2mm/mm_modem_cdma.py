@@ -8,7 +8,7 @@ class MMModemCDMAInterface(ServiceInterface):
     def __init__(self, modem_name, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.ModemCdma')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing CDMA interface", verbose)
+        ofono2mm_print("Initializing CDMA interface", verbose, obj=self)
         self.verbose = verbose
         self.props = {
             'ActivationState': Variant('u', 0), # hardcoded dummy value unknown MM_MODEM_CDMA_ACTIVATION_STATE_UNKNOWN
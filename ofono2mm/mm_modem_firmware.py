@@ -4,37 +4,39 @@ from dbus_fast import Variant, DBusError
 
 from ofono2mm.logging import ofono2mm_print
 
+# The same for every firmware version, shared by every UpdateSettings we build
+DEVICE_IDS = Variant('as', ['OFONO-BINDER-PLUGIN'])
+
 class MMModemFirmwareInterface(ServiceInterface):
     def __init__(self, mm_modem, modem_name, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Firmware')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing Firmware interface", verbose)
+        ofono2mm_print("Initializing Firmware interface", verbose, obj=self)
         self.mm_modem = mm_modem
         self.verbose = verbose
 
+        self.hardware_revision = Variant('s', '')
         self.props = {
             'UpdateSettings': Variant('(ua{sv})', [1, {
-                'device-ids': Variant('as', ['OFONO-BINDER-PLUGIN']),
-                'version': Variant('s', '')
+                'device-ids': DEVICE_IDS,
+                'version': self.hardware_revision
             }])
         }
 
     def set_props(self):
-        ofono2mm_print("Setting properties", self.verbose)
+        ofono2mm_print("Setting properties", self.verbose, obj=self)
 
-        old_props = self.props.copy()
-
-        self.hardware_revision = self.mm_modem.props.get('HardwareRevision', Variant('s', ''))
-        self.props = {
-            'UpdateSettings': Variant('(ua{sv})', [1, {
-                'device-ids': Variant('as', ['OFONO-BINDER-PLUGIN']),
-                'version': self.hardware_revision
-            }])
-        }
+        # UpdateSettings only depends on the hardware revision, leave it alone unless that changed
+        hardware_revision = self.mm_modem.props.get('HardwareRevision', Variant('s', ''))
+        if hardware_revision.value == self.hardware_revision.value:
+            return
 
-        for prop in self.props:
-            if self.props[prop].value != old_props[prop].value:
-                self.emit_properties_changed({prop: self.props[prop].value})
+        self.hardware_revision = hardware_revision
+        self.props['UpdateSettings'] = Variant('(ua{sv})', [1, {
+            'device-ids': DEVICE_IDS,
+            'version': self.hardware_revision
+        }])
+        self.emit_properties_changed({'UpdateSettings': self.props['UpdateSettings'].value})
 
     @dbus_property(access=PropertyAccess.READ)
     def UpdateSettings(self) -> '(ua{sv})':
@@ -42,7 +44,7 @@ class MMModemFirmwareInterface(ServiceInterface):
 
     @method()
     def List(self) -> 'saa{sv}':
-        ofono2mm_print("Returning list of installed firmware", self.verbose)
+        ofono2mm_print("Returning list of installed firmware", self.verbose, obj=self)
 
         self.set_props()
         selected = self.hardware_revision.value
@@ -1,20 +1,24 @@
 import multiprocessing
+from queue import Empty
 from functools import partial
-from datetime import datetime
-from os import seteuid, getuid, chown, makedirs
+from datetime import datetime, timezone
+from time import monotonic
+from os import seteuid, getuid, chown, fchown, makedirs, replace, unlink
 from os.path import join
 import asyncio
 
-import gi
-gi.require_version('Geoclue', '2.0')
-from gi.repository import Gio, GLib, GObject, Geoclue
-
 from dbus_fast.service import ServiceInterface, method, dbus_property
 from dbus_fast.constants import PropertyAccess
 from dbus_fast import Variant, DBusError
 
 from ofono2mm.logging import ofono2mm_print
 
+# How long a Geoclue fix is handed out again when no GPS refresh rate is set, in seconds
+DEFAULT_FIX_MAX_AGE = 5
+
+# GLib and Geoclue only get imported in the geoclue process, most clients never ask for a location
+GLib = None
+Geoclue = None
 simple = None
 main_loop = None
 location_data = None
@@ -57,7 +61,7 @@ def on_timeout(user_data):
                     client.set_property('active', False)
                     client = None
             except Exception as e:
-                ofono2mm_print(f"Failed to stop geoclue client: {e}", verbose)
+                ofono2mm_print("Failed to stop geoclue client: %s", verbose, e)
             simple = None
         location_data = None
     finally:
@@ -65,11 +69,21 @@ def on_timeout(user_data):
             GLib.idle_add(main_loop.quit)
     return False
 
+def _import_geoclue():
+    global GLib, Geoclue
+    if Geoclue is not None:
+        return
+
+    import gi
+    gi.require_version('Geoclue', '2.0')
+    from gi.repository import GLib, Geoclue
+
 def _geoclue_process_func(queue):
     global simple, main_loop, location_data, verbose
 
     seteuid(32011)
     try:
+        _import_geoclue()
         timeout_id = GLib.timeout_add_seconds(30, on_timeout, None)
 
         Geoclue.Simple.new_with_thresholds("ModemManager",
@@ -87,7 +101,7 @@ def _geoclue_process_func(queue):
                     client.set_property('active', False)
                     client = None
             except Exception as e:
-                ofono2mm_print(f"Failed to stop geoclue client: {e}", verbose)
+                ofono2mm_print("Failed to stop geoclue client: %s", verbose, e)
             simple = None
 
         if location_data:
@@ -101,20 +115,30 @@ def _geoclue_process_func(queue):
             seteuid(0)
 
 async def async_geoclue_get_location():
+    loop = asyncio.get_running_loop()
     queue = multiprocessing.Queue()
 
     process = multiprocessing.Process(target=_geoclue_process_func, args=(queue,))
     process.start()
 
-    while process.is_alive():
-        await asyncio.sleep(0.1)
+    # The sentinel becomes readable once the process is gone, wait for that instead of polling is_alive()
+    exited = loop.create_future()
+    def on_exit():
+        if not exited.done():
+            exited.set_result(None)
+
+    loop.add_reader(process.sentinel, on_exit)
+    try:
+        await exited
+    finally:
+        loop.remove_reader(process.sentinel)
 
     try:
         status, data = queue.get_nowait()
         if status == 'error':
             raise Exception(data)
         return data
-    except multiprocessing.queues.Empty:
+    except Empty:
         raise Exception("No result received from Geoclue process")
     finally:
         if process.is_alive():
@@ -126,17 +150,18 @@ class MMModemLocationInterface(ServiceInterface):
     def __init__(self, modem_name, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Location')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing Location interface", verbose)
+        ofono2mm_print("Initializing Location interface", verbose, obj=self)
         self.verbose = verbose
-        utc_time = datetime.utcnow().isoformat()
         self.config_dir = '/etc/geoclue/conf.d'
         self.config_path = join(self.config_dir, 'supl.conf')
         self.owner_uid = 32011
         self.owner_gid = 32011
+        # When we last got a fix from Geoclue, clients poll GetLocation way more often than the location changes
+        self.last_fix_time = None
 
         self.location = {
             2: Variant('a{sv}', { # 2 is MM_MODEM_LOCATION_SOURCE_GPS_RAW
-                'utc-time': Variant('s', utc_time),
+                'utc-time': Variant('s', ''), # no fix yet, GetLocation stamps the first one
                 'latitude': Variant('d', 0),
                 'longitude': Variant('d', 0),
                 'altitude': Variant('d', 0)
@@ -155,37 +180,43 @@ class MMModemLocationInterface(ServiceInterface):
 
     @method()
     def Setup(self, sources: 'u', signal_location: 'b') -> None:
-        ofono2mm_print(f"Setup location with source flag {sources} and signal location {signal_location}", self.verbose)
+        ofono2mm_print("Setup location with source flag %s and signal location %s", self.verbose, sources, signal_location, obj=self)
+        if sources != self.props['Enabled'].value:
+            self.last_fix_time = None
         self.props['Enabled'] = Variant('u', sources)
         self.props['SignalsLocation'] = Variant('b', signal_location)
-        self.emit_properties_changed({'Enabled': self.props['Enabled'].value})
-        self.emit_properties_changed({'SignalsLocation': self.props['SignalsLocation'].value})
+        self.emit_properties_changed({'Enabled': sources, 'SignalsLocation': signal_location})
 
     @method()
     async def GetLocation(self) -> 'a{uv}':
-        ofono2mm_print("Returning current location", self.verbose)
+        ofono2mm_print("Returning current location", self.verbose, obj=self)
+
+        max_age = self.props['GpsRefreshRate'].value or DEFAULT_FIX_MAX_AGE
+        if self.last_fix_time is not None and monotonic() - self.last_fix_time < max_age:
+            return self.location
 
         global verbose
         verbose = self.verbose
 
         try:
             latitude, longitude, altitude = await async_geoclue_get_location()
+            self.last_fix_time = monotonic()
         except Exception as e:
-            ofono2mm_print(f"Failed to get location from geoclue: {e}", self.verbose)
+            ofono2mm_print("Failed to get location from geoclue: %s", self.verbose, e, obj=self)
             longitude = 0
             latitude = 0
             altitude = 0
 
-        utc_time = datetime.utcnow().isoformat()
-
-        ofono2mm_print(f"Location is longitude: {longitude}, latitude: {latitude}, altitude: {altitude}", self.verbose)
+        ofono2mm_print("Location is longitude: %s, latitude: %s, altitude: %s", self.verbose, longitude, latitude, altitude, obj=self)
 
-        location_variant = self.location[2].value
-        location_variant['utc-time'] = Variant('s', utc_time)
-        location_variant['latitude'] = Variant('d', latitude)
-        location_variant['longitude'] = Variant('d', longitude)
-        location_variant['altitude'] = Variant('d', altitude)
+        # Build a new dict per fix, the previous one may still be held by whoever got it last time.
+        # A stationary device keeps getting the same fix, reuse the coordinate Variants that didn't change.
+        old_location = self.location[2].value
+        new_location = {'utc-time': Variant('s', datetime.now(timezone.utc).isoformat())}
+        for key, value in (('latitude', latitude), ('longitude', longitude), ('altitude', altitude)):
+            new_location[key] = old_location[key] if old_location[key].value == value else Variant('d', value)
 
+        self.location = {2: Variant('a{sv}', new_location)} # 2 is MM_MODEM_LOCATION_SOURCE_GPS_RAW
         return self.location
 
     @method()
@@ -199,10 +230,22 @@ class MMModemLocationInterface(ServiceInterface):
 supl-enabled=true
 supl-server={supl}
 """
+        # Write next to it and rename over it so geoclue never reads a half written file
+        tmp_path = self.config_path + '.tmp'
         try:
-            with open(self.config_path, 'w') as config_file:
+            with open(tmp_path, 'w') as config_file:
                 config_file.write(config_content)
-        except IOError as e:
+                # The rename would leave the file owned by us, hand it to geoclue like the directory but don't fail over it
+                try:
+                    fchown(config_file.fileno(), self.owner_uid, self.owner_gid)
+                except OSError as e:
+                    ofono2mm_print("Failed to change ownership of SUPL server configuration: %s", self.verbose, e, obj=self)
+            replace(tmp_path, self.config_path)
+        except OSError as e:
+            try:
+                unlink(tmp_path)
+            except FileNotFoundError:
+                pass
             raise DBusError('org.freedesktop.ModemManager1.Error.Core.Failed', f'Failed to write SUPL server configuration: {e}')
 
         try:
@@ -219,7 +262,7 @@ supl-server={supl}
 
     @method()
     def SetGpsRefreshRate(self, rate: 'u') -> None:
-        ofono2mm_print(f"Setting GPS refresh rate to {rate}", self.verbose)
+        ofono2mm_print("Setting GPS refresh rate to %s", self.verbose, rate, obj=self)
         self.props['GpsRefreshRate'] = Variant('u', rate)
         self.emit_properties_changed({'GpsRefreshRate': self.props['GpsRefreshRate'].value})
 
@@ -12,7 +12,7 @@ class MMModemMessagingInterface(ServiceInterface):
     def __init__(self, bus, modem_name, ofono_interfaces, ofono_interface_props, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Messaging')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing Messaging interface", verbose)
+        ofono2mm_print("Initializing Messaging interface", verbose, obj=self)
         self.bus = bus
         self.ofono_interfaces = ofono_interfaces
         self.ofono_interface_props = ofono_interface_props
@@ -24,7 +24,7 @@ class MMModemMessagingInterface(ServiceInterface):
         }
 
     def set_props(self):
-        ofono2mm_print("Setting properties", self.verbose)
+        ofono2mm_print("Setting properties", self.verbose, obj=self)
 
         old_props = self.props
 
@@ -33,14 +33,14 @@ class MMModemMessagingInterface(ServiceInterface):
                 self.emit_properties_changed({prop: self.props[prop].value})
 
     def init_messages(self):
-        ofono2mm_print("Initializing signals", self.verbose)
+        ofono2mm_print("Initializing signals", self.verbose, obj=self)
 
         if 'org.ofono.MessageManager' in self.ofono_interfaces:
             self.ofono_interfaces['org.ofono.MessageManager'].on_incoming_message(self.add_incoming_message)
             self.ofono_interfaces['org.ofono.MessageManager'].on_immediate_message(self.add_incoming_message)
 
     def add_incoming_message(self, msg, props):
-        ofono2mm_print(f"Add incoming message {msg} with properties {props}", self.verbose)
+        ofono2mm_print("Add incoming message %s with properties %s", self.verbose, msg, props, obj=self)
 
         global message_i
         mm_sms_interface = MMSmsInterface(self.verbose)
@@ -61,12 +61,12 @@ class MMModemMessagingInterface(ServiceInterface):
 
     @method()
     async def List(self) -> 'ao':
-        ofono2mm_print("Returning list of messages", self.verbose)
+        ofono2mm_print("Returning list of messages", self.verbose, obj=self)
         return self.props['Messages'].value
 
     @method()
     async def Delete(self, path: 'o'):
-        ofono2mm_print(f"Delete message with object path {path}", self.verbose)
+        ofono2mm_print("Delete message with object path %s", self.verbose, path, obj=self)
 
         if path in self.props['Messages'].value:
             self.props['Messages'].value.remove(path)
@@ -76,7 +76,7 @@ class MMModemMessagingInterface(ServiceInterface):
 
     @method()
     async def Create(self, properties: 'a{sv}') -> 'o':
-        ofono2mm_print(f"Create message with properties {properties}", self.verbose)
+        ofono2mm_print("Create message with properties %s", self.verbose, properties, obj=self)
 
         global message_i
         if 'number' not in properties or 'text' not in properties:
@@ -98,18 +98,18 @@ class MMModemMessagingInterface(ServiceInterface):
 
         if 'org.ofono.MessageManager' in self.ofono_interfaces:
             ofono_sms_object_path  = await self.ofono_interfaces['org.ofono.MessageManager'].call_send_message(properties['number'].value, properties['text'].value)
-            ofono2mm_print(f"ofono_sms_object_path is {ofono_sms_object_path}", self.verbose)
+            ofono2mm_print("ofono_sms_object_path is %s", self.verbose, ofono_sms_object_path, obj=self)
 
         return object_path
 
     @signal()
     def Added(self, path, received) -> 'ob':
-        ofono2mm_print(f"Signal: Message added at object path {path} and received state {received}", self.verbose)
+        ofono2mm_print("Signal: Message added at object path %s and received state %s", self.verbose, path, received, obj=self)
         return [path, received]
 
     @signal()
     def Deleted(self, path) -> 'o':
-        ofono2mm_print(f"Signal: Message deleted at object path {path}", self.verbose)
+        ofono2mm_print("Signal: Message deleted at object path %s", self.verbose, path, obj=self)
         return path
 
     @dbus_property(access=PropertyAccess.READ)
@@ -130,7 +130,5 @@ class MMModemMessagingInterface(ServiceInterface):
     def ofono_client_changed(self, ofono_client):
         self.ofono_client = ofono_client
 
-    def ofono_interface_changed(self, iface):
-        def ch(name, varval):
-            self.set_props()
-        return ch
+    def ofono_interface_changed(self, iface, name, varval):
+        self.set_props()
@@ -8,7 +8,7 @@ class MMModemOmaInterface(ServiceInterface):
     def __init__(self, modem_name, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Oma')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing OMA interface", verbose)
+        ofono2mm_print("Initializing OMA interface", verbose, obj=self)
         self.verbose = verbose
         self.props = {
             'Features': Variant('u', 0),
@@ -35,7 +35,7 @@ class MMModemOmaInterface(ServiceInterface):
 
     @signal()
     def SessionStateChanged(self, old_session_state: 'i', new_session_state: 'i', session_state_failed_reason: 'u'):
-        ofono2mm_print(f"Signal: Session state changed with old sttate {old_session_state} and new state {new_session_state}. failed reason (if any): {session_state_failed_reason}", self.verbose)
+        ofono2mm_print("Signal: Session state changed with old sttate %s and new state %s. failed reason (if any): %s", self.verbose, old_session_state, new_session_state, session_state_failed_reason, obj=self)
 
     @dbus_property(access=PropertyAccess.READ)
     def Features(self) -> 'u':
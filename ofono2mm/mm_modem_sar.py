@@ -8,7 +8,7 @@ class MMModemSarInterface(ServiceInterface):
     def __init__(self, modem_name, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Sar')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing SAR interface", verbose)
+        ofono2mm_print("Initializing SAR interface", verbose, obj=self)
         self.verbose = verbose
         self.props = {
             'State': Variant('b', False),
@@ -10,7 +10,7 @@ class MMModemSignalInterface(ServiceInterface):
     def __init__(self, modem_name, ofono_interfaces, ofono_interface_props, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Signal')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing Signal interface", verbose)
+        ofono2mm_print("Initializing Signal interface", verbose, obj=self)
         self.ofono_interfaces = ofono_interfaces
         self.ofono_interface_props = ofono_interface_props
         self.is_busy = False
@@ -45,19 +45,20 @@ class MMModemSignalInterface(ServiceInterface):
         }
 
     async def set_props(self):
-        ofono2mm_print("Setting properties", self.verbose)
+        ofono2mm_print("Setting properties", self.verbose, obj=self)
 
 
-        if 'org.ofono.SimManager' in self.ofono_interface_props and 'Present' in self.ofono_interface_props['org.ofono.SimManager'].props:
-            if not self.ofono_interface_props['org.ofono.SimManager']['Present'].value:
-                ofono2mm_print("SIM is not present. no need to set signal props", self.verbose)
+        sim_props = self.ofono_interface_props['org.ofono.SimManager'] if 'org.ofono.SimManager' in self.ofono_interface_props else None
+        if sim_props is not None and 'Present' in sim_props:
+            if not sim_props['Present'].value:
+                ofono2mm_print("SIM is not present. no need to set signal props", self.verbose, obj=self)
                 return
         else:
-            ofono2mm_print("SIM manager is not up yet. cannot set signal props", self.verbose)
+            ofono2mm_print("SIM manager is not up yet. cannot set signal props", self.verbose, obj=self)
             return
 
-        if not (not 'PinRequired' in self.ofono_interface_props['org.ofono.SimManager'] or self.ofono_interface_props['org.ofono.SimManager']['PinRequired'].value == 'none'):
-            ofono2mm_print("SIM is still locked and/or not ready. cannot set signal props", self.verbose)
+        if not (not 'PinRequired' in sim_props or sim_props['PinRequired'].value == 'none'):
+            ofono2mm_print("SIM is still locked and/or not ready. cannot set signal props", self.verbose, obj=self)
             return
 
         if 'org.ofono.NetworkMonitor' in self.ofono_interfaces and not self.is_busy:
@@ -68,7 +69,7 @@ class MMModemSignalInterface(ServiceInterface):
             try:
                 cellinfo = await self.ofono_interfaces['org.ofono.NetworkMonitor'].call_get_serving_cell_information()
             except Exception as e:
-                ofono2mm_print(f"Failed to get cell info from NetworkMonitor: {e}", self.verbose)
+                ofono2mm_print("Failed to get cell info from NetworkMonitor: %s", self.verbose, e, obj=self)
             finally:
                 self.is_busy = False
 
@@ -86,13 +87,13 @@ class MMModemSignalInterface(ServiceInterface):
                 if cellinfo['Technology'].value == 'gsm':
                     self.props['Gsm'].value['error-rate'] = Variant('d', cellinfo['BitErrorRate'].value if "BitErrorRate" in cellinfo else 0)
 
-            for prop in self.props:
-                if self.props[prop].value != old_props[prop].value:
-                    self.emit_properties_changed({prop: self.props[prop].value})
+            changed_props = {name: prop.value for name, prop in self.props.items() if prop is not old_props[name] and prop.value != old_props[name].value}
+            if changed_props:
+                self.emit_properties_changed(changed_props)
 
     @method()
     async def Setup(self, rate: 'u'):
-        ofono2mm_print(f"Setup with rate {rate}", self.verbose)
+        ofono2mm_print("Setup with rate %s", self.verbose, rate, obj=self)
         self.props['Rate'] = Variant('u', rate)
         self.emit_properties_changed({'Rate': self.props['Rate'].value})
 
@@ -134,7 +135,5 @@ class MMModemSignalInterface(ServiceInterface):
     def ofono_client_changed(self, ofono_client):
         self.ofono_client = ofono_client
 
-    def ofono_interface_changed(self, iface):
-        def ch(name, varval):
-            asyncio.create_task(self.set_props())
-        return ch
+    def ofono_interface_changed(self, iface, name, varval):
+        asyncio.create_task(self.set_props())
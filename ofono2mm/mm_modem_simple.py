@@ -14,15 +14,91 @@ from ofono2mm.utils import save_setting, read_setting
 from dbus import SystemBus, Interface
 from dbus.mainloop.glib import DBusGMainLoop
 
+# oFono properties set_props reads
+SET_PROPS_DEPENDENCIES = {
+    'org.ofono.SimManager': ('Present', 'PinRequired'),
+    'org.ofono.NetworkRegistration': ('Name', 'MobileCountryCode', 'MobileNetworkCode', 'Strength', 'Status', 'Technology'),
+    'org.ofono.RadioSettings': ('AvailableTechnologies',),
+}
+
+# How long oFono property changes are collected before set_props runs for them, in seconds
+SET_PROPS_DELAY = 0.05
+
+# MMModemBand values for each oFono radio technology, in the order they are reported
+TECHNOLOGY_BANDS = {
+    'gsm': (1, 2, 3, 4, 14, 15, 16, 17, 18, 19, 20),
+    'umts': (5, 6, 7, 8, 9, 10, 11, 12, 13, 210, 211, 212, 213, 214, 219, 220, 221, 222, 225, 226, 232),
+    'lte': (31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 47, 48, 49, 50, 51, 52, 53, 54, 55, 56, 57, 58, 59, 60, 61, 62, 63, 64, 65, 66, 67, 68, 69, 70, 71, 72, 73, 74, 75, 76, 77, 78, 79, 80, 81, 82, 83, 84, 85, 86, 87, 88, 89, 90, 91, 92, 93, 94, 95, 96, 97, 98, 99, 100, 101, 115),
+    'nr': (301, 302, 303, 305, 307, 308, 312, 313, 314, 318, 320, 325, 326, 328, 329, 330, 334, 338, 339, 340, 341, 348, 350, 351, 353, 365, 366, 370, 371, 374, 375, 376, 377, 378, 379, 380, 381, 382, 383, 384, 386, 389, 390, 391, 392, 393, 394, 395, 557, 558, 560, 561),
+}
+
+# current-bands for every combination of the technologies above, bit n set when the nth one is available
+BANDS_BY_TECHNOLOGIES = {
+    technologies: Variant('au', [band for bit, bands in enumerate(TECHNOLOGY_BANDS.values()) if technologies & 1 << bit for band in bands])
+    for technologies in range(1 << len(TECHNOLOGY_BANDS))
+}
+
+# MMModemState for oFono NetworkRegistration Status values, the rest is MM_MODEM_STATE_ENABLED
+MODEM_STATES = {
+    'registered': 9, # registered MM_MODEM_STATE_REGISTERED
+    'roaming': 9, # registered MM_MODEM_STATE_REGISTERED
+    'searching': 8, # searching MM_MODEM_STATE_SEARCHING
+}
+
+# MMModem3gppRegistrationState for oFono NetworkRegistration Status values
+REGISTRATION_STATES = {
+    'unregistered': 0, # idle MM_MODEM_3GPP_REGISTRATION_STATE_IDLE
+    'registered': 1, # home MM_MODEM_3GPP_REGISTRATION_STATE_HOME
+    'searching': 2, # searching MM_MODEM_3GPP_REGISTRATION_STATE_SEARCHING
+    'denied': 3, # denied MM_MODEM_3GPP_REGISTRATION_STATE_DENIED
+    'unknown': 4, # unknown MM_MODEM_3GPP_REGISTRATION_STATE_UNKNOWN
+    'roaming': 5, # roaming MM_MODEM_3GPP_REGISTRATION_STATE_ROAMING
+}
+
+# MMModemAccessTechnology for oFono NetworkRegistration Technology values, the rest is unknown
+ACCESS_TECHNOLOGIES = {
+    'nr': 1 << 15, # MM_MODEM_ACCESS_TECHNOLOGY_5GNR
+    'lte': 1 << 14, # MM_MODEM_ACCESS_TECHNOLOGY_LTE
+    'hspap': 1 << 9, # MM_MODEM_ACCESS_TECHNOLOGY_HSPA_PLUS
+    'hspa': 1 << 8, # MM_MODEM_ACCESS_TECHNOLOGY_HSPA
+    'hsupa': 1 << 7, # MM_MODEM_ACCESS_TECHNOLOGY_HSUPA
+    'hsdpa': 1 << 6, # MM_MODEM_ACCESS_TECHNOLOGY_HSDPA
+    'umts': 1 << 5, # MM_MODEM_ACCESS_TECHNOLOGY_UMTS
+    'edge': 1 << 4, # MM_MODEM_ACCESS_TECHNOLOGY_EDGE
+    'gprs': 1 << 3, # MM_MODEM_ACCESS_TECHNOLOGY_GPRS
+    'gsm': 1 << 1, # MM_MODEM_ACCESS_TECHNOLOGY_GSM
+}
+
+# Shared Variants for the values set_props hands out over and over, they are never modified in place
+UINT_VARIANTS = {value: Variant('u', value) for value in range(10)} # MMModemState, MMModem3gppRegistrationState and unknown access technology
+EMPTY_STRING = Variant('s', '')
+# Recent signal quality for each strength oFono can report, 0 to 100 percent
+SIGNAL_QUALITIES = {strength: Variant('(ub)', [strength, True]) for strength in range(101)}
+NO_SIGNAL = SIGNAL_QUALITIES[0]
+ACCESS_TECHNOLOGY_VARIANTS = {technology: Variant('u', bit) for technology, bit in ACCESS_TECHNOLOGIES.items()}
+
+# What set_props reports while there is no NetworkRegistration
+NO_NETWORK_PROPS = {
+    'm3gpp-operator-name': EMPTY_STRING,
+    'm3gpp-operator-code': EMPTY_STRING,
+    'signal-quality': NO_SIGNAL,
+    'state': UINT_VARIANTS[7], # enabled MM_MODEM_STATE_ENABLED
+}
+
+def signal_quality(strength):
+    variant = SIGNAL_QUALITIES.get(strength)
+    return variant if variant is not None else Variant('(ub)', [strength, True])
+
 class MMModemSimpleInterface(ServiceInterface):
     def __init__(self, mm_modem, modem_name, ofono_interfaces, ofono_interface_props, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Simple')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing Simple interface", verbose)
+        ofono2mm_print("Initializing Simple interface", verbose, obj=self)
         self.mm_modem = mm_modem
         self.ofono_interfaces = ofono_interfaces
         self.ofono_interface_props = ofono_interface_props
         self.verbose = verbose
+        # Simple has no D-Bus properties, these are only handed out by GetStatus
         self.props = {
              'state': Variant('u', 7), # on runtime enabled MM_MODEM_STATE_ENABLED
              'signal-quality': Variant('(ub)', [0, True]),
@@ -36,164 +112,142 @@ class MMModemSimpleInterface(ServiceInterface):
              'cdma-sid': Variant('u', 0),
              'cdma-nid': Variant('u', 0)
         }
+        self.set_props_handle = None
+        self.last_set_props_inputs = None
+        # NetworkManager proxies, set up the first time we talk to NetworkManager
+        self.nm_settings = None
+        self.nm_properties = None
+        # NetworkManager connection we last found for each SIM ID
+        self.nm_connections = {}
+        # The NetworkManager sequence runs in a worker thread, one at a time or two callers could both add a profile for the SIM
+        self.nm_lock = asyncio.Lock()
+
+    def set_prop_value(self, name, signature, value):
+        # Most updates don't change anything, keep the Variant we already have then
+        if self.props[name].value != value:
+            self.props[name] = Variant(signature, value)
+
+    def set_props_inputs(self):
+        # Everything set_props reads, if none of it changed running it again would change nothing either
+        inputs = []
+        for iface, names in SET_PROPS_DEPENDENCIES.items():
+            if iface in self.ofono_interface_props:
+                # Straight from the plain dict, this runs for every change and every GetStatus.
+                # The Variants get replaced rather than modified when a value changes, so comparing them is enough.
+                props = self.ofono_interface_props[iface].props
+                inputs.append(tuple(props.get(name) for name in names))
+            else:
+                inputs.append(None)
+        return inputs
 
     def set_props(self):
-        ofono2mm_print("Setting properties", self.verbose)
+        inputs = self.set_props_inputs()
+        if inputs == self.last_set_props_inputs:
+            return
+        self.last_set_props_inputs = inputs
+
+        ofono2mm_print("Setting properties", self.verbose, obj=self)
 
-        old_props = self.props
+        sim_props = self.ofono_interface_props['org.ofono.SimManager'] if 'org.ofono.SimManager' in self.ofono_interface_props else None
+        netreg_props = self.ofono_interface_props['org.ofono.NetworkRegistration'] if 'org.ofono.NetworkRegistration' in self.ofono_interface_props else None
 
-        if 'org.ofono.SimManager' in self.ofono_interface_props and 'Present' in self.ofono_interface_props['org.ofono.SimManager'].props:
-            if not self.ofono_interface_props['org.ofono.SimManager']['Present'].value:
-                ofono2mm_print("SIM is not present. no need to set simple props", self.verbose)
+        if sim_props is not None and 'Present' in sim_props:
+            if not sim_props['Present'].value:
+                ofono2mm_print("SIM is not present. no need to set simple props", self.verbose, obj=self)
                 return
         else:
-            ofono2mm_print("SIM manager is not up yet. cannot set simple props", self.verbose)
+            ofono2mm_print("SIM manager is not up yet. cannot set simple props", self.verbose, obj=self)
             return
 
-        if not (not 'PinRequired' in self.ofono_interface_props['org.ofono.SimManager'] or self.ofono_interface_props['org.ofono.SimManager']['PinRequired'].value == 'none'):
-            ofono2mm_print("SIM is still locked and/or not ready. cannot set simple props", self.verbose)
+        if not (not 'PinRequired' in sim_props or sim_props['PinRequired'].value == 'none'):
+            ofono2mm_print("SIM is still locked and/or not ready. cannot set simple props", self.verbose, obj=self)
             return
 
-        if 'org.ofono.NetworkRegistration' in self.ofono_interface_props:
-            self.props['m3gpp-operator-name'] = Variant('s', self.ofono_interface_props['org.ofono.NetworkRegistration']['Name'].value if "Name" in self.ofono_interface_props['org.ofono.NetworkRegistration'] else '')
+        if netreg_props is not None:
+            self.set_prop_value('m3gpp-operator-name', 's', netreg_props['Name'].value if "Name" in netreg_props else '')
 
             MCC = ''
-            if 'MobileCountryCode' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                MCC = self.ofono_interface_props['org.ofono.NetworkRegistration']['MobileCountryCode'].value
+            if 'MobileCountryCode' in netreg_props:
+                MCC = netreg_props['MobileCountryCode'].value
 
             MNC = ''
-            if 'MobileNetworkCode' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                MNC = self.ofono_interface_props['org.ofono.NetworkRegistration']['MobileNetworkCode'].value
+            if 'MobileNetworkCode' in netreg_props:
+                MNC = netreg_props['MobileNetworkCode'].value
 
-            self.props['m3gpp-operator-code'] = Variant('s', f'{MCC}{MNC}')
+            self.set_prop_value('m3gpp-operator-code', 's', f'{MCC}{MNC}')
 
-            if 'Strength' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                self.props['signal-quality'] = Variant('(ub)', [self.ofono_interface_props['org.ofono.NetworkRegistration']['Strength'].value, True])
+            if 'Strength' in netreg_props:
+                self.props['signal-quality'] = signal_quality(netreg_props['Strength'].value)
 
-            if 'Status' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                if self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == 'registered' or self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == 'roaming':
-                    self.props['state'] = Variant('u', 9) # registered MM_MODEM_STATE_REGISTERED
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == 'searching':
-                    self.props['state'] = Variant('u', 8) # searching MM_MODEM_STATE_SEARCHING
-                else:
-                    self.props['state'] = Variant('u', 7) # enabled MM_MODEM_STATE_ENABLED
-
-            if 'Status' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                if self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "unregistered":
-                    self.props['m3gpp-registration-state'] = Variant('u', 0) # idle MM_MODEM_3GPP_REGISTRATION_STATE_IDLE
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "registered":
-                    self.props['m3gpp-registration-state'] = Variant('u', 1) # home MM_MODEM_3GPP_REGISTRATION_STATE_HOME
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "searching":
-                    self.props['m3gpp-registration-state'] = Variant('u', 2) # searching MM_MODEM_3GPP_REGISTRATION_STATE_SEARCHING
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "denied":
-                    self.props['m3gpp-registration-state'] = Variant('u', 3) # denied MM_MODEM_3GPP_REGISTRATION_STATE_DENIED
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "unknown":
-                    self.props['m3gpp-registration-state'] = Variant('u', 4) # unknown MM_MODEM_3GPP_REGISTRATION_STATE_UNKNOWN
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']['Status'].value == "roaming":
-                    self.props['m3gpp-registration-state'] = Variant('u', 5) # roaming MM_MODEM_3GPP_REGISTRATION_STATE_ROAMING
+            status = netreg_props['Status'].value if 'Status' in netreg_props else None
+            if status is not None:
+                self.props['state'] = UINT_VARIANTS[MODEM_STATES.get(status, 7)] # enabled MM_MODEM_STATE_ENABLED otherwise
+                self.props['m3gpp-registration-state'] = UINT_VARIANTS[REGISTRATION_STATES.get(status, 4)] # unknown MM_MODEM_3GPP_REGISTRATION_STATE_UNKNOWN otherwise
             else:
-                self.props['m3gpp-registration-state'] = Variant('u', 4) # unknown MM_MODEM_3GPP_REGISTRATION_STATE_UNKNOWN
+                self.props['m3gpp-registration-state'] = UINT_VARIANTS[4] # unknown MM_MODEM_3GPP_REGISTRATION_STATE_UNKNOWN
         else:
-            self.props['m3gpp-operator-name'] = Variant('s', '')
-            self.props['m3gpp-operator-code'] = Variant('s', '')
-            self.props['signal-quality'] = Variant('(ub)', [0, True])
-            self.props['state'] = Variant('u', 7) # enabled MM_MODEM_STATE_ENABLED
-
-        if 'org.ofono.NetworkRegistration' in self.ofono_interface_props and self.props['state'].value >= 7:
-            if "Technology" in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                current_tech = 0
-                if self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "nr":
-                    current_tech |= 1 << 15 # network is 5g MM_MODEM_ACCESS_TECHNOLOGY_5GNR
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "lte":
-                    current_tech |= 1 << 14 # network is lte MM_MODEM_ACCESS_TECHNOLOGY_LTE
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "hspap":
-                    current_tech |= 1 << 9 # network is hspa plus MM_MODEM_ACCESS_TECHNOLOGY_HSPA_PLUS
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "hspa":
-                    current_tech |= 1 << 8 # network is hspa MM_MODEM_ACCESS_TECHNOLOGY_HSPA
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "hsupa":
-                    current_tech |= 1 << 7 # network is hsupa MM_MODEM_ACCESS_TECHNOLOGY_HSUPA
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "hsdpa":
-                    current_tech |= 1 << 6 # network is hsdpa MM_MODEM_ACCESS_TECHNOLOGY_HSDPA
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "umts":
-                    current_tech |= 1 << 5 # network is umts MM_MODEM_ACCESS_TECHNOLOGY_UMTS
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "edge":
-                    current_tech |= 1 << 4 # network is edge MM_MODEM_ACCESS_TECHNOLOGY_EDGE
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "gprs":
-                    current_tech |= 1 << 3 # network is gprs MM_MODEM_ACCESS_TECHNOLOGY_GPRS
-                elif self.ofono_interface_props['org.ofono.NetworkRegistration']["Technology"].value == "gsm":
-                    current_tech |= 1 << 1 # network is gsm MM_MODEM_ACCESS_TECHNOLOGY_GSM
-
-                self.props['access-technologies'] = Variant('u', current_tech)
-            else:
-                self.props['access-technologies'] = Variant('u', 0) # network is unknown MM_MODEM_ACCESS_TECHNOLOGY_UNKNOWN
+            self.props.update(NO_NETWORK_PROPS)
+
+        if netreg_props is not None and self.props['state'].value >= 7 and "Technology" in netreg_props:
+            self.props['access-technologies'] = ACCESS_TECHNOLOGY_VARIANTS.get(netreg_props["Technology"].value, UINT_VARIANTS[0])
         else:
-            self.props['access-technologies'] = Variant('u', 0) # network is unknown MM_MODEM_ACCESS_TECHNOLOGY_UNKNOWN
-
-        supported_bands = []
-        gsm_bands = [1, 2, 3, 4, 14, 15, 16, 17, 18, 19, 20]
-        umts_bands = [5, 6, 7, 8, 9, 10, 11, 12, 13, 210, 211, 212, 213, 214, 219, 220, 221, 222, 225, 226, 232]
-        lte_bands = [31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 47, 48, 49, 50, 51, 52, 53, 54, 55, 56, 57, 58, 59, 60, 61, 62, 63, 64, 65, 66, 67, 68, 69, 70, 71, 72, 73, 74, 75, 76, 77, 78, 79, 80, 81, 82, 83, 84, 85, 86, 87, 88, 89, 90, 91, 92, 93, 94, 95, 96, 97, 98, 99, 100, 101, 115]
-        nr_bands = [301, 302, 303, 305, 307, 308, 312, 313, 314, 318, 320, 325, 326, 328, 329, 330, 334, 338, 339, 340, 341, 348, 350, 351, 353, 365, 366, 370, 371, 374, 375, 376, 377, 378, 379, 380, 381, 382, 383, 384, 386, 389, 390, 391, 392, 393, 394, 395, 557, 558, 560, 561]
-        if 'org.ofono.RadioSettings' in self.ofono_interface_props:
-            if 'AvailableTechnologies' in self.ofono_interface_props['org.ofono.RadioSettings']:
-                ofono_techs = self.ofono_interface_props['org.ofono.RadioSettings']['AvailableTechnologies'].value
-                if 'gsm' in ofono_techs:
-                    supported_bands.extend(gsm_bands)
-                if 'umts' in ofono_techs:
-                    supported_bands.extend(umts_bands)
-                if 'lte' in ofono_techs:
-                    supported_bands.extend(lte_bands)
-                if 'nr' in ofono_techs:
-                    supported_bands.extend(nr_bands)
-
-        self.props['current-bands'] = Variant('au', supported_bands)
-
-        for prop in self.props:
-            if self.props[prop].value != old_props[prop].value:
-                self.emit_properties_changed({prop: self.props[prop].value})
+            self.props['access-technologies'] = UINT_VARIANTS[0] # network is unknown MM_MODEM_ACCESS_TECHNOLOGY_UNKNOWN
+
+        technologies = 0
+        radio_props = self.ofono_interface_props['org.ofono.RadioSettings'] if 'org.ofono.RadioSettings' in self.ofono_interface_props else None
+        if radio_props is not None:
+            if 'AvailableTechnologies' in radio_props:
+                ofono_techs = radio_props['AvailableTechnologies'].value
+                for bit, tech in enumerate(TECHNOLOGY_BANDS):
+                    if tech in ofono_techs:
+                        technologies |= 1 << bit
+
+        self.props['current-bands'] = BANDS_BY_TECHNOLOGIES[technologies]
 
     async def check_signal_strength(self):
-        ofono2mm_print("Checking network registration", self.verbose)
+        ofono2mm_print("Checking network registration", self.verbose, obj=self)
 
         try:
-            await self.mm_modem.add_ofono_interface('org.ofono.NetworkRegistration')
+            if 'org.ofono.NetworkRegistration' not in self.ofono_interfaces:
+                await self.mm_modem.add_ofono_interface('org.ofono.NetworkRegistration')
             if 'org.ofono.NetworkRegistration' in self.ofono_interface_props:
                 if 'Strength' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
                     strength = self.ofono_interface_props['org.ofono.NetworkRegistration']['Strength'].value
-                    ofono2mm_print(f"Signal strength is available: {strength}", self.verbose)
+                    ofono2mm_print("Signal strength is available: %s", self.verbose, strength, obj=self)
                     return strength
                 else:
                     return 0
             else:
                 return 0
         except Exception as e:
-            ofono2mm_print(f"Failed to get signal strength: {e}", self.verbose)
+            ofono2mm_print("Failed to get signal strength: %s", self.verbose, e, obj=self)
             return 0
 
     @method()
     async def Connect(self, properties: 'a{sv}') -> 'o':
-        ofono2mm_print(f"Connecting with properties {properties}", self.verbose)
+        ofono2mm_print("Connecting with properties %s", self.verbose, properties, obj=self)
 
         self.set_props()
 
         if 'apn' not in properties:
-            ofono2mm_print("User provided no apn, using default value ''", self.verbose)
+            ofono2mm_print("User provided no apn, using default value ''", self.verbose, obj=self)
             apn = ''
         else:
             apn = properties['apn']
-        for b in self.mm_modem.bearers:
-            if self.mm_modem.bearers[b].props['Properties'].value['apn'] == apn:
+        # Bearers follow their oFono context's APN, so look them up here instead of keeping an index that can go stale
+        for b, bearer in self.mm_modem.bearers.items():
+            if bearer.props['Properties'].value['apn'] == apn:
                 try:
-                    await self.mm_modem.bearers[b].add_auth_ofono(properties['username'].value if 'username' in properties else '',
-                                                                  properties['password'].value if 'password' in properties else '')
+                    await bearer.add_auth_ofono(properties['username'].value if 'username' in properties else '',
+                                                properties['password'].value if 'password' in properties else '')
                 except Exception as e:
-                    ofono2mm_print(f"Failed to set ofono authentication: {e}", self.verbose)
-                self.mm_modem.bearers[b].props['Properties'] = Variant('a{sv}', properties)
-                if self.mm_modem.bearers[b].active_connect == 0:
-                    self.mm_modem.bearers[b].active_connect += 1
-                    await self.mm_modem.bearers[b].doConnect()
+                    ofono2mm_print("Failed to set ofono authentication: %s", self.verbose, e, obj=self)
+                bearer.update_props({'Properties': Variant('a{sv}', properties)})
+                if bearer.active_connect == 0:
+                    bearer.active_connect += 1
+                    await bearer.doConnect()
 
-                    ofono2mm_print(f"Bearer activated at path {b}", self.verbose)
+                    ofono2mm_print("Bearer activated at path %s", self.verbose, b, obj=self)
                     return b
         try:
             bearer = await self.mm_modem.doCreateBearer(properties)
@@ -201,74 +255,74 @@ class MMModemSimpleInterface(ServiceInterface):
                 self.mm_modem.bearers[bearer].active_connect += 1
                 await self.mm_modem.bearers[bearer].doConnect()
             else:
-                ofono2mm_print(f"Failed to create bearer, active connect is {self.mm_modem.bearers[bearer].active_connect}", self.verbose)
+                ofono2mm_print("Failed to create bearer, active connect is %s", self.verbose, self.mm_modem.bearers[bearer].active_connect, obj=self)
                 # 0 is always available so just fallback to that, whatever
                 bearer = '/org/freedesktop/ModemManager/Bearer/0'
         except Exception as e:
-            ofono2mm_print(f"Failed to create bearer: {e}", self.verbose)
+            ofono2mm_print("Failed to create bearer: %s", self.verbose, e, obj=self)
             bearer = '/org/freedesktop/ModemManager/Bearer/0'
 
-        ofono2mm_print(f"Bearer activated at path {bearer}", self.verbose)
+        ofono2mm_print("Bearer activated at path %s", self.verbose, bearer, obj=self)
         return bearer
 
     @method()
     async def Disconnect(self, path: 'o'):
-        ofono2mm_print(f"Disconnecting object path {path}", self.verbose)
+        ofono2mm_print("Disconnecting object path %s", self.verbose, path, obj=self)
 
         if path == '/':
             for b in self.mm_modem.bearers:
                 try:
                     await self.mm_modem.bearers[b].doDisconnect()
                 except Exception as e:
-                    ofono2mm_print(f"Failed to disconnect bearer {path}: {e}", self.verbose)
+                    ofono2mm_print("Failed to disconnect bearer %s: %s", self.verbose, path, e, obj=self)
         if path in self.mm_modem.bearers:
             try:
                 await self.mm_modem.bearers[path].doDisconnect()
             except Exception as e:
-                ofono2mm_print(f"Failed to disconnect bearer {path}: {e}", self.verbose)
+                ofono2mm_print("Failed to disconnect bearer %s: %s", self.verbose, path, e, obj=self)
 
     @method()
     def GetStatus(self) -> 'a{sv}':
-        ofono2mm_print("Returning status", self.verbose)
+        ofono2mm_print("Returning status", self.verbose, obj=self)
         self.set_props()
         return self.props
 
     async def network_manager_set_apn(self, force=False):
-        ofono2mm_print("Generating Network Manager connection", self.verbose)
+        ofono2mm_print("Generating Network Manager connection", self.verbose, obj=self)
 
-        if 'org.ofono.SimManager' in self.ofono_interface_props and 'Present' in self.ofono_interface_props['org.ofono.SimManager'].props:
-            if not self.ofono_interface_props['org.ofono.SimManager']['Present'].value:
-                ofono2mm_print("SIM is not present. no need to set APN", self.verbose)
+        sim_props = self.ofono_interface_props['org.ofono.SimManager'] if 'org.ofono.SimManager' in self.ofono_interface_props else None
+        if sim_props is not None and 'Present' in sim_props:
+            if not sim_props['Present'].value:
+                ofono2mm_print("SIM is not present. no need to set APN", self.verbose, obj=self)
                 return True
         else:
-            ofono2mm_print("SIM manager is not up yet", self.verbose)
+            ofono2mm_print("SIM manager is not up yet", self.verbose, obj=self)
             await asyncio.sleep(3)
             return False
 
-        if not (not 'PinRequired' in self.ofono_interface_props['org.ofono.SimManager'] or self.ofono_interface_props['org.ofono.SimManager']['PinRequired'].value == 'none'):
-            ofono2mm_print("SIM is still locked and/or not ready", self.verbose)
+        if not (not 'PinRequired' in sim_props or sim_props['PinRequired'].value == 'none'):
+            ofono2mm_print("SIM is still locked and/or not ready", self.verbose, obj=self)
             await asyncio.sleep(3)
             return False
 
-        DBusGMainLoop(set_as_default=True)
-
         current_timestamp = int(time())
 
         try:
-            sim_id = self.ofono_interface_props['org.ofono.SimManager']['CardIdentifier'].value
+            sim_id = sim_props['CardIdentifier'].value
         except Exception as e:
-            ofono2mm_print(f"Failed to get sim identifier: {e}", self.verbose)
+            ofono2mm_print("Failed to get sim identifier: %s", self.verbose, e, obj=self)
             return False
 
         try:
-            await self.mm_modem.add_ofono_interface('org.ofono.NetworkRegistration')
+            if 'org.ofono.NetworkRegistration' not in self.ofono_interfaces:
+                await self.mm_modem.add_ofono_interface('org.ofono.NetworkRegistration')
             carrier_name = self.ofono_interface_props['org.ofono.NetworkRegistration']['Name'].value
             if not carrier_name:
-                ofono2mm_print("Carrier name is empty. Not registered to a network yet", self.verbose)
+                ofono2mm_print("Carrier name is empty. Not registered to a network yet", self.verbose, obj=self)
                 await asyncio.sleep(3)
                 return False
         except Exception as e:
-            ofono2mm_print(f"Failed to get carrier name: {e}", self.verbose)
+            ofono2mm_print("Failed to get carrier name: %s", self.verbose, e, obj=self)
             return False
 
         try:
@@ -280,7 +334,7 @@ class MMModemSimpleInterface(ServiceInterface):
                     username = ctx[1].get('Username', Variant('s', '')).value
                     password = ctx[1].get('Password', Variant('s', '')).value
         except Exception as e:
-            ofono2mm_print(f"Failed to get contexts: {e}", self.verbose)
+            ofono2mm_print("Failed to get contexts: %s", self.verbose, e, obj=self)
             return False
 
         connection_settings = {
@@ -310,73 +364,103 @@ class MMModemSimpleInterface(ServiceInterface):
             connection_settings['gsm']['password'] = f'{password}'
 
         try:
-            self.network_manager_enable_wwan()
-            conn = self.network_manager_connection_exists(f'{sim_id}')
-            if not conn:
-                conn = NetworkManager.Settings.AddConnection(connection_settings)
-                ofono2mm_print(f"Connection '{conn.GetSettings()['connection']['id']}' created successfully with timestamp {current_timestamp}.", self.verbose)
-
-            if not force:
-                active_connections = NetworkManager.NetworkManager.ActiveConnections
-                for active_conn in active_connections:
-                    conn_path = active_conn.Connection.object_path
-                    if conn_path == conn.object_path:
-                        return True
-
-            NetworkManager.NetworkManager.ActivateConnection(conn.object_path, "/", "/")
-            return True
+            # python-networkmanager and dbus-python block on every call, keep them away from the event loop
+            async with self.nm_lock:
+                return await asyncio.to_thread(self.network_manager_activate, connection_settings, f'{sim_id}', force)
         except Exception as e:
-            ofono2mm_print(f"Failed to save network manager connection: {e}", self.verbose)
+            ofono2mm_print("Failed to save network manager connection: %s", self.verbose, e, obj=self)
             return False
 
-    def network_manager_connection_exists(self, target_sim_id):
-        ofono2mm_print(f"Checking if Network Manager connection exists for SIM ID {target_sim_id}", self.verbose)
+    def network_manager_activate(self, connection_settings, sim_id, force):
+        self.network_manager_enable_wwan()
+        conn = self.network_manager_connection_exists(sim_id)
+        if not conn:
+            conn = NetworkManager.Settings.AddConnection(connection_settings)
+            ofono2mm_print("Connection '%s' created successfully with timestamp %s.", self.verbose, connection_settings['connection']['id'], connection_settings['connection']['timestamp'], obj=self)
+
+        if not force:
+            active_connections = NetworkManager.NetworkManager.ActiveConnections
+            for active_conn in active_connections:
+                conn_path = active_conn.Connection.object_path
+                if conn_path == conn.object_path:
+                    return True
+
+        NetworkManager.NetworkManager.ActivateConnection(conn.object_path, "/", "/")
+        return True
 
-        found = False
+    def network_manager_init(self):
+        if self.nm_settings is not None:
+            return
 
         DBusGMainLoop(set_as_default=True)
 
-        # for some reason NetworkManager.NetworkManager.Reload doesn't work correctly
+        # Follow the name so the proxies keep working when NetworkManager restarts
         bus = SystemBus()
-        nm = bus.get_object("org.freedesktop.NetworkManager", "/org/freedesktop/NetworkManager/Settings")
+        nm_proxy = bus.get_object('org.freedesktop.NetworkManager', '/org/freedesktop/NetworkManager', follow_name_owner_changes=True)
+        nm_settings_proxy = bus.get_object('org.freedesktop.NetworkManager', '/org/freedesktop/NetworkManager/Settings', follow_name_owner_changes=True)
+
+        self.nm_properties = Interface(nm_proxy, 'org.freedesktop.DBus.Properties')
+        self.nm_settings = Interface(nm_settings_proxy, 'org.freedesktop.NetworkManager.Settings')
+
+    def network_manager_connection_exists(self, target_sim_id):
+        ofono2mm_print("Checking if Network Manager connection exists for SIM ID %s", self.verbose, target_sim_id, obj=self)
 
-        nm_settings = Interface(nm, "org.freedesktop.NetworkManager.Settings")
-        nm_settings.ReloadConnections()
+        found = False
+
+        # for some reason NetworkManager.NetworkManager.Reload doesn't work correctly
+        self.network_manager_init()
+        self.nm_settings.ReloadConnections()
 
         connections = NetworkManager.Settings.ListConnections()
 
-        for conn in connections:
-            conn_settings = conn.GetSettings()
-            if 'gsm' in conn_settings and 'sim-id' in conn_settings['gsm']:
-                apn = conn_settings['gsm']['sim-id']
-                if apn == target_sim_id:
+        # Try the connection we found last time first, that's one GetSettings instead of one per connection
+        last_found = self.nm_connections.get(target_sim_id)
+        if last_found is not None and any(conn.object_path == last_found.object_path for conn in connections):
+            if self.network_manager_sim_id(last_found) == target_sim_id:
+                found = last_found
+
+        if not found:
+            for conn in connections:
+                if self.network_manager_sim_id(conn) == target_sim_id:
                     found = conn
+                    self.nm_connections[target_sim_id] = conn
                     break
 
-        ofono2mm_print(f"Connection for SIM ID {target_sim_id} exists: {found}", self.verbose)
+        ofono2mm_print("Connection for SIM ID %s exists: %s", self.verbose, target_sim_id, found, obj=self)
         return found
 
+    def network_manager_sim_id(self, conn):
+        conn_settings = conn.GetSettings()
+        if 'gsm' in conn_settings and 'sim-id' in conn_settings['gsm']:
+            return conn_settings['gsm']['sim-id']
+        return None
+
     def network_manager_enable_wwan(self):
         try:
-            bus = SystemBus()
-            nm_proxy = bus.get_object('org.freedesktop.NetworkManager', '/org/freedesktop/NetworkManager')
+            self.network_manager_init()
+            self.nm_properties.Set('org.freedesktop.NetworkManager', 'WwanEnabled', True)
 
-            props = Interface(nm_proxy, 'org.freedesktop.DBus.Properties')
-            props.Set('org.freedesktop.NetworkManager', 'WwanEnabled', True)
-
-            ofono2mm_print("WWAN radio enabled successfully", self.verbose)
+            ofono2mm_print("WWAN radio enabled successfully", self.verbose, obj=self)
         except Exception as e:
-            ofono2mm_print(f"Failed to enable WWAN radio: {e}", self.verbose)
+            ofono2mm_print("Failed to enable WWAN radio: %s", self.verbose, e, obj=self)
             return False
         return True
 
-    def ofono_changed(self, name, varval):
+    def schedule_set_props(self):
+        # oFono tends to send a bunch of property changes at once, one set_props run can cover them all.
+        # GetStatus and Connect still run set_props themselves so they never see stale values.
+        if self.set_props_handle is None:
+            self.set_props_handle = asyncio.get_running_loop().call_later(SET_PROPS_DELAY, self.run_scheduled_set_props)
+
+    def run_scheduled_set_props(self):
+        self.set_props_handle = None
         self.set_props()
 
+    def ofono_changed(self, name, varval):
+        self.schedule_set_props()
+
     def ofono_client_changed(self, ofono_client):
         self.ofono_client = ofono_client
 
-    def ofono_interface_changed(self, iface):
-        def ch(name, varval):
-            self.set_props()
-        return ch
+    def ofono_interface_changed(self, iface, name, varval):
+        self.schedule_set_props()
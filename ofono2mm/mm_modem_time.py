@@ -9,7 +9,7 @@ class MMModemTimeInterface(ServiceInterface):
     def __init__(self, ofono_client, modem_name, ofono_interfaces, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Time')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing Time interface", verbose)
+        ofono2mm_print("Initializing Time interface", verbose, obj=self)
         self.ofono_client = ofono_client
         self.ofono_interfaces = ofono_interfaces
         self.verbose = verbose
@@ -21,13 +21,13 @@ class MMModemTimeInterface(ServiceInterface):
         }
 
     async def init_time(self):
-        ofono2mm_print("Initializing signals", self.verbose)
+        ofono2mm_print("Initializing signals", self.verbose, obj=self)
 
         if 'org.ofono.NetworkTime' in self.ofono_interfaces:
             self.ofono_interfaces['org.ofono.NetworkTime'].on_network_time_changed(self.update_time)
 
     async def update_time(self, time):
-        ofono2mm_print(f"Updating time to {time}", self.verbose)
+        ofono2mm_print("Updating time to %s", self.verbose, time, obj=self)
         utc_time = time['UTC'].value
         network_time = datetime.fromtimestamp(utc_time, tz=timezone.utc)
         self.network_time = network_time.isoformat()
@@ -43,7 +43,7 @@ class MMModemTimeInterface(ServiceInterface):
 
     @method()
     async def GetNetworkTime(self) -> 's':
-        ofono2mm_print("Returning network time", self.verbose)
+        ofono2mm_print("Returning network time", self.verbose, obj=self)
 
         if 'org.ofono.NetworkTime' in self.ofono_interfaces:
             ofono_interface = self.ofono_client["ofono_modem"][self.modem_name]['org.ofono.NetworkTime']
@@ -61,19 +61,19 @@ class MMModemTimeInterface(ServiceInterface):
             else:
                 self.network_time = datetime.now().isoformat()
         else:
-            ofono2mm_print("oFono NetworkTime is unavailable, using system time", self.verbose)
+            ofono2mm_print("oFono NetworkTime is unavailable, using system time", self.verbose, obj=self)
             self.network_time = datetime.now().isoformat()
 
         return self.network_time
 
     @signal()
     def NetworkTimeChanged(self, time: 's') -> 's':
-        ofono2mm_print(f"Signal: Network time changed to time {time}", self.verbose)
+        ofono2mm_print("Signal: Network time changed to time %s", self.verbose, time, obj=self)
         self.network_time = time
         return time
 
     def update_network_timezone(self, offset, dst_offset, leap_seconds):
-        ofono2mm_print(f"Update network timezone with offset {offset} dst offset {dst_offset} and leap_seconds {leap_seconds}", self.verbose)
+        ofono2mm_print("Update network timezone with offset %s dst offset %s and leap_seconds %s", self.verbose, offset, dst_offset, leap_seconds, obj=self)
 
         self.network_timezone = {
             'offset': Variant('i', offset),
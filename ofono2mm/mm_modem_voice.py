@@ -1,20 +1,33 @@
 from time import sleep
 import asyncio
+import re
 
 from dbus_fast.service import ServiceInterface, method, dbus_property, signal
 from dbus_fast.constants import PropertyAccess
-from dbus_fast import Variant
+from dbus_fast import Variant, DBusError
 
-from ofono2mm.mm_call import MMCallInterface
+from ofono2mm.mm_call import MMCallInterface, STATE_VARIANTS, REASON_VARIANTS, DIRECTION_VARIANTS, TRUE, FALSE
 from ofono2mm.logging import ofono2mm_print
 
+CALL_PATH_PREFIX = '/org/freedesktop/ModemManager1/Call/'
+
+# Supplementary service codes dialed in front of the number, like *31# or #31#
+SERVICE_CODE_PREFIX = re.compile(r'^(?:[*#][^#]*#)+')
+
+# oFono call states a new call can show up in: State, StateReason, Direction, whether to clean the number and whether to pass Multiparty on
+CALL_STATES = {
+    'incoming': (3, 2, 1, False, True), # MM_CALL_STATE_RINGING_IN, MM_CALL_STATE_REASON_INCOMING_NEW, MM_CALL_DIRECTION_INCOMING
+    'dialing': (2, 0, 2, False, False), # MM_CALL_STATE_RINGING_OUT, MM_CALL_STATE_REASON_UNKNOWN, MM_CALL_DIRECTION_OUTGOING
+    'alerting': (2, 1, 2, True, True), # MM_CALL_STATE_RINGING_OUT, MM_CALL_STATE_REASON_OUTGOING_STARTED, MM_CALL_DIRECTION_OUTGOING
+}
+
 call_i = 1
 
 class MMModemVoiceInterface(ServiceInterface):
     def __init__(self, bus, ofono_client, modem_name, ofono_interfaces, ofono_interface_props, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Modem.Voice')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing Voice interface", verbose)
+        ofono2mm_print("Initializing Voice interface", verbose, obj=self)
         self.bus = bus
         self.ofono_client = ofono_client
         self.ofono_interfaces = ofono_interfaces
@@ -22,172 +35,179 @@ class MMModemVoiceInterface(ServiceInterface):
         self.verbose = verbose
         self.props = {
             'Calls': Variant('ao', []),
-            'EmergencyOnly': Variant('b', False),
+            'EmergencyOnly': FALSE,
         }
         self.call_path_map = {}
+        # Reverse of call_path_map, DeleteCall gets the ModemManager path
+        self.mm_to_ofono_path = {}
+        self.pending_props_changed = {}
+        self.props_changed_handle = None
+        # oFono VoiceCallManager proxy, bound once instead of looked up on every call
+        self.voice_call_manager = None
+        # The VoiceCallManager proxy add_call and remove_call are registered on
+        self.call_handlers_proxy = None
 
     def set_props(self):
-        ofono2mm_print("Setting properties", self.verbose)
+        ofono2mm_print("Setting properties", self.verbose, obj=self)
+
+        # Calls are announced as they come and go, EmergencyOnly is the only property that follows oFono
+        self.set_emergency_mode()
+
+    def queue_properties_changed(self, changed_props):
+        # oFono adds and removes calls in bursts (multiparty, hanging up everything), send one PropertiesChanged per loop iteration
+        self.pending_props_changed.update(changed_props)
+        if self.props_changed_handle is None:
+            self.props_changed_handle = asyncio.get_running_loop().call_soon(self.flush_properties_changed)
 
-        old_props = self.props
-        for prop in self.props:
-            if self.props[prop].value != old_props[prop].value:
-                self.emit_properties_changed({prop: self.props[prop].value})
+    def flush_properties_changed(self):
+        changed_props, self.pending_props_changed = self.pending_props_changed, {}
+        self.props_changed_handle = None
+        if changed_props:
+            self.emit_properties_changed(changed_props)
 
     def set_emergency_mode(self):
-        if 'org.ofono.SimManager' in self.ofono_interfaces and 'FixedDialing' in self.ofono_interface_props['org.ofono.SimManager']:
-            self.props['EmergencyOnly'] = Variant('b', self.ofono_interface_props['org.ofono.SimManager']['FixedDialing'].value)
-        else:
-            self.props['EmergencyOnly'] = Variant('b', False)
+        sim_props = self.ofono_interface_props['org.ofono.SimManager'] if 'org.ofono.SimManager' in self.ofono_interfaces else None
+        emergency_only = sim_props['FixedDialing'].value if sim_props and 'FixedDialing' in sim_props else False
+        if self.props['EmergencyOnly'].value == emergency_only:
+            return
+
+        self.props['EmergencyOnly'] = TRUE if emergency_only else FALSE
+        self.queue_properties_changed({'EmergencyOnly': self.props['EmergencyOnly'].value})
 
     def init_calls(self):
-        ofono2mm_print("Initializing signals", self.verbose)
+        ofono2mm_print("Initializing signals", self.verbose, obj=self)
 
         try:
             self.set_emergency_mode()
         except Exception as e:
-            ofono2mm_print(f"Failed to check for emergency state, marking as false: {e}", self.verbose)
-            self.props['EmergencyOnly'] = Variant('b', False)
+            ofono2mm_print("Failed to check for emergency state, marking as false: %s", self.verbose, e, obj=self)
+            self.props['EmergencyOnly'] = FALSE
 
-        if 'org.ofono.VoiceCallManager' in self.ofono_interfaces:
-            self.ofono_interfaces['org.ofono.VoiceCallManager'].on_call_added(self.add_call)
-            self.ofono_interfaces['org.ofono.VoiceCallManager'].on_call_removed(self.remove_call)
+        self.bind_voice_call_manager()
+        # Handlers stay registered on the proxy, a second registration would add and remove every call twice
+        if self.voice_call_manager and self.voice_call_manager is not self.call_handlers_proxy:
+            self.voice_call_manager.on_call_added(self.add_call)
+            self.voice_call_manager.on_call_removed(self.remove_call)
+            self.call_handlers_proxy = self.voice_call_manager
+
+    def bind_voice_call_manager(self):
+        self.voice_call_manager = self.ofono_interfaces.get('org.ofono.VoiceCallManager')
+
+    def check_voice_call_manager(self):
+        if not self.voice_call_manager:
+            raise DBusError('org.freedesktop.ModemManager1.Error.Core.Unsupported', 'Cannot use voice calls: voice call manager is not available')
 
     def clean_phone_number(self, number):
         # Remove any *31#, #31#, or similar prefixes
-        while number.startswith('*') or number.startswith('#'):
-            number = number.split('#', 1)[-1]
-        return number
+        return SERVICE_CODE_PREFIX.sub('', number)
 
     async def add_call(self, path, props):
-        ofono2mm_print(f"Add call with object path {path} and properties {props}", self.verbose)
+        ofono2mm_print("Add call with object path %s and properties %s", self.verbose, path, props, obj=self)
 
         global call_i
 
+        call_state = CALL_STATES.get(props['State'].value)
+        if call_state is None:
+            return
+
         self.set_emergency_mode()
 
-        object_path = f'/org/freedesktop/ModemManager1/Call/{call_i}'
-        if props['State'].value == 'incoming':
-            mm_call_interface = MMCallInterface(self.ofono_client, self.ofono_interfaces, self.verbose)
-            mm_call_interface.props.update({
-                'State': Variant('i', 3), # ringing in MM_CALL_STATE_RINGING_IN
-                'StateReason': Variant('i', 2), # incoming new MM_CALL_STATE_REASON_INCOMING_NEW
-                'Direction': Variant('i', 1), # incoming MM_CALL_DIRECTION_INCOMING
-                'Number': Variant('s', props['LineIdentification'].value),
-                'Multiparty': props['Multiparty'],
-            })
-
-            mm_call_interface.voicecall = path
-            mm_call_interface.init_call()
-
-            self.bus.export(object_path, mm_call_interface)
-            self.props['Calls'].value.append(object_path)
-            self.call_path_map[path] = object_path
-            self.emit_properties_changed({'Calls': self.props['Calls'].value})
-            self.CallAdded(object_path)
-            call_i += 1
-        elif props['State'].value == 'dialing':
-            mm_call_interface = MMCallInterface(self.ofono_client, self.ofono_interfaces, self.verbose)
-            mm_call_interface.props.update({
-                'State': Variant('i', 2),  # ringing out MM_CALL_STATE_RINGING_OUT
-                'StateReason': Variant('i', 0), # outgoing started MM_CALL_STATE_REASON_UNKNOWN
-                'Direction': Variant('i', 2), # outgoing MM_CALL_DIRECTION_OUTGOING
-                'Number': Variant('s', props['LineIdentification'].value),
-            })
-
-            mm_call_interface.voicecall = path
-            mm_call_interface.init_call()
-
-            self.bus.export(object_path, mm_call_interface)
-            self.props['Calls'].value.append(object_path)
-            self.call_path_map[path] = object_path
-            self.emit_properties_changed({'Calls': self.props['Calls'].value})
-            self.CallAdded(object_path)
-            call_i += 1
-        elif props['State'].value == 'alerting':
-            cleaned_number = self.clean_phone_number(props['LineIdentification'].value)
-            mm_call_interface = MMCallInterface(self.ofono_client, self.ofono_interfaces, self.verbose)
-            mm_call_interface.props.update({
-                'State': Variant('i', 2), # ringing in MM_CALL_STATE_RINGING_OUT
-                'StateReason': Variant('i', 1), # incoming new MM_CALL_STATE_REASON_OUTGOING_STARTED
-                'Direction': Variant('i', 2), # incoming MM_CALL_DIRECTION_INCOMING
-                'Number': Variant('s', cleaned_number),
-                'Multiparty': props['Multiparty'],
-            })
-
-            mm_call_interface.voicecall = path
-            mm_call_interface.init_call()
-
-            self.bus.export(object_path, mm_call_interface)
-            self.props['Calls'].value.append(object_path)
-            self.call_path_map[path] = object_path
-            self.emit_properties_changed({'Calls': self.props['Calls'].value})
-            self.CallAdded(object_path)
-            call_i += 1
+        state, state_reason, direction, clean_number, multiparty = call_state
+        number = props['LineIdentification'].value
+        call_props = {
+            'State': STATE_VARIANTS[state],
+            'StateReason': REASON_VARIANTS[state_reason],
+            'Direction': DIRECTION_VARIANTS[direction],
+            'Number': Variant('s', self.clean_phone_number(number) if clean_number else number),
+        }
+        if multiparty:
+            call_props['Multiparty'] = props['Multiparty']
+
+        object_path = CALL_PATH_PREFIX + str(call_i)
+        mm_call_interface = MMCallInterface(self.ofono_client, self.ofono_interfaces, self.verbose)
+        mm_call_interface.update_props(call_props)
+
+        mm_call_interface.voicecall = path
+        mm_call_interface.init_call()
+
+        self.bus.export(object_path, mm_call_interface)
+        self.props['Calls'].value.append(object_path)
+        self.call_path_map[path] = object_path
+        self.mm_to_ofono_path[object_path] = path
+        self.queue_properties_changed({'Calls': self.props['Calls'].value})
+        self.CallAdded(object_path)
+        call_i += 1
 
     async def remove_call(self, path):
-        ofono2mm_print(f"Remove call with object path {path}", self.verbose)
+        ofono2mm_print("Remove call with object path %s", self.verbose, path, obj=self)
 
-        try:
-            mm_path = self.call_path_map[path]
-            self.props['Calls'].value.remove(mm_path)
-            self.bus.unexport(mm_path)
-            del self.call_path_map[path]
-            self.emit_properties_changed({'Calls': self.props['Calls'].value})
-            self.CallDeleted(mm_path)
-        except KeyError:
-            ofono2mm_print(f"No mapping found for ofono path {path}", self.verbose)
-        except Exception as e:
-            ofono2mm_print(f"Error while removing call {path}: {e}", self.verbose)
+        # Calls hung up through DeleteCall are already gone by the time oFono reports them removed
+        mm_path = self.call_path_map.pop(path, None)
+        if mm_path is None:
+            ofono2mm_print("No mapping found for ofono path %s", self.verbose, path, obj=self)
+        else:
+            self.mm_to_ofono_path.pop(mm_path, None)
+            try:
+                self.props['Calls'].value.remove(mm_path)
+                self.bus.unexport(mm_path)
+                self.queue_properties_changed({'Calls': self.props['Calls'].value})
+                self.CallDeleted(mm_path)
+            except Exception as e:
+                ofono2mm_print("Error while removing call %s: %s", self.verbose, path, e, obj=self)
 
         self.set_emergency_mode()
 
     @method()
     async def ListCalls(self) -> 'ao':
-        ofono2mm_print("Returning list of calls", self.verbose)
+        ofono2mm_print("Returning list of calls", self.verbose, obj=self)
         return self.props['Calls'].value
 
     @method()
     async def DeleteCall(self, path: 'o'):
-        ofono2mm_print(f"Deleting call with object path {path}", self.verbose)
-
-        if path in self.props['Calls'].value:
-            await self.ofono_interfaces['org.ofono.VoiceCallManager'].call_hangup_all()
-            self.props['Calls'].value.remove(path)
-            ofono_path = next((k for k, v in self.call_path_map.items() if v == path), None)
-            if ofono_path:
-                del self.call_path_map[ofono_path]
-            self.bus.unexport(path)
-            self.emit_properties_changed({'Calls': self.props['Calls'].value})
-            self.CallDeleted(path)
-
-            if 'org.ofono.SimManager' in self.ofono_interfaces and 'FixedDialing' in self.ofono_interface_props['org.ofono.SimManager']:
-                self.props['EmergencyOnly'] = Variant('b', self.ofono_interface_props['org.ofono.SimManager']['FixedDialing'].value)
-            else:
-                self.props['EmergencyOnly'] = Variant('b', False)
+        ofono2mm_print("Deleting call with object path %s", self.verbose, path, obj=self)
+
+        # Every exported call has a reverse mapping, check that instead of scanning the Calls list
+        if path not in self.mm_to_ofono_path:
+            return
+
+        self.check_voice_call_manager()
+        await self.voice_call_manager.call_hangup_all()
+
+        # remove_call may have dropped it already while oFono was hanging up
+        ofono_path = self.mm_to_ofono_path.pop(path, None)
+        if ofono_path is None:
+            return
+
+        self.call_path_map.pop(ofono_path, None)
+        self.props['Calls'].value.remove(path)
+        self.bus.unexport(path)
+        self.queue_properties_changed({'Calls': self.props['Calls'].value})
+        self.CallDeleted(path)
+        self.set_emergency_mode()
 
     @method()
     async def CreateCall(self, properties: 'a{sv}') -> 'o':
-        ofono2mm_print(f"Creating call with properties {properties}", self.verbose)
+        ofono2mm_print("Creating call with properties %s", self.verbose, properties, obj=self)
 
         global call_i
 
         self.set_emergency_mode()
 
         mm_call_interface = MMCallInterface(self.ofono_client, self.ofono_interfaces, self.verbose)
-        mm_call_interface.props.update({
-            'State': Variant('i', 2), # ringing out MM_CALL_STATE_RINGING_OUT
-            'StateReason': Variant('i', 1), # outgoing started MM_CALL_STATE_REASON_OUTGOING_STARTED
-            'Direction': Variant('i', 2), # outgoing MM_CALL_DIRECTION_OUTGOING
+        mm_call_interface.update_props({
+            'State': STATE_VARIANTS[2], # ringing out MM_CALL_STATE_RINGING_OUT
+            'StateReason': REASON_VARIANTS[1], # outgoing started MM_CALL_STATE_REASON_OUTGOING_STARTED
+            'Direction': DIRECTION_VARIANTS[2], # outgoing MM_CALL_DIRECTION_OUTGOING
             'Number': Variant('s', properties['number'].value),
         })
 
-        object_path = f'/org/freedesktop/ModemManager1/Call/{call_i}'
+        object_path = CALL_PATH_PREFIX + str(call_i)
 
+        self.check_voice_call_manager()
         try:
-            path = await self.ofono_interfaces['org.ofono.VoiceCallManager'].call_dial(properties['number'].value, "")
+            path = await self.voice_call_manager.call_dial(properties['number'].value, "")
         except Exception as e:
-            ofono2mm_print(f"Failed to dial: {e}", self.verbose)
+            ofono2mm_print("Failed to dial: %s", self.verbose, e, obj=self)
             return object_path # CallAdded should take care of the rest on false failures? kind of a hack but it works ¯\_(ツ)_/¯
 
         mm_call_interface.voicecall = path
@@ -196,7 +216,8 @@ class MMModemVoiceInterface(ServiceInterface):
         self.bus.export(object_path, mm_call_interface)
         self.props['Calls'].value.append(object_path)
         self.call_path_map[path] = object_path
-        self.emit_properties_changed({'Calls': self.props['Calls'].value})
+        self.mm_to_ofono_path[object_path] = path
+        self.queue_properties_changed({'Calls': self.props['Calls'].value})
         self.CallAdded(object_path)
         call_i += 1
 
@@ -204,41 +225,45 @@ class MMModemVoiceInterface(ServiceInterface):
 
     @method()
     async def HoldAndAccept(self):
-        ofono2mm_print("Holding and accepting call", self.verbose)
-        await self.ofono_interfaces['org.ofono.VoiceCallManager'].call_hold_and_answer()
+        ofono2mm_print("Holding and accepting call", self.verbose, obj=self)
+        self.check_voice_call_manager()
+        await self.voice_call_manager.call_hold_and_answer()
 
     @method()
     async def HangupAndAccept(self):
-        ofono2mm_print("Hanging up and accepting call", self.verbose)
-        await self.ofono_interfaces['org.ofono.VoiceCallManager'].call_release_and_answer()
+        ofono2mm_print("Hanging up and accepting call", self.verbose, obj=self)
+        self.check_voice_call_manager()
+        await self.voice_call_manager.call_release_and_answer()
 
     @method()
     async def HangupAll(self):
-        ofono2mm_print("Hanging up all calls", self.verbose)
-        await self.ofono_interfaces['org.ofono.VoiceCallManager'].call_hangup_all()
+        ofono2mm_print("Hanging up all calls", self.verbose, obj=self)
+        self.check_voice_call_manager()
+        await self.voice_call_manager.call_hangup_all()
 
     @method()
     async def Transfer(self):
-        ofono2mm_print("Transfering call", self.verbose)
-        await self.ofono_interfaces['org.ofono.VoiceCallManager'].call_transfer()
+        ofono2mm_print("Transfering call", self.verbose, obj=self)
+        self.check_voice_call_manager()
+        await self.voice_call_manager.call_transfer()
 
     @method()
     def CallWaitingSetup(self, enable: 'b'):
-        ofono2mm_print(f"Activate call waiting network: {enable}", self.verbose)
+        ofono2mm_print("Activate call waiting network: %s", self.verbose, enable, obj=self)
 
     @method()
     def CallWaitingQuery(self) -> 'b':
-        ofono2mm_print("Query the status of call waiting network", self.verbose)
+        ofono2mm_print("Query the status of call waiting network", self.verbose, obj=self)
         return True
 
     @signal()
     def CallAdded(self, path) -> 'o':
-        ofono2mm_print(f"Signal: Call added with object path {path}", self.verbose)
+        ofono2mm_print("Signal: Call added with object path %s", self.verbose, path, obj=self)
         return path
 
     @signal()
     def CallDeleted(self, path) -> 'o':
-        ofono2mm_print(f"Signal: Call deleted with object path {path}", self.verbose)
+        ofono2mm_print("Signal: Call deleted with object path %s", self.verbose, path, obj=self)
         return path
 
     @dbus_property(access=PropertyAccess.READ)
@@ -250,12 +275,11 @@ class MMModemVoiceInterface(ServiceInterface):
         return self.props['EmergencyOnly'].value
 
     def ofono_changed(self, name, varval):
-        self.set_props()
+        pass
 
     def ofono_client_changed(self, ofono_client):
         self.ofono_client = ofono_client
 
-    def ofono_interface_changed(self, iface):
-        def ch(name, varval):
+    def ofono_interface_changed(self, iface, name, varval):
+        if iface == 'org.ofono.SimManager' and name == 'FixedDialing':
             self.set_props()
-        return ch
@@ -9,7 +9,7 @@ class MMSimInterface(ServiceInterface):
     def __init__(self, modem_name, ofono_interfaces, ofono_interface_props, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Sim')
         self.modem_name = modem_name
-        ofono2mm_print("Initializing SIM interface", verbose)
+        ofono2mm_print("Initializing SIM interface", verbose, obj=self)
         self.ofono_interfaces = ofono_interfaces
         self.ofono_interface_props = ofono_interface_props
         self.verbose = verbose
@@ -30,36 +30,37 @@ class MMSimInterface(ServiceInterface):
         }
 
     def set_props(self):
-        ofono2mm_print("Setting properties", self.verbose)
+        ofono2mm_print("Setting properties", self.verbose, obj=self)
 
-        old_props = self.props
+        old_props = self.props.copy()
 
         if 'org.ofono.SimManager' in self.ofono_interface_props:
-            if 'Present' in self.ofono_interface_props['org.ofono.SimManager']:
-                if self.ofono_interface_props['org.ofono.SimManager']['Present'].value:
+            sim_props = self.ofono_interface_props['org.ofono.SimManager']
+            if 'Present' in sim_props:
+                if sim_props['Present'].value:
                     self.props['Active'] = Variant('b', True)
                 else:
                     self.props['Active'] = Variant('b', False)
             else:
                 self.props['Active'] = Variant('b', False)
 
-            if 'CardIdentifier' in self.ofono_interface_props['org.ofono.SimManager']:
-                self.props['SimIdentifier'] = Variant('s', self.ofono_interface_props['org.ofono.SimManager']['CardIdentifier'].value)
+            if 'CardIdentifier' in sim_props:
+                self.props['SimIdentifier'] = Variant('s', sim_props['CardIdentifier'].value)
             else:
                 self.props['SimIdentifier'] = Variant('s', '')
 
-            if 'SubscriberIdentity' in self.ofono_interface_props['org.ofono.SimManager']:
-                self.props['Imsi'] = Variant('s', self.ofono_interface_props['org.ofono.SimManager']['SubscriberIdentity'].value)
+            if 'SubscriberIdentity' in sim_props:
+                self.props['Imsi'] = Variant('s', sim_props['SubscriberIdentity'].value)
             else:
                 self.props['Imsi'] = Variant('s', '')
 
             MCC = ''
-            if 'MobileCountryCode' in self.ofono_interface_props['org.ofono.SimManager']:
-                MCC = self.ofono_interface_props['org.ofono.SimManager']['MobileCountryCode'].value
+            if 'MobileCountryCode' in sim_props:
+                MCC = sim_props['MobileCountryCode'].value
 
             MNC = ''
-            if 'MobileNetworkCode' in self.ofono_interface_props['org.ofono.SimManager']:
-                MNC = self.ofono_interface_props['org.ofono.SimManager']['MobileNetworkCode'].value
+            if 'MobileNetworkCode' in sim_props:
+                MNC = sim_props['MobileNetworkCode'].value
 
             self.props['OperatorIdentifier'] = Variant('s', f"{MCC}{MNC}" if MCC and MNC else "")
             self.props['PreferredNetworks'] = Variant('a(su)', [[f"{MCC}{MNC}", 19]] if MCC and MNC else [])
@@ -72,15 +73,16 @@ class MMSimInterface(ServiceInterface):
 
         # if sim manager is not available for some info, get it from network registration
         if 'org.ofono.NetworkRegistration' in self.ofono_interface_props:
-            self.props['OperatorName'] = Variant('s', self.ofono_interface_props['org.ofono.NetworkRegistration']['Name'].value if "Name" in self.ofono_interface_props['org.ofono.NetworkRegistration'] else '')
+            netreg_props = self.ofono_interface_props['org.ofono.NetworkRegistration']
+            self.props['OperatorName'] = Variant('s', netreg_props['Name'].value if "Name" in netreg_props else '')
 
-            if 'MobileCountryCode' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                MCC = self.ofono_interface_props['org.ofono.NetworkRegistration']['MobileCountryCode'].value
+            if 'MobileCountryCode' in netreg_props:
+                MCC = netreg_props['MobileCountryCode'].value
             else:
                 MCC = ''
 
-            if 'MobileNetworkCode' in self.ofono_interface_props['org.ofono.NetworkRegistration']:
-                MNC = self.ofono_interface_props['org.ofono.NetworkRegistration']['MobileNetworkCode'].value
+            if 'MobileNetworkCode' in netreg_props:
+                MNC = netreg_props['MobileNetworkCode'].value
             else:
                 MNC = ''
 
@@ -90,15 +92,16 @@ class MMSimInterface(ServiceInterface):
                 self.props['PreferredNetworks'] = Variant('a(su)', [[f"{MCC}{MNC}", 19]] if MCC and MNC else [])
 
         if 'org.ofono.VoiceCallManager' in self.ofono_interface_props:
-            self.props['EmergencyNumbers'] = Variant('as', self.ofono_interface_props['org.ofono.VoiceCallManager']['EmergencyNumbers'].value if 'EmergencyNumbers' in self.ofono_interface_props['org.ofono.VoiceCallManager'] else [])
+            voice_props = self.ofono_interface_props['org.ofono.VoiceCallManager']
+            self.props['EmergencyNumbers'] = Variant('as', voice_props['EmergencyNumbers'].value if 'EmergencyNumbers' in voice_props else [])
 
-        for prop in self.props:
-            if self.props[prop].value != old_props[prop].value:
-                self.emit_properties_changed({prop: self.props[prop].value})
+        changed_props = {name: prop.value for name, prop in self.props.items() if prop is not old_props[name] and prop.value != old_props[name].value}
+        if changed_props:
+            self.emit_properties_changed(changed_props)
 
     @method()
     async def SendPin(self, pin: 's'):
-        ofono2mm_print(f"Sending pin {pin}", self.verbose)
+        ofono2mm_print("Sending pin %s", self.verbose, pin, obj=self)
 
         if 'org.ofono.SimManager' in self.ofono_interfaces:
             await self.ofono_interfaces['org.ofono.SimManager'].call_enter_pin('pin', pin)
@@ -107,7 +110,7 @@ class MMSimInterface(ServiceInterface):
 
     @method()
     async def SendPuk(self, puk: 's', pin: 's'):
-        ofono2mm_print(f"Sending puk {puk} pin {pin}", self.verbose)
+        ofono2mm_print("Sending puk %s pin %s", self.verbose, puk, pin, obj=self)
 
         if 'org.ofono.SimManager' in self.ofono_interfaces:
             await self.ofono_interfaces['org.ofono.SimManager'].call_reset_pin('pin', puk, pin)
@@ -116,7 +119,7 @@ class MMSimInterface(ServiceInterface):
 
     @method()
     async def EnablePin(self, pin: 's', enabled: 'b'):
-        ofono2mm_print(f"Enabling pin: {enabled} set pin to {pin}", self.verbose)
+        ofono2mm_print("Enabling pin: %s set pin to %s", self.verbose, enabled, pin, obj=self)
 
         if 'org.ofono.SimManager' in self.ofono_interfaces:
             if enabled:
@@ -128,7 +131,7 @@ class MMSimInterface(ServiceInterface):
 
     @method()
     async def ChangePin(self, old_pin: 's', new_pin: 's'):
-        ofono2mm_print(f"Change pin from {old_pin} to {new_pin}", self.verbose)
+        ofono2mm_print("Change pin from %s to %s", self.verbose, old_pin, new_pin, obj=self)
 
         if 'org.ofono.SimManager' in self.ofono_interfaces:
             await self.ofono_interfaces['org.ofono.SimManager'].call_change_pin('pin', old_pin, new_pin)
@@ -197,7 +200,5 @@ class MMSimInterface(ServiceInterface):
     def ofono_client_changed(self, ofono_client):
         self.ofono_client = ofono_client
 
-    def ofono_interface_changed(self, iface):
-        def ch(name, varval):
-            self.set_props()
-        return ch
+    def ofono_interface_changed(self, iface, name, varval):
+        self.set_props()
@@ -8,7 +8,7 @@ from ofono2mm.logging import ofono2mm_print
 class MMSmsInterface(ServiceInterface):
     def __init__(self, verbose=False):
         super().__init__('org.freedesktop.ModemManager1.Sms')
-        ofono2mm_print("Initializing SMS interface", verbose)
+        ofono2mm_print("Initializing SMS interface", verbose, obj=self)
         self.verbose = verbose
         self.props = {
             "State": Variant('u', 0), # default value unknown MM_SMS_STATE_UNKNOWN
@@ -30,11 +30,11 @@ class MMSmsInterface(ServiceInterface):
 
     @method()
     def Send(self):
-        ofono2mm_print("Sending SMS", self.verbose)
+        ofono2mm_print("Sending SMS", self.verbose, obj=self)
 
     @method()
     def Store(self, storage: 'u'):
-        ofono2mm_print(f"Storing SMS to {storage}", self.verbose)
+        ofono2mm_print("Storing SMS to %s", self.verbose, storage, obj=self)
 
     @dbus_property(access=PropertyAccess.READ)
     def State(self) -> 'u':
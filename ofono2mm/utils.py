@@ -1,13 +1,16 @@
 import asyncio
+import random
 from os import makedirs
 from os.path import join, exists
 
 settings_dir = '/var/lib/ofono2mm'
 settings_file = join(settings_dir, 'settings.conf')
 
-def async_retryable(times=0):
+def async_retryable(times=0, base_delay=1.0, max_delay=30.0, jitter=0.5):
     """
     Decorator that allows to retry the given function n times.
+    Between tries it waits like call_with_backoff, starting at base_delay and never more
+    than max_delay before jitter.
 
     Usage:
 
@@ -16,29 +19,42 @@ def async_retryable(times=0):
         raise Exception("This function will be tried five times!")
 
     If times is 0 (default), the function will be retried indefinitely.
+    Cancelling the task stops the retries right away.
     """
 
     def decorator(func):
             async def wrapper(*args, **kwargs):
-                    current_try = 0
-                    while times == 0 or current_try < times:
-                            try:
-                                    result = await func(*args, **kwargs)
-                            except Exception as e:
-                                    if current_try == times-1:
-                                            raise
-
-                                    # print("Trying again, error was %s" % e)
-                                    await asyncio.sleep(5)
-
-                                    current_try += 1
-                            else:
-                                    return result
+                    return await call_with_backoff(lambda: func(*args, **kwargs), times, base_delay, max_delay, jitter)
 
             return wrapper
 
     return decorator
 
+async def call_with_backoff(coro_factory, retries=5, base_delay=0.2, max_delay=5.0, jitter=0.5):
+    """
+    Awaits coro_factory() until it succeeds, at most retries times, or forever if retries is 0.
+
+    Between attempts it sleeps with exponential backoff, capped at max_delay and
+    stretched by up to jitter times the delay. There's no sleep after the last
+    attempt, its exception is raised right away.
+
+    Usage:
+
+    contexts = await call_with_backoff(lambda: connection_manager.call_get_contexts())
+    """
+
+    attempt = 0
+    while True:
+        try:
+            return await coro_factory()
+        except Exception:
+            if attempt == retries - 1:
+                raise
+
+            delay = min(max_delay, base_delay * 2 ** min(attempt, 16)) * (1 + random.uniform(0, jitter))
+            await asyncio.sleep(delay)
+            attempt += 1
+
 def async_locked(func):
     async def wrapper(*args, **kwargs):
         async with func.__lock: